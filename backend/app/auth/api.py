@@ -186,7 +186,7 @@ async def complete_google_auth(code: str, db: Session = Depends(get_db)):
         )
 
 @router.get("/me", response_model=UserResponse)
-async def get_current_user(
+def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
 ):
@@ -285,7 +285,7 @@ async def logout():
     return {"message": "Logged out successfully"}
 
 @router.get("/user/profile/{user_id}")
-async def get_user_profile(user_id: str, db: Session = Depends(get_db)):
+def get_user_profile(user_id: str, db: Session = Depends(get_db)):
     """Get user profile by ID"""
     try:
         from ..services.user_service import UserService
@@ -306,7 +306,7 @@ async def get_user_profile(user_id: str, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=f"Failed to get user profile: {str(e)}")
 
 @router.get("/user/check/{email}")
-async def check_user_exists(email: str, db: Session = Depends(get_db)):
+def check_user_exists(email: str, db: Session = Depends(get_db)):
     """Check if user exists by email"""
     try:
         from ..services.user_service import UserService
@@ -328,7 +328,7 @@ async def check_user_exists(email: str, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=f"Failed to check user existence: {str(e)}")
 
 @router.post("/user/onboarding")
-async def complete_user_onboarding(
+def complete_user_onboarding(
     user_id: str,
     full_name: str = None,
     db: Session = Depends(get_db)
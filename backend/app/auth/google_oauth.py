@@ -120,10 +120,7 @@ async def create_or_get_user_from_google(user_info: Dict[str, Any], db_session)
         print(f"Prepared user data: email={user_data.email}, name={user_data.full_name}, google_id={user_data.google_id}")
         
         # Create or get existing user
-        user = user_service.create_or_get_user(user_data)
-        
-        # Check if this is a new user
-        is_new_user = user.created_at == user.updated_at
+        user, is_new_user = user_service.create_or_get_user(user_data)
         
         print(f"User {'created' if is_new_user else 'retrieved'}: {user.email} (ID: {user.id})")
         
@@ -1,31 +1,52 @@
-from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
 from .prompt import SYSTEM_PROMPT
-from .structured_prompt import STRUCTURED_SYSTEM_PROMPT
+from .structured_prompt import STRUCTURED_SYSTEM_PROMPT, STRUCTURED_PROMPT_ID, with_stable_prefix
+from .streaming import IncrementalJSONParser, chat_stream_event, format_sse
+from .question_engine import QuestionEngine, QUESTION_ENGINE, START_MESSAGE
+from .structured_output import structured_response_format
+from .compaction import CHAT_CONTEXT_MODE, apply_assistant_response, apply_user_answer, build_compact_messages
 from .models import (
     StructuredLLMResponse, QuestionResponse, BikeSpecification,
-    ChatSessionRequest, ChatResponse, ImageGenerationRequest, ImageGenerationResponse
+    ChatSessionRequest, ChatResponse, ImageGenerationRequest, ImageGenerationResponse, ImageJobResponse
+)
+from .image_delivery import IMMUTABLE_CACHE_CONTROL, REVALIDATE_CACHE_CONTROL, blob_response, etag_for_key, etag_matches
+from .image_jobs import (
+    ImageJobWorkerPool, create_image_job_queue, new_job, TERMINAL_JOB_STATUSES, JOB_SUCCEEDED,
+    JOB_SETTLED_COMPENSATED, JOB_SETTLED_KEPT
 )
 from .utils import (
-    get_openai_client, parse_llm_response, validate_custom_input,
-    initialize_session, get_session_messages, track_custom_followup,
+    get_async_openai_client, parse_llm_response, validate_custom_input,
+    initialize_session, load_session, save_session_messages, track_custom_followup, record_chat_usage,
     validate_custom_fields, create_image_prompt,
-    generate_bike_image, session_store, image_files, bike_specs,
+    generate_bike_image, conversation_store,
     validate_custom_message_for_image_generation
 )
 import os
 import base64
 from datetime import datetime, timezone
-from sqlalchemy.orm import Session
-from app.dependencies import get_db
+from sqlalchemy.orm import Session, undefer
+from app.dependencies import get_db, session_scope
 from app.services.project_service import ProjectService
+from app.services.project_cache import project_cache
 from app.models import Project, ProjectStatus
+from app.blob_store import blob_key, blob_store, image_content_type, put_image
+from app.thumbnails import create_project_thumbnails
 from uuid import UUID
+from typing import Optional, Tuple
 import json
+import asyncio
 import traceback
 
 router = APIRouter()
 
+# Seconds between job status checks on the image job event stream
+IMAGE_JOB_POLL_INTERVAL = float(os.getenv("IMAGE_JOB_POLL_INTERVAL", "1"))
+
+# Serves the predefined question steps locally; the LLM only handles custom follow-ups
+question_engine = QuestionEngine(conversation_store)
+
 
 def extract_readable_content(ai_message: str) -> str:
     """Extract human-readable content from AI response, handling various formats"""
@@ -68,44 +89,43 @@ def save_bike_configuration(project_id: str, structured_response):
             print(f"❌ Invalid UUID format for project_id {project_id}")
             return
         
-        # Get database session
-        db = next(get_db())
-        project = db.query(Project).filter(Project.id == project_uuid).first()
-        if not project:
-            print(f"❌ Project {project_id} not found")
-            return
-        
-        # Get the bike specification from the structured response
-        bike_spec = structured_response.get_bike_specification()
-        if bike_spec:
-            # Convert bike spec to configuration format using Pydantic's model_dump
-            bike_spec_dict = bike_spec.model_dump()
-            configuration = {
-                "bike_specification": bike_spec_dict,
-                "completion_timestamp": datetime.now(timezone.utc).isoformat(),
-                "status": ProjectStatus.COMPLETED.value
-            }
-            
-            # Update project configuration
-            project.configuration = configuration
-            project.status = ProjectStatus.COMPLETED
-            
-            try:
-                db.commit()
-                db.refresh(project)
-            except Exception as e:
-                db.rollback()
+        # One short-lived session for this helper
+        with session_scope() as db:
+            project = db.query(Project).filter(Project.id == project_uuid).first()
+            if not project:
+                print(f"❌ Project {project_id} not found")
                 return
-        else:
-            print(f"❌ No bike specification found for project {project_id}")
+            
+            # Get the bike specification from the structured response
+            bike_spec = structured_response.get_bike_specification()
+            if bike_spec:
+                # Convert bike spec to configuration format using Pydantic's model_dump
+                bike_spec_dict = bike_spec.model_dump()
+                configuration = {
+                    "bike_specification": bike_spec_dict,
+                    "completion_timestamp": datetime.now(timezone.utc).isoformat(),
+                    "status": ProjectStatus.COMPLETED.value
+                }
+                
+                # Update project configuration
+                project.configuration = configuration
+                project.status = ProjectStatus.COMPLETED
+                
+                try:
+                    db.commit()
+                    if project_cache is not None:
+                        project_cache.bump(project.user_id)
+                except Exception as e:
+                    db.rollback()
+                    return
+            else:
+                print(f"❌ No bike specification found for project {project_id}")
             
     except Exception as e:
         print(f"❌ Error saving bike configuration: {e}")
-    finally:
-        db.close()
 
-def save_image_to_project(project_id: str, image_base64: str):
-    """Save the generated image to the project's image_base64 column"""
+def save_image_to_project(project_id: str, image_base64: str) -> Optional[str]:
+    """Save the generated image to the blob store and reference it from the project; returns the image key"""
     try:
         # Validate project_id format
         if not project_id or not isinstance(project_id, str) or project_id.strip() == '':
@@ -119,29 +139,29 @@ def save_image_to_project(project_id: str, image_base64: str):
             print("❌ Invalid UUID format")
             return
         
-        # Get database session
-        db = next(get_db())
-        project = db.query(Project).filter(Project.id == project_uuid).first()
-        if not project:
-            print("❌ Project not found")
-            return
-        
-        # Update project image
-        project.image_base64 = image_base64
-        
-        try:
-            db.commit()
-            db.refresh(project)
-            print("✅ Image saved to project")
-        except Exception as e:
-            db.rollback()
-            print(f"❌ Error saving image: {e}")
-            return
+        # One short-lived session for this helper
+        with session_scope() as db:
+            project = db.query(Project).filter(Project.id == project_uuid).first()
+            if not project:
+                print("❌ Project not found")
+                return
+            
+            # Store the image bytes in the blob store, the row keeps only key, size and dimensions
+            project.set_image(*put_image(base64.b64decode(image_base64)))
+            
+            try:
+                db.commit()
+                if project_cache is not None:
+                    project_cache.bump(project.user_id)
+                print("✅ Image saved to project")
+                return project.image_key
+            except Exception as e:
+                db.rollback()
+                print(f"❌ Error saving image: {e}")
+                return
             
     except Exception as e:
         print(f"❌ Error saving image: {e}")
-    finally:
-        db.close()
 
 
 
@@ -165,10 +185,10 @@ async def validate_custom_message(request: dict):
             raise HTTPException(status_code=400, detail="Custom message too long (max 500 characters)")
         
         # Get OpenAI client
-        client = get_openai_client()
+        client = get_async_openai_client()
         
         # Validate the custom message
-        validation_result = validate_custom_message_for_image_generation(custom_message, client)
+        validation_result = await validate_custom_message_for_image_generation(custom_message, client)
         
         return {
             "message": custom_message,
@@ -185,15 +205,17 @@ async def validate_custom_message(request: dict):
         print(f"❌ Error validating custom message: {e}")
         raise HTTPException(status_code=500, detail=f"Validation failed: {str(e)}")
 
-@router.post("/chat/complete", response_model=ChatResponse)
-def chat_complete(request: ChatSessionRequest):
-    client = get_openai_client()
+async def _prepare_chat_messages(request: ChatSessionRequest) -> tuple:
+    """
+    Load the session messages and append the user's turn.
+    Returns the messages and the index where this turn's unsaved messages start.
+    """
     project_id = request.project_id
-    messages = get_session_messages(project_id, STRUCTURED_SYSTEM_PROMPT)
+    messages, turn_start = await run_in_threadpool(load_session, project_id, STRUCTURED_SYSTEM_PROMPT)
     
     # If the user message is empty, fetch project conversations
     if not request.user_message or request.user_message.strip() == "":
-        project_convos = fetch_project_conversations(project_id)
+        project_convos = await run_in_threadpool(fetch_project_conversations, project_id)
         if project_convos is not None:
             # Extend messages with project conversations instead of appending the array
             if isinstance(project_convos, list):
@@ -204,59 +226,224 @@ def chat_complete(request: ChatSessionRequest):
             messages.append({"role": "user", "content": request.user_message})
     else:
         messages.append({"role": "user", "content": request.user_message})
+    
+    return messages, turn_start
+
+
+async def _request_messages(project_id: str, messages: list) -> list:
+    """Select the messages to send to the LLM for the configured context mode, behind the stable prompt prefix"""
+    if CHAT_CONTEXT_MODE == "compact":
+        state = await run_in_threadpool(conversation_store.get_state, project_id)
+        followups = await run_in_threadpool(conversation_store.get_followups, project_id)
+        messages = build_compact_messages(STRUCTURED_SYSTEM_PROMPT, state, followups, messages)
+    return with_stable_prefix(messages)
+
+
+def _structured_output_kwargs() -> dict:
+    """Extra chat completion arguments constraining the reply to the StructuredLLMResponse schema"""
+    response_format = structured_response_format()
+    return {"response_format": response_format} if response_format else {}
+
+
+async def _build_chat_response(project_id: str, messages: list, turn_start: int, ai_message: str) -> ChatResponse:
+    """Parse the raw LLM reply, update the session and build the API response"""
+    try:
+        structured_response = parse_llm_response(ai_message, StructuredLLMResponse)
+    except Exception as parse_error:
+        # Try to extract a readable message from the AI response
+        readable_content = extract_readable_content(ai_message)
+        
+        # Return a fallback response instead of crashing
+        return ChatResponse(
+            ai_message=readable_content or "I'm having trouble processing your request. Please try again.",
+            is_complete=False,
+            options=[]
+        )
+    
+    user_message = messages[-1]["content"] if messages[-1]["role"] == "user" else ""
+    messages.append({"role": "assistant", "content": ai_message})
+    await run_in_threadpool(save_session_messages, project_id, messages[turn_start:])
+    
+    if CHAT_CONTEXT_MODE == "compact":
+        await run_in_threadpool(
+            conversation_store.update_state, project_id,
+            lambda state: apply_assistant_response(apply_user_answer(state, user_message), structured_response)
+        )
+    
+    return await _handle_structured_response(project_id, structured_response)
+
+
+async def _handle_structured_response(
+    project_id: str,
+    structured_response: StructuredLLMResponse,
+    persist: bool = True
+) -> ChatResponse:
+    """
+    Persist completion results and build the API response for a structured reply.
+    With persist=False an already saved completion is replayed from the conversation store.
+    """
+    if not persist and structured_response.is_completion_response():
+        saved_spec = await run_in_threadpool(conversation_store.get_bike_spec, project_id)
+        if saved_spec:
+            structured_response.content = BikeSpecification(**saved_spec)
+            return ChatResponse.from_completion_response(structured_response)
+    
+    # Save bike configuration if this is a completion response
+    if project_id and structured_response.is_completion_response():
+        try:
+            await run_in_threadpool(save_bike_configuration, project_id, structured_response)
+        except Exception as e:
+            print(f"❌ Error saving bike configuration: {e}")
+    
+    if structured_response.is_question_response():
+        question_content = structured_response.get_question_content()
+        if question_content:
+            await run_in_threadpool(track_custom_followup, project_id, question_content)
+            return ChatResponse.from_question_response(structured_response, question_content)
+        return ChatResponse.from_fallback_response(structured_response)
+    
+    elif structured_response.is_completion_response():
+        bike_spec = structured_response.get_bike_specification()
+        if bike_spec:
+            bike_spec.custom_fields = await validate_custom_fields(bike_spec)
+            await run_in_threadpool(conversation_store.set_bike_spec, project_id, bike_spec.model_dump())
+            return ChatResponse.from_completion_response(structured_response)
+        return ChatResponse.from_fallback_response(structured_response)
+    
+    elif structured_response.is_error_response():
+        return ChatResponse.from_error_response(structured_response)
+    
+    return ChatResponse.from_fallback_response(structured_response)
+
+
+async def _question_engine_turn(request: ChatSessionRequest, client) -> Optional[Tuple[StructuredLLMResponse, bool]]:
+    """
+    Answer the turn from the local question engine.
+    Returns the structured response and whether the turn changed the session,
+    or None when the session is LLM-driven and must go to the model instead.
+    """
+    if QUESTION_ENGINE != "local":
+        return None
+    
+    project_id = request.project_id
+    user_message = (request.user_message or "").strip()
+    
+    # Resuming a saved conversation with no engine state stays on the LLM path
+    if not user_message and await run_in_threadpool(conversation_store.get_state, project_id) is None:
+        if await run_in_threadpool(fetch_project_conversations, project_id):
+            return None
+    
+    result = await question_engine.handle_turn(project_id, user_message, client)
+    if result is None:
+        return None
+    
+    structured_response, changed = result
+    if changed:
+        await run_in_threadpool(save_session_messages, project_id, [
+            {"role": "user", "content": user_message or START_MESSAGE},
+            {"role": "assistant", "content": structured_response.model_dump_json()}
+        ])
+    return structured_response, changed
+
+
+@router.post("/chat/complete", response_model=ChatResponse)
+async def chat_complete(request: ChatSessionRequest):
+    client = get_async_openai_client()
+    project_id = request.project_id
+    
+    engine_turn = await _question_engine_turn(request, client)
+    if engine_turn is not None:
+        structured_response, changed = engine_turn
+        # Later turns of a completed session must not save the configuration again
+        return await _handle_structured_response(project_id, structured_response, persist=changed)
+    
+    messages, turn_start = await _prepare_chat_messages(request)
 
     try:
-        response = client.chat.completions.create(
+        response = await client.chat.completions.create(
             model=os.getenv("OPENAI_CHAT_MODEL"),
-            messages=messages
+            messages=await _request_messages(project_id, messages),
+            **_structured_output_kwargs()
         )
+        record_chat_usage(project_id, response.usage, CHAT_CONTEXT_MODE, STRUCTURED_PROMPT_ID)
         ai_message = response.choices[0].message.content.strip()
         
-        try:
-            structured_response = parse_llm_response(ai_message, StructuredLLMResponse)
-        except Exception as parse_error:
-            # Try to extract a readable message from the AI response
-            readable_content = extract_readable_content(ai_message)
-            
-            # Return a fallback response instead of crashing
-            return ChatResponse(
-                ai_message=readable_content or "I'm having trouble processing your request. Please try again.",
-                is_complete=False,
-                options=[]
-            )
-        
-        messages.append({"role": "assistant", "content": ai_message})
-        session_store[project_id] = messages
+        return await _build_chat_response(project_id, messages, turn_start, ai_message)
         
-        # Save bike configuration if this is a completion response
-        if project_id and structured_response.is_completion_response():
-            try:
-                save_bike_configuration(project_id, structured_response)
-            except Exception as e:
-                print(f"❌ Error saving bike configuration: {e}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/chat/stream")
+async def chat_stream(request: ChatSessionRequest):
+    """
+    Streaming variant of /chat/complete using server-sent events.
+    Emits `message`, `question_text` and one `option` event per completed option
+    as soon as they are parsed, followed by a final `done` event carrying the
+    same ChatResponse shape as /chat/complete.
+    """
+    client = get_async_openai_client()
+    project_id = request.project_id
+    
+    engine_turn = await _question_engine_turn(request, client)
+    if engine_turn is not None:
+        structured_response, changed = engine_turn
         
-        if structured_response.is_question_response():
+        async def engine_stream():
+            yield format_sse("message", {"ai_message": structured_response.message})
             question_content = structured_response.get_question_content()
             if question_content:
-                track_custom_followup(project_id, question_content)
-                return ChatResponse.from_question_response(structured_response, question_content)
-            return ChatResponse.from_fallback_response(structured_response)
-        
-        elif structured_response.is_completion_response():
-            bike_spec = structured_response.get_bike_specification()
-            if bike_spec:
-                bike_spec.validate_and_clean_custom_fields(validate_custom_input)
-                bike_specs[project_id] = bike_spec
-                return ChatResponse.from_completion_response(structured_response)
-            return ChatResponse.from_fallback_response(structured_response)
+                yield format_sse("question_text", {"question_text": question_content.question_text})
+                for option in question_content.get_options_dict():
+                    yield format_sse("option", option)
+            chat_response = await _handle_structured_response(project_id, structured_response, persist=changed)
+            yield format_sse("done", chat_response.model_dump())
         
-        elif structured_response.is_error_response():
-            return ChatResponse.from_error_response(structured_response)
-        
-        return ChatResponse.from_fallback_response(structured_response)
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        return StreamingResponse(
+            engine_stream(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+    
+    messages, turn_start = await _prepare_chat_messages(request)
+
+    async def event_stream():
+        parser = IncrementalJSONParser()
+        chunks = []
+        try:
+            stream = await client.chat.completions.create(
+                model=os.getenv("OPENAI_CHAT_MODEL"),
+                messages=await _request_messages(project_id, messages),
+                stream=True,
+                stream_options={"include_usage": True},
+                **_structured_output_kwargs()
+            )
+            async for chunk in stream:
+                if chunk.usage:
+                    # The final chunk carries the usage for the whole completion
+                    record_chat_usage(project_id, chunk.usage, CHAT_CONTEXT_MODE, STRUCTURED_PROMPT_ID)
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if not delta:
+                    continue
+                chunks.append(delta)
+                for path, value in parser.feed(delta):
+                    event = chat_stream_event(path, value)
+                    if event:
+                        yield format_sse(*event)
+            
+            chat_response = await _build_chat_response(project_id, messages, turn_start, "".join(chunks).strip())
+            yield format_sse("done", chat_response.model_dump())
+        except Exception as e:
+            print(f"❌ Error streaming chat completion: {e}")
+            yield format_sse("error", {"detail": str(e)})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 def fetch_project_conversations(project_id):
@@ -269,9 +456,8 @@ def fetch_project_conversations(project_id):
         project_uuid = UUID(project_id)
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid project_id format")
-    db = next(get_db())
-    try:
-        project = db.query(Project).filter(Project.id == project_uuid).first()
+    with session_scope() as db:
+        project = db.query(Project).options(undefer(Project.conversation_history)).filter(Project.id == project_uuid).first()
         if not project:
             raise HTTPException(status_code=404, detail="Project not found")
         # Use conversation_history instead of conversation
@@ -285,107 +471,276 @@ def fetch_project_conversations(project_id):
             except Exception as e:
                 return project.conversation_history
         return None
-    finally:
-        db.close()
 
-@router.post("/image/generate", response_model=ImageGenerationResponse)
-def generate_image(request: ImageGenerationRequest, db: Session = Depends(get_db)):
-    client = get_openai_client()
-    project_id = request.project_id
+def _deduct_image_credit(db: Session, project_id: str):
+    """Deduct one credit for image generation and return the (user, project) pair"""
+    project = db.query(Project).filter(Project.id == project_id).first()
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
     
-    if project_id not in bike_specs:
-        raise HTTPException(status_code=400, detail="Bike specification not found. Complete the chat first.")
+    user = project.user
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
 
-    bike_spec = bike_specs[project_id]
+    from app.services.credit_transaction_service import CreditTransactionService
+    credit_service = CreditTransactionService(db)
 
     try:
-        # Get project and user
+        credit_service.deduct_credits(
+            user=user,
+            project=project,
+            amount=1,
+            description="Image generation"
+        )
+    except ValueError as e:
+        if "Insufficient credits" in str(e):
+            raise HTTPException(status_code=400, detail="Insufficient credits")
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return user, project
+
+
+def _refund_image_credit(db: Session, user, project) -> None:
+    """Refund the image generation credit after a failed generation"""
+    from app.services.credit_transaction_service import CreditTransactionService
+    credit_service = CreditTransactionService(db)
+    credit_service.refund_credits(
+        user=user,
+        project=project,
+        amount=1,
+        description="Image generation failed - refund"
+    )
+
+
+def _refund_image_credit_for_project(project_id: str) -> None:
+    """Refund the image generation credit from a background job, using its own session"""
+    with session_scope() as db:
         project = db.query(Project).filter(Project.id == project_id).first()
-        if not project:
-            raise HTTPException(status_code=404, detail="Project not found")
-        
-        user = project.user
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
+        if project and project.user:
+            _refund_image_credit(db, project.user, project)
 
-        # Initialize credit transaction service
-        from app.services.credit_transaction_service import CreditTransactionService
-        credit_service = CreditTransactionService(db)
 
-        # Deduct credits first
-        try:
-            credit_service.deduct_credits(
-                user=user,
-                project=project,
-                amount=1,
-                description="Image generation"
-            )
-        except ValueError as e:
-            if "Insufficient credits" in str(e):
-                raise HTTPException(status_code=400, detail="Insufficient credits")
-            raise HTTPException(status_code=400, detail=str(e))
+def _image_generation_error_detail(error_message: str) -> str:
+    """Map an image generation failure to the message shown to the user"""
+    # Handle content policy violations specifically
+    if "content_policy_violation" in error_message.lower() or "safety system" in error_message.lower():
+        return "Image cannot be generated due to content policy violations. Please use safer, non-violent language in your bike description."
+    return f"Image generation failed: {error_message}"
 
-        try:
-            # Generate image
-            specs = bike_spec.get_image_generation_specs()
-            summary_prompt = create_image_prompt(specs)
-            image_base64 = generate_bike_image(summary_prompt, client)
-                        
-            if project_id:
-                save_image_to_project(project_id, image_base64)
 
-        except Exception as e:
-            # If image generation fails, refund credits
-            credit_service.refund_credits(
-                user=user,
-                project=project,
-                amount=1,
-                description="Image generation failed - refund"
-            )
-            raise e
-        
-        return ImageGenerationResponse(image_base64=image_base64)
+def _save_image_job(job: dict, image_base64: str) -> str:
+    """
+    Save the image of a job, keeping its credit; refunds it when the save fails.
+    Runs in a worker thread, which finishes even when the job times out meanwhile.
+    """
+    if not image_job_queue.settle(job["job_id"], JOB_SETTLED_KEPT):
+        # Abandoned and refunded while the image was generated
+        raise Exception("Image generation was cancelled")
+    image_key = save_image_to_project(job["project_id"], image_base64)
+    if not image_key:
+        _refund_image_credit_for_project(job["project_id"])
+        image_job_queue.update(job["job_id"], settled=JOB_SETTLED_COMPENSATED)
+        raise Exception("Generated image could not be saved")
+    return image_key
+
+
+def _refund_image_job(job: dict) -> None:
+    """Refund the credit of a failed job, unless the job was already settled"""
+    if image_job_queue.settle(job["job_id"], JOB_SETTLED_COMPENSATED):
+        _refund_image_credit_for_project(job["project_id"])
+
+
+async def process_image_job(job: dict) -> dict:
+    """Generate and save the image for a queued job, refunding the credit on failure"""
+    bike_spec = BikeSpecification(**job["bike_spec"])
+
+    try:
+        specs = bike_spec.get_image_generation_specs()
+        summary_prompt = create_image_prompt(specs)
+        image_base64 = await generate_bike_image(summary_prompt, get_async_openai_client())
+        image_key = await run_in_threadpool(_save_image_job, job, image_base64)
     except Exception as e:
-        error_message = str(e)
-        
-        # Handle content policy violations specifically
-        if "content_policy_violation" in error_message.lower() or "safety system" in error_message.lower():
-            raise HTTPException(
-                status_code=500, 
-                detail="Image cannot be generated due to content policy violations. Please use safer, non-violent language in your bike description."
-            )
-        
-        # Handle other OpenAI API errors
-        if "openai" in error_message.lower() or "api" in error_message.lower():
-            raise HTTPException(
-                status_code=500, 
-                detail=f"Image generation failed: {error_message}"
-            )
-        
-        # Generic error
-        raise HTTPException(status_code=500, detail=f"Image generation failed: {error_message}")
+        await run_in_threadpool(_refund_image_job, job)
+        raise Exception(_image_generation_error_detail(str(e)))
+
+    # Content-addressed URL, cacheable forever by the browser and any CDN in front
+    return {"image_url": f"/bike/image/blob/{image_key}", "image_key": image_key}
+
+
+async def create_image_job_thumbnails(job: dict, result: dict) -> None:
+    """Render listing thumbnails once a job succeeded, outside its timeout and refund handling"""
+    try:
+        await create_project_thumbnails(UUID(job["project_id"]), result["image_key"])
+    except Exception as e:
+        # Listings fall back to the full image until the backfill picks the project up
+        print(f"❌ Thumbnail generation failed for project {job['project_id']}: {e}")
+
+
+async def refund_abandoned_image_job(job: dict) -> None:
+    """Refund the credit of a job that was lost to a crash, a timeout or a shutdown"""
+    await run_in_threadpool(_refund_image_credit_for_project, job["project_id"])
+
+
+# Image generation runs on background workers started in the app lifespan
+image_job_queue = create_image_job_queue()
+image_job_workers = ImageJobWorkerPool(
+    image_job_queue, process_image_job,
+    on_abandoned=refund_abandoned_image_job,
+    on_succeeded=create_image_job_thumbnails
+)
+
+
+def _image_job_response(job: dict) -> ImageJobResponse:
+    result = job.get("result") or {}
+    return ImageJobResponse(
+        job_id=job["job_id"],
+        project_id=job["project_id"],
+        status=job["status"],
+        error=job.get("error"),
+        image_url=result.get("image_url") if job["status"] == JOB_SUCCEEDED else None,
+        status_url=f"/bike/image/jobs/{job['job_id']}",
+        events_url=f"/bike/image/jobs/{job['job_id']}/events"
+    )
+
+
+@router.post("/image/generate", response_model=ImageJobResponse, status_code=202)
+async def generate_image(request: ImageGenerationRequest, db: Session = Depends(get_db)):
+    """
+    Queue image generation for a completed bike specification.
+    Returns 202 with a job id; poll /image/jobs/{job_id} or stream
+    /image/jobs/{job_id}/events for the finished image.
+    """
+    project_id = request.project_id
+    
+    bike_spec_data = await run_in_threadpool(conversation_store.get_bike_spec, project_id)
+    if not bike_spec_data:
+        raise HTTPException(status_code=400, detail="Bike specification not found. Complete the chat first.")
+
+    # Deduct credits up front so insufficient credit fails fast; the job refunds on failure
+    user, project = await run_in_threadpool(_deduct_image_credit, db, project_id)
+
+    job = new_job(project_id, bike_spec=bike_spec_data)
+    try:
+        await run_in_threadpool(image_job_queue.enqueue, job)
+    except Exception as e:
+        await run_in_threadpool(_refund_image_credit, db, user, project)
+        raise HTTPException(status_code=503, detail=f"Image generation is unavailable: {str(e)}")
+    
+    return _image_job_response(job)
+
+
+@router.get("/image/jobs/{job_id}", response_model=ImageJobResponse)
+async def get_image_job(job_id: str):
+    """Get the status of an image generation job"""
+    job = await run_in_threadpool(image_job_queue.get, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Image job not found")
+    return _image_job_response(job)
+
+
+@router.get("/image/jobs/{job_id}/events")
+async def stream_image_job(job_id: str):
+    """
+    Stream image job status changes as server-sent `status` events,
+    ending after the job succeeds or fails.
+    """
+    job = await run_in_threadpool(image_job_queue.get, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Image job not found")
+
+    async def event_stream():
+        current = job
+        last_status = None
+        while current:
+            if current["status"] != last_status:
+                last_status = current["status"]
+                yield format_sse("status", _image_job_response(current).model_dump())
+            if current["status"] in TERMINAL_JOB_STATUSES:
+                return
+            await asyncio.sleep(IMAGE_JOB_POLL_INTERVAL)
+            current = await run_in_threadpool(image_job_queue.get, job_id)
+        yield format_sse("error", {"detail": "Image job expired"})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 @router.get("/image/download/project/{project_id}")
 def download_project_image(project_id: UUID, db: Session = Depends(get_db)):
     try:
-        # Get project from database
-        project = db.query(Project).filter(Project.id == project_id).first()
+        # Only the image reference and the legacy column are read from the row
+        row = db.query(Project.image_key, Project.image_base64_legacy).filter(Project.id == project_id).first()
         
         # Check if project exists and has image data
-        if not project:
+        if not row:
             raise HTTPException(status_code=404, detail="Project not found.")
+        image_key, image_base64 = row
             
-        if not project.image_base64:
+        # Read the image bytes through the blob store
+        if image_key:
+            data = blob_store.get(image_key)
+            image_base64 = base64.b64encode(data).decode("ascii") if data else None
+        if not image_base64:
             raise HTTPException(status_code=500, detail="Project image data is missing or corrupted.")
         
         # Return the base64 image data
         return {
-            "image_base64": project.image_base64,
+            "image_base64": image_base64,
             "project_id": str(project_id)
         }
         
     except HTTPException as he:
         raise he
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/image/blob/{image_key}")
+def get_image_blob(image_key: str, request: Request):
+    """
+    Serve image bytes by content hash. The URL can never point at different
+    bytes, so responses are immutable and repeat views never reach the database.
+    """
+    try:
+        response = blob_response(request, blob_store, image_key, IMMUTABLE_CACHE_CONTROL)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Image not found.")
+    if response is None:
+        raise HTTPException(status_code=404, detail="Image not found.")
+    return response
+
+
+@router.get("/image/project/{project_id}")
+def get_project_image(project_id: UUID, request: Request, db: Session = Depends(get_db)):
+    """
+    Serve a project's current image as binary. Only the image key is read from
+    the row; clients revalidate with If-None-Match and get 304 while the image is unchanged.
+    """
+    row = db.query(Project.image_key, Project.image_base64_legacy.isnot(None)).filter(Project.id == project_id).first()
+    if not row:
+        raise HTTPException(status_code=404, detail="Project not found.")
+    image_key, has_legacy_image = row
+
+    if image_key:
+        response = blob_response(request, blob_store, image_key, REVALIDATE_CACHE_CONTROL)
+        if response is None:
+            raise HTTPException(status_code=500, detail="Project image data is missing or corrupted.")
+        return response
+
+    if not has_legacy_image:
+        raise HTTPException(status_code=404, detail="Project has no image.")
+
+    # Images not yet moved to the blob store are decoded from the legacy column
+    legacy_image = db.query(Project.image_base64_legacy).filter(Project.id == project_id).scalar()
+    try:
+        data = base64.b64decode(legacy_image)
+    except Exception:
+        raise HTTPException(status_code=500, detail="Project image data is missing or corrupted.")
+    etag = etag_for_key(blob_key(data))
+    headers = {"ETag": etag, "Cache-Control": REVALIDATE_CACHE_CONTROL}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=data, media_type=image_content_type(data), headers=headers)
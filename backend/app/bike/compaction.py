@@ -0,0 +1,125 @@
+"""
+Conversation compaction for the LLM-driven bike chat
+In compact mode each turn sends the system prompt, a structured summary of the
+build so far and the last exchange instead of the whole message history
+"""
+
+import copy
+import json
+import os
+from typing import Dict, List, Optional
+
+from .models import StructuredLLMResponse
+
+# "full" sends the whole history every turn, "compact" sends a running state summary
+CHAT_CONTEXT_MODE = os.getenv("CHAT_CONTEXT_MODE", "full")
+
+COMPACT_STATE_TEMPLATE = """Current build state. The earlier conversation has been compacted into this summary; \
+treat answered fields as final and continue with the next unanswered question.
+{state}"""
+
+
+def new_compact_state() -> dict:
+    """Create the running state for an LLM-driven session"""
+    return {
+        "engine": "llm",
+        "current_step": 0,
+        "total_steps": 15,
+        "bike_specification": {},
+        "custom_fields": {},
+        "pending_question": None
+    }
+
+
+def _llm_state(state: Optional[dict]) -> Optional[dict]:
+    """Copy an LLM session state, ignoring state written by the local question engine"""
+    if state and state.get("engine") == "llm":
+        return copy.deepcopy(state)
+    return None
+
+
+def _resolve_answer(options: List[dict], answer: str, is_multiselect: bool) -> str:
+    """Map option numbers/values in the user's answer to option values, keeping free text as is"""
+    tokens = [token.strip() for token in answer.split(",")] if is_multiselect else [answer.strip()]
+    values = []
+    for token in tokens:
+        if not token:
+            continue
+        match = next(
+            (option for option in options
+             if token.lower() in (str(option.get("number")), str(option.get("value", "")).lower(), str(option.get("text", "")).lower())),
+            None
+        )
+        values.append(match["value"] if match else token)
+    if values and all(value in {option.get("value") for option in options} for value in values):
+        return ",".join(values)
+    return answer.strip()
+
+
+def apply_user_answer(state: Optional[dict], user_message: str) -> dict:
+    """Record the user's answer to the pending question; returns a new state"""
+    state = _llm_state(state) or new_compact_state()
+    pending = state.get("pending_question")
+    answer = (user_message or "").strip()
+    if not pending or not answer:
+        return state
+
+    value = _resolve_answer(pending["options"], answer, pending["is_multiselect"])
+    if pending["question_type"] == "custom_followup":
+        if pending.get("parent_question"):
+            state["custom_fields"][pending["parent_question"]] = value[:500]
+    else:
+        state["bike_specification"][pending["question_type"]] = value
+    state["pending_question"] = None
+    return state
+
+
+def apply_assistant_response(state: Optional[dict], structured_response: StructuredLLMResponse) -> dict:
+    """Record the question the assistant just asked; returns a new state"""
+    state = _llm_state(state) or new_compact_state()
+    question = structured_response.get_question_content()
+    if question:
+        state["current_step"] = question.current_step
+        state["total_steps"] = question.total_steps
+        state["pending_question"] = {
+            "question_type": question.question_type.value if hasattr(question.question_type, "value") else question.question_type,
+            "options": question.get_options_dict(),
+            "is_multiselect": question.is_multiselect,
+            "parent_question": question.parent_question
+        }
+    elif structured_response.is_completion_response():
+        state["current_step"] = state["total_steps"]
+        state["pending_question"] = None
+    return state
+
+
+def build_compact_messages(system_prompt: str, state: Optional[dict], followups: Dict[str, int], messages: List[dict]) -> List[dict]:
+    """
+    Build the request messages for compact mode from the full session messages.
+    Falls back to the full messages when there is no state to summarize them with.
+    """
+    history = [message for message in messages if message["role"] != "system"]
+    if not history or history[-1]["role"] != "user":
+        return messages
+    state = _llm_state(state)
+    if state is None and len(history) > 1:
+        # Session started before compaction was enabled
+        return messages
+
+    state = apply_user_answer(state, history[-1]["content"])
+    summary = {
+        "current_step": state["current_step"],
+        "total_steps": state["total_steps"],
+        "bike_specification": state["bike_specification"],
+        "custom_fields": state["custom_fields"],
+        "custom_followup_tracking": followups
+    }
+    compact = [
+        {"role": "system", "content": system_prompt},
+        {"role": "system", "content": COMPACT_STATE_TEMPLATE.format(state=json.dumps(summary, separators=(",", ":")))}
+    ]
+    last_assistant = next((message for message in reversed(history[:-1]) if message["role"] == "assistant"), None)
+    if last_assistant:
+        compact.append(last_assistant)
+    compact.append(history[-1])
+    return compact
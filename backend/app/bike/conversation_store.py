@@ -0,0 +1,294 @@
+"""
+Conversation state storage for the bike builder chat
+Keeps per-project chat messages, the final bike specification, custom
+follow-up counters and structured turn state in a store that can be shared
+across workers and replicas
+"""
+
+import json
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, List, Optional
+
+import redis
+
+# Conversation state TTL (7 days default), refreshed on every write
+CONVERSATION_TTL = int(os.getenv("CONVERSATION_TTL", str(7 * 24 * 3600)))
+CONVERSATION_STORE_BACKEND = os.getenv("CONVERSATION_STORE", "redis" if os.getenv("REDIS_URL") else "memory")
+
+
+def _dumps(value: Any) -> str:
+    """Serialize compactly (no whitespace between separators)"""
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+
+class ConversationStore(ABC):
+    """Interface for per-project conversation state"""
+
+    @abstractmethod
+    def get_messages(self, project_id: str) -> Optional[List[dict]]:
+        """Get stored chat messages (without the system prompt), or None if no session exists"""
+
+    @abstractmethod
+    def append_messages(self, project_id: str, messages: List[dict]) -> None:
+        """Atomically append messages to the project's conversation"""
+
+    @abstractmethod
+    def get_bike_spec(self, project_id: str) -> Optional[dict]:
+        """Get the completed bike specification"""
+
+    @abstractmethod
+    def set_bike_spec(self, project_id: str, bike_spec: dict) -> None:
+        """Store the completed bike specification"""
+
+    @abstractmethod
+    def get_image_file(self, project_id: str) -> Optional[str]:
+        """Get the path of the last generated image file"""
+
+    @abstractmethod
+    def set_image_file(self, project_id: str, file_path: str) -> None:
+        """Store the path of the last generated image file"""
+
+    @abstractmethod
+    def get_followups(self, project_id: str) -> Dict[str, int]:
+        """Get custom follow-up counts keyed by parent question"""
+
+    @abstractmethod
+    def increment_followup(self, project_id: str, parent_question: str) -> int:
+        """Atomically increment the follow-up count for a parent question"""
+
+    @abstractmethod
+    def reset_followups(self, project_id: str) -> None:
+        """Clear the follow-up counts for a project"""
+
+    @abstractmethod
+    def get_state(self, project_id: str) -> Optional[dict]:
+        """Get the structured conversation state"""
+
+    @abstractmethod
+    def update_state(self, project_id: str, mutator: Callable[[Optional[dict]], Optional[dict]]) -> Optional[dict]:
+        """
+        Atomically read-modify-write the structured conversation state.
+        The mutator receives the current state (or None) and returns the new
+        state (or None to delete it); it may be called more than once on
+        contention and must not have side effects.
+        """
+
+    @abstractmethod
+    def delete(self, project_id: str) -> None:
+        """Delete all conversation state for a project"""
+
+
+class InMemoryConversationStore(ConversationStore):
+    """Process-local store, suitable for a single worker and for development"""
+
+    def __init__(self, ttl: int = CONVERSATION_TTL):
+        self.ttl = ttl
+        self._lock = threading.RLock()
+        self._messages: Dict[str, List[dict]] = {}
+        self._bike_specs: Dict[str, dict] = {}
+        self._image_files: Dict[str, str] = {}
+        self._followups: Dict[str, Dict[str, int]] = {}
+        self._states: Dict[str, dict] = {}
+        self._expires_at: Dict[str, float] = {}
+
+    def _expire(self, project_id: str) -> None:
+        expires_at = self._expires_at.get(project_id)
+        if expires_at is not None and expires_at < time.monotonic():
+            self._delete(project_id)
+
+    def _touch(self, project_id: str) -> None:
+        self._expires_at[project_id] = time.monotonic() + self.ttl
+
+    def _delete(self, project_id: str) -> None:
+        for store in (self._messages, self._bike_specs, self._image_files, self._followups, self._states, self._expires_at):
+            store.pop(project_id, None)
+
+    def get_messages(self, project_id: str) -> Optional[List[dict]]:
+        with self._lock:
+            self._expire(project_id)
+            messages = self._messages.get(project_id)
+            return list(messages) if messages is not None else None
+
+    def append_messages(self, project_id: str, messages: List[dict]) -> None:
+        with self._lock:
+            self._expire(project_id)
+            self._messages.setdefault(project_id, []).extend(messages)
+            self._touch(project_id)
+
+    def get_bike_spec(self, project_id: str) -> Optional[dict]:
+        with self._lock:
+            self._expire(project_id)
+            return self._bike_specs.get(project_id)
+
+    def set_bike_spec(self, project_id: str, bike_spec: dict) -> None:
+        with self._lock:
+            self._bike_specs[project_id] = bike_spec
+            self._touch(project_id)
+
+    def get_image_file(self, project_id: str) -> Optional[str]:
+        with self._lock:
+            self._expire(project_id)
+            return self._image_files.get(project_id)
+
+    def set_image_file(self, project_id: str, file_path: str) -> None:
+        with self._lock:
+            self._image_files[project_id] = file_path
+            self._touch(project_id)
+
+    def get_followups(self, project_id: str) -> Dict[str, int]:
+        with self._lock:
+            self._expire(project_id)
+            return dict(self._followups.get(project_id, {}))
+
+    def increment_followup(self, project_id: str, parent_question: str) -> int:
+        with self._lock:
+            self._expire(project_id)
+            followups = self._followups.setdefault(project_id, {})
+            followups[parent_question] = followups.get(parent_question, 0) + 1
+            self._touch(project_id)
+            return followups[parent_question]
+
+    def reset_followups(self, project_id: str) -> None:
+        with self._lock:
+            self._followups.pop(project_id, None)
+
+    def get_state(self, project_id: str) -> Optional[dict]:
+        with self._lock:
+            self._expire(project_id)
+            state = self._states.get(project_id)
+            return json.loads(_dumps(state)) if state is not None else None
+
+    def update_state(self, project_id: str, mutator: Callable[[Optional[dict]], Optional[dict]]) -> Optional[dict]:
+        with self._lock:
+            new_state = mutator(self.get_state(project_id))
+            if new_state is None:
+                self._states.pop(project_id, None)
+            else:
+                self._states[project_id] = json.loads(_dumps(new_state))
+            self._touch(project_id)
+            return new_state
+
+    def delete(self, project_id: str) -> None:
+        with self._lock:
+            self._delete(project_id)
+
+
+class RedisConversationStore(ConversationStore):
+    """
+    Redis-backed store shared by all workers and replicas.
+
+    Messages are kept in a Redis list of compact JSON entries so a turn is an
+    O(1) RPUSH instead of rewriting the whole history, follow-up counters live
+    in a hash updated with HINCRBY, structured state is updated optimistically
+    with WATCH/MULTI/EXEC, and every write refreshes the TTL of all of the
+    project's keys inside the same transaction.
+    """
+
+    def __init__(self, redis_client: redis.Redis, ttl: int = CONVERSATION_TTL):
+        self.redis = redis_client
+        self.ttl = ttl
+        self.key_prefix = "conversation:"
+
+    def _key(self, project_id: str, name: str) -> str:
+        return f"{self.key_prefix}{project_id}:{name}"
+
+    def _keys(self, project_id: str) -> List[str]:
+        return [self._key(project_id, name) for name in ("messages", "bike_spec", "image_file", "followups", "state")]
+
+    def _expire_all(self, pipe, project_id: str) -> None:
+        for key in self._keys(project_id):
+            pipe.expire(key, self.ttl)
+
+    def get_messages(self, project_id: str) -> Optional[List[dict]]:
+        entries = self.redis.lrange(self._key(project_id, "messages"), 0, -1)
+        if not entries:
+            return None
+        return [json.loads(entry) for entry in entries]
+
+    def append_messages(self, project_id: str, messages: List[dict]) -> None:
+        if not messages:
+            return
+        with self.redis.pipeline(transaction=True) as pipe:
+            pipe.rpush(self._key(project_id, "messages"), *[_dumps(message) for message in messages])
+            self._expire_all(pipe, project_id)
+            pipe.execute()
+
+    def get_bike_spec(self, project_id: str) -> Optional[dict]:
+        value = self.redis.get(self._key(project_id, "bike_spec"))
+        return json.loads(value) if value else None
+
+    def set_bike_spec(self, project_id: str, bike_spec: dict) -> None:
+        with self.redis.pipeline(transaction=True) as pipe:
+            pipe.set(self._key(project_id, "bike_spec"), _dumps(bike_spec))
+            self._expire_all(pipe, project_id)
+            pipe.execute()
+
+    def get_image_file(self, project_id: str) -> Optional[str]:
+        return self.redis.get(self._key(project_id, "image_file"))
+
+    def set_image_file(self, project_id: str, file_path: str) -> None:
+        with self.redis.pipeline(transaction=True) as pipe:
+            pipe.set(self._key(project_id, "image_file"), file_path)
+            self._expire_all(pipe, project_id)
+            pipe.execute()
+
+    def get_followups(self, project_id: str) -> Dict[str, int]:
+        followups = self.redis.hgetall(self._key(project_id, "followups"))
+        return {parent: int(count) for parent, count in followups.items()}
+
+    def increment_followup(self, project_id: str, parent_question: str) -> int:
+        with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hincrby(self._key(project_id, "followups"), parent_question, 1)
+            self._expire_all(pipe, project_id)
+            count = pipe.execute()[0]
+        return int(count)
+
+    def reset_followups(self, project_id: str) -> None:
+        self.redis.delete(self._key(project_id, "followups"))
+
+    def get_state(self, project_id: str) -> Optional[dict]:
+        value = self.redis.get(self._key(project_id, "state"))
+        return json.loads(value) if value else None
+
+    def update_state(self, project_id: str, mutator: Callable[[Optional[dict]], Optional[dict]]) -> Optional[dict]:
+        key = self._key(project_id, "state")
+        with self.redis.pipeline(transaction=True) as pipe:
+            while True:
+                try:
+                    pipe.watch(key)
+                    current = pipe.get(key)
+                    new_state = mutator(json.loads(current) if current else None)
+                    pipe.multi()
+                    if new_state is None:
+                        pipe.delete(key)
+                    else:
+                        pipe.set(key, _dumps(new_state))
+                    self._expire_all(pipe, project_id)
+                    pipe.execute()
+                    return new_state
+                except redis.WatchError:
+                    # Another turn updated the state first, retry on the fresh value
+                    continue
+
+    def delete(self, project_id: str) -> None:
+        self.redis.delete(*self._keys(project_id))
+
+
+def create_conversation_store(backend: str = CONVERSATION_STORE_BACKEND, ttl: int = CONVERSATION_TTL) -> ConversationStore:
+    """
+    Create a conversation store
+
+    Args:
+        backend: "redis" (uses REDIS_URL) or "memory"
+        ttl: Conversation state time-to-live in seconds
+
+    Returns:
+        ConversationStore instance
+    """
+    if backend == "redis":
+        redis_client = redis.Redis.from_url(os.getenv("REDIS_URL"), decode_responses=True)
+        return RedisConversationStore(redis_client, ttl)
+    return InMemoryConversationStore(ttl)
@@ -0,0 +1,122 @@
+"""
+HTTP delivery of stored images
+Serves blob store images as binary responses with strong ETags,
+conditional requests (If-None-Match -> 304) and single byte ranges
+"""
+
+import re
+from typing import BinaryIO, Iterator, Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import Response, StreamingResponse
+
+from app.blob_store import BlobStore, image_content_type
+
+# Content-addressed URLs never change, so they can be cached for a year
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Mutable URLs (e.g. "the project's current image") must revalidate, which costs a 304
+REVALIDATE_CACHE_CONTROL = "private, no-cache"
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+_RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def etag_for_key(key: str) -> str:
+    """Strong ETag derived from the content hash"""
+    return f'"{key}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header against an ETag (weak comparison, as RFC 9110 requires)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+
+def parse_range(range_header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single byte range into an inclusive (start, end) pair.
+    Returns None when there is no usable range (multiple ranges are served in full)
+    and raises ValueError when the range cannot be satisfied.
+    """
+    if not range_header:
+        return None
+    match = _RANGE_PATTERN.match(range_header.strip())
+    if not match:
+        return None
+    start_text, end_text = match.groups()
+    if not start_text and not end_text:
+        return None
+    if not start_text:
+        # Suffix range: the last N bytes
+        length = int(end_text)
+        if length == 0:
+            raise ValueError("Unsatisfiable range")
+        return max(0, size - length), size - 1
+    start = int(start_text)
+    end = int(end_text) if end_text else size - 1
+    if start >= size or end < start:
+        raise ValueError("Unsatisfiable range")
+    return start, min(end, size - 1)
+
+
+def _iter_file(blob: BinaryIO, start: int, length: int) -> Iterator[bytes]:
+    with blob:
+        blob.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = blob.read(min(STREAM_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def blob_response(request: Request, store: BlobStore, key: str, cache_control: str) -> Optional[Response]:
+    """
+    Build the binary response for a blob, or None if the blob does not exist.
+    Handles If-None-Match and Range; the body is streamed from the store.
+    """
+    etag = etag_for_key(key)
+    headers = {"ETag": etag, "Cache-Control": cache_control, "Accept-Ranges": "bytes"}
+
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    size = store.size(key)
+    blob = store.open(key) if size is not None else None
+    if blob is None:
+        return None
+
+    content_type = image_content_type(blob.read(16))
+
+    try:
+        byte_range = parse_range(request.headers.get("range"), size)
+    except ValueError:
+        blob.close()
+        return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+
+    # If-Range: only honour the range when the client's copy is still current
+    if_range = request.headers.get("if-range")
+    if byte_range and if_range and if_range.strip() != etag:
+        byte_range = None
+
+    if byte_range is None:
+        return StreamingResponse(
+            _iter_file(blob, 0, size),
+            media_type=content_type,
+            headers={**headers, "Content-Length": str(size)}
+        )
+
+    start, end = byte_range
+    length = end - start + 1
+    return StreamingResponse(
+        _iter_file(blob, start, length),
+        status_code=206,
+        media_type=content_type,
+        headers={**headers, "Content-Length": str(length), "Content-Range": f"bytes {start}-{end}/{size}"}
+    )
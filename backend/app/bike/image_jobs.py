@@ -0,0 +1,437 @@
+"""
+Background job queue for bike image generation
+Jobs are queued in Redis (or in process for development) and run by a
+bounded pool of async workers; clients poll or stream the job status.
+Jobs lost to a crash, a timeout or a shutdown are failed and handed to an
+abandon callback, which refunds the credit taken when the job was queued.
+Each job's credit is settled exactly once: kept by the handler once its
+result is persisted, or compensated by the handler or the abandon path
+"""
+
+import asyncio
+import json
+import os
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import redis
+from fastapi.concurrency import run_in_threadpool
+
+from app import metrics
+
+IMAGE_JOB_CONCURRENCY = int(os.getenv("IMAGE_JOB_CONCURRENCY", "2"))
+IMAGE_JOB_TTL = int(os.getenv("IMAGE_JOB_TTL", str(24 * 3600)))
+IMAGE_JOB_TIMEOUT = float(os.getenv("IMAGE_JOB_TIMEOUT", "300"))
+IMAGE_JOB_REAP_INTERVAL = float(os.getenv("IMAGE_JOB_REAP_INTERVAL", "15"))
+IMAGE_JOB_QUEUE_BACKEND = os.getenv("IMAGE_JOB_QUEUE", "redis" if os.getenv("REDIS_URL") else "memory")
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+TERMINAL_JOB_STATUSES = {JOB_SUCCEEDED, JOB_FAILED}
+
+# How the job's side effects were settled; set once, by whoever gets there first
+JOB_SETTLED_KEPT = "kept"
+JOB_SETTLED_COMPENSATED = "compensated"
+
+
+def new_job(project_id: str, **fields) -> dict:
+    """Create a queued job record"""
+    now = time.time()
+    return {
+        "job_id": str(uuid.uuid4()),
+        "project_id": project_id,
+        "status": JOB_QUEUED,
+        "error": None,
+        "result": None,
+        "settled": None,
+        "created_at": now,
+        "updated_at": now,
+        **fields
+    }
+
+
+class ImageJobQueue(ABC):
+    """Interface for the image job queue and job status records"""
+
+    @abstractmethod
+    def enqueue(self, job: dict) -> None:
+        """Store the job record and queue it for a worker"""
+
+    @abstractmethod
+    def dequeue(self, timeout: float) -> Optional[dict]:
+        """Block up to `timeout` seconds for the next job; returns None on timeout"""
+
+    @abstractmethod
+    def ack(self, job_id: str) -> None:
+        """Release a dequeued job once it reached a terminal status"""
+
+    @abstractmethod
+    def reap_abandoned(self) -> List[dict]:
+        """Take the unfinished jobs held by workers that stopped heartbeating"""
+
+    @abstractmethod
+    def drain(self) -> List[dict]:
+        """Take the queued jobs that would be lost when this process stops"""
+
+    def heartbeat(self) -> None:
+        """Signal that this process's workers are alive"""
+
+    def close(self) -> None:
+        """Withdraw this process from the queue on shutdown"""
+
+    @abstractmethod
+    def get(self, job_id: str) -> Optional[dict]:
+        """Get a job record"""
+
+    @abstractmethod
+    def update(self, job_id: str, **fields) -> Optional[dict]:
+        """Update fields of a job record and return it"""
+
+    @abstractmethod
+    def settle(self, job_id: str, outcome: str) -> bool:
+        """Record how the job was settled unless it already was; returns whether this call did"""
+
+
+class InMemoryImageJobQueue(ImageJobQueue):
+    """Process-local queue, suitable for a single worker and for development"""
+
+    def __init__(self, ttl: int = IMAGE_JOB_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._ready = threading.Condition(self._lock)
+        self._pending = []
+        self._jobs: Dict[str, dict] = {}
+
+    def _expire(self) -> None:
+        cutoff = time.time() - self.ttl
+        for job_id in [job_id for job_id, job in self._jobs.items() if job["updated_at"] < cutoff]:
+            del self._jobs[job_id]
+
+    def enqueue(self, job: dict) -> None:
+        with self._ready:
+            self._expire()
+            self._jobs[job["job_id"]] = dict(job)
+            self._pending.append(job["job_id"])
+            self._ready.notify()
+
+    def dequeue(self, timeout: float) -> Optional[dict]:
+        with self._ready:
+            if not self._ready.wait_for(lambda: self._pending, timeout):
+                return None
+            job = self._jobs.get(self._pending.pop(0))
+            return dict(job) if job else None
+
+    def ack(self, job_id: str) -> None:
+        pass
+
+    def reap_abandoned(self) -> List[dict]:
+        # Running jobs die with the process, along with this queue
+        return []
+
+    def drain(self) -> List[dict]:
+        with self._lock:
+            pending, self._pending = self._pending, []
+            return [dict(self._jobs[job_id]) for job_id in pending if job_id in self._jobs]
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def update(self, job_id: str, **fields) -> Optional[dict]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            job.update(fields, updated_at=time.time())
+            return dict(job)
+
+    def settle(self, job_id: str, outcome: str) -> bool:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.get("settled"):
+                return False
+            job.update(settled=outcome, updated_at=time.time())
+            return True
+
+
+class RedisImageJobQueue(ImageJobQueue):
+    """
+    Redis-backed queue shared by all workers and replicas.
+
+    Job ids are pushed to a list and moved with BLMOVE into a processing
+    list owned by this process, so a dequeued job is never only in memory.
+    Finished jobs are removed with LREM. Every process keeps a heartbeat
+    key alive; the processing lists of processes whose heartbeat expired
+    are reaped by the survivors. Job records are JSON values with a TTL so
+    finished jobs can still be polled for a while.
+    """
+
+    def __init__(self, redis_client: redis.Redis, ttl: int = IMAGE_JOB_TTL,
+                 heartbeat_ttl: int = int(IMAGE_JOB_REAP_INTERVAL * 3)):
+        self.redis = redis_client
+        self.ttl = ttl
+        self.heartbeat_ttl = heartbeat_ttl
+        self.queue_key = "image_jobs:queue"
+        self.consumers_key = "image_jobs:consumers"
+        self.key_prefix = "image_job:"
+        self.consumer_id = uuid.uuid4().hex
+
+    def _key(self, job_id: str) -> str:
+        return f"{self.key_prefix}{job_id}"
+
+    def _processing_key(self, consumer_id: str) -> str:
+        return f"image_jobs:processing:{consumer_id}"
+
+    def _heartbeat_key(self, consumer_id: str) -> str:
+        return f"image_jobs:consumer:{consumer_id}"
+
+    def enqueue(self, job: dict) -> None:
+        with self.redis.pipeline(transaction=True) as pipe:
+            pipe.setex(self._key(job["job_id"]), self.ttl, json.dumps(job))
+            pipe.lpush(self.queue_key, job["job_id"])
+            pipe.execute()
+
+    def dequeue(self, timeout: float) -> Optional[dict]:
+        job_id = self.redis.blmove(
+            self.queue_key, self._processing_key(self.consumer_id), max(1, int(timeout)), "RIGHT", "LEFT"
+        )
+        if not job_id:
+            return None
+        job = self.get(job_id)
+        if job is None:
+            # The record expired while queued, nothing left to run
+            self.ack(job_id)
+        return job
+
+    def ack(self, job_id: str) -> None:
+        self.redis.lrem(self._processing_key(self.consumer_id), 1, job_id)
+
+    def heartbeat(self) -> None:
+        with self.redis.pipeline(transaction=True) as pipe:
+            pipe.sadd(self.consumers_key, self.consumer_id)
+            pipe.setex(self._heartbeat_key(self.consumer_id), self.heartbeat_ttl, "1")
+            pipe.execute()
+
+    def reap_abandoned(self) -> List[dict]:
+        abandoned = []
+        for consumer_id in self.redis.smembers(self.consumers_key):
+            if consumer_id == self.consumer_id or self.redis.exists(self._heartbeat_key(consumer_id)):
+                continue
+            processing_key = self._processing_key(consumer_id)
+            # RPOP hands each job to exactly one reaper when several replicas reap at once
+            while True:
+                job_id = self.redis.rpop(processing_key)
+                if job_id is None:
+                    break
+                job = self.get(job_id)
+                if job and job["status"] not in TERMINAL_JOB_STATUSES:
+                    abandoned.append(job)
+            self.redis.srem(self.consumers_key, consumer_id)
+        return abandoned
+
+    def drain(self) -> List[dict]:
+        # Queued jobs stay in Redis for the other replicas, or for this one after a restart
+        return []
+
+    def close(self) -> None:
+        with self.redis.pipeline(transaction=True) as pipe:
+            pipe.srem(self.consumers_key, self.consumer_id)
+            pipe.delete(self._heartbeat_key(self.consumer_id))
+            pipe.execute()
+
+    def get(self, job_id: str) -> Optional[dict]:
+        value = self.redis.get(self._key(job_id))
+        return json.loads(value) if value else None
+
+    def update(self, job_id: str, **fields) -> Optional[dict]:
+        key = self._key(job_id)
+        with self.redis.pipeline(transaction=True) as pipe:
+            while True:
+                try:
+                    pipe.watch(key)
+                    value = pipe.get(key)
+                    if not value:
+                        pipe.unwatch()
+                        return None
+                    job = json.loads(value)
+                    job.update(fields, updated_at=time.time())
+                    pipe.multi()
+                    pipe.setex(key, self.ttl, json.dumps(job))
+                    pipe.execute()
+                    return job
+                except redis.WatchError:
+                    continue
+
+    def settle(self, job_id: str, outcome: str) -> bool:
+        key = self._key(job_id)
+        with self.redis.pipeline(transaction=True) as pipe:
+            while True:
+                try:
+                    pipe.watch(key)
+                    value = pipe.get(key)
+                    job = json.loads(value) if value else None
+                    if job is None or job.get("settled"):
+                        pipe.unwatch()
+                        return False
+                    job.update(settled=outcome, updated_at=time.time())
+                    pipe.multi()
+                    pipe.setex(key, self.ttl, json.dumps(job))
+                    pipe.execute()
+                    return True
+                except redis.WatchError:
+                    continue
+
+
+def create_image_job_queue(backend: str = IMAGE_JOB_QUEUE_BACKEND) -> ImageJobQueue:
+    """
+    Create an image job queue
+
+    Args:
+        backend: "redis" (uses REDIS_URL) or "memory"
+
+    Returns:
+        ImageJobQueue instance
+    """
+    if backend == "redis":
+        redis_client = redis.Redis.from_url(os.getenv("REDIS_URL"), decode_responses=True)
+        return RedisImageJobQueue(redis_client)
+    return InMemoryImageJobQueue()
+
+
+class ImageJobWorkerPool:
+    """
+    Runs queued jobs on a fixed number of async workers in the application process.
+
+    A maintenance task keeps the queue heartbeat alive and reaps jobs left
+    behind by dead processes. Reaped jobs, jobs that exceed `job_timeout`
+    and jobs still queued in process at shutdown are marked failed and
+    passed to `on_abandoned`, unless the handler already settled them.
+    `on_succeeded` runs as an untimed follow-up task once a job succeeded.
+    """
+
+    def __init__(self, queue: ImageJobQueue, handler: Callable[[dict], Awaitable[dict]],
+                 concurrency: int = IMAGE_JOB_CONCURRENCY, poll_timeout: float = 1.0,
+                 on_abandoned: Optional[Callable[[dict], Awaitable[None]]] = None,
+                 on_succeeded: Optional[Callable[[dict, dict], Awaitable[None]]] = None,
+                 job_timeout: float = IMAGE_JOB_TIMEOUT, reap_interval: float = IMAGE_JOB_REAP_INTERVAL):
+        self.queue = queue
+        self.handler = handler
+        self.concurrency = concurrency
+        self.poll_timeout = poll_timeout
+        self.on_abandoned = on_abandoned
+        self.on_succeeded = on_succeeded
+        self.job_timeout = job_timeout
+        self.reap_interval = reap_interval
+        self._tasks = []
+        self._maintenance = None
+        self._followups = set()
+        self._stopping = False
+
+    async def start(self) -> None:
+        """Start the workers and the heartbeat/reaper task"""
+        if self._tasks:
+            return
+        self._stopping = False
+        await run_in_threadpool(self.queue.heartbeat)
+        self._tasks = [asyncio.create_task(self._worker(index)) for index in range(self.concurrency)]
+        self._maintenance = asyncio.create_task(self._maintain())
+
+    async def stop(self) -> None:
+        """Stop the workers, letting running jobs finish, and abandon jobs that would be lost"""
+        self._stopping = True
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await asyncio.gather(*self._followups, return_exceptions=True)
+        if self._maintenance is not None:
+            self._maintenance.cancel()
+            await asyncio.gather(self._maintenance, return_exceptions=True)
+            self._maintenance = None
+        try:
+            for job in await run_in_threadpool(self.queue.drain):
+                await self._abandon(job, "Image generation was cancelled by a server shutdown")
+            await run_in_threadpool(self.queue.close)
+        except Exception as e:
+            print(f"❌ Image job queue shutdown failed: {e}")
+
+    async def _maintain(self) -> None:
+        while not self._stopping:
+            try:
+                await run_in_threadpool(self.queue.heartbeat)
+                for job in await run_in_threadpool(self.queue.reap_abandoned):
+                    await self._abandon(job, "Image generation was interrupted")
+            except Exception as e:
+                print(f"❌ Image job maintenance failed: {e}")
+            await asyncio.sleep(self.reap_interval)
+
+    async def _abandon(self, job: dict, error: str) -> None:
+        """Fail a job that will not complete and let the owner compensate for it, unless it was settled"""
+        job_id = job["job_id"]
+        print(f"❌ Image job {job_id} abandoned: {error}")
+        await run_in_threadpool(self.queue.update, job_id, status=JOB_FAILED, error=error)
+        metrics.increment("image_jobs.abandoned")
+        if not await run_in_threadpool(self.queue.settle, job_id, JOB_SETTLED_COMPENSATED):
+            # The handler kept the result or compensated the job itself
+            return
+        if self.on_abandoned is not None:
+            try:
+                await self.on_abandoned(job)
+            except Exception as e:
+                print(f"❌ Image job {job_id} abandon callback failed: {e}")
+
+    async def _worker(self, index: int) -> None:
+        while not self._stopping:
+            try:
+                job = await run_in_threadpool(self.queue.dequeue, self.poll_timeout)
+            except Exception as e:
+                print(f"❌ Image job worker {index} failed to dequeue: {e}")
+                await asyncio.sleep(self.poll_timeout)
+                continue
+            if job is None:
+                continue
+            await self._run(job)
+
+    def _follow_up(self, job: dict, result: dict) -> None:
+        """Run on_succeeded outside the timed section; stop() waits for it"""
+        if self.on_succeeded is None:
+            return
+
+        async def follow_up():
+            try:
+                await self.on_succeeded(job, result)
+            except Exception as e:
+                print(f"❌ Image job {job['job_id']} follow-up failed: {e}")
+
+        task = asyncio.create_task(follow_up())
+        self._followups.add(task)
+        task.add_done_callback(self._followups.discard)
+
+    async def _run(self, job: dict) -> None:
+        job_id = job["job_id"]
+        started_at = time.monotonic()
+        try:
+            await run_in_threadpool(self.queue.update, job_id, status=JOB_RUNNING)
+            result = await asyncio.wait_for(self.handler(job), self.job_timeout)
+            await run_in_threadpool(self.queue.update, job_id, status=JOB_SUCCEEDED, result=result)
+            metrics.increment("image_jobs.completed", status=JOB_SUCCEEDED)
+            self._follow_up(job, result)
+        except asyncio.TimeoutError:
+            # The handler was cancelled; a save or refund already running in its thread settles the job first
+            await self._abandon(job, f"Image generation timed out after {self.job_timeout:.0f}s")
+            metrics.increment("image_jobs.completed", status=JOB_FAILED)
+        except Exception as e:
+            print(f"❌ Image job {job_id} failed: {e}")
+            await run_in_threadpool(self.queue.update, job_id, status=JOB_FAILED, error=str(e))
+            metrics.increment("image_jobs.completed", status=JOB_FAILED)
+        finally:
+            metrics.observe("image_jobs.duration_seconds", time.monotonic() - started_at)
+            try:
+                await run_in_threadpool(self.queue.ack, job_id)
+            except Exception as e:
+                # Left in the processing list; reaped as finished once this process is gone
+                print(f"❌ Image job {job_id} could not be acknowledged: {e}")
@@ -1,8 +1,9 @@
 from prompt import SYSTEM_PROMPT
 from utils import (
-    get_openai_client, get_summary_prompt, generate_bike_image,
-    save_image_to_file
+    get_openai_client, get_async_openai_client, get_summary_prompt,
+    generate_bike_image, save_image_to_file
 )
+import asyncio
 import os
 
 def _initialize_conversation():
@@ -49,7 +50,7 @@ def main():
     final_prompt = _run_conversation_loop(client, messages)
     
     print("\nGenerating your custom bike image...")
-    image_base64 = generate_bike_image(final_prompt, client)
+    image_base64 = asyncio.run(generate_bike_image(final_prompt, get_async_openai_client()))
     image_path = save_image_to_file(image_base64, "cli_session")
     print(f"Image saved to {image_path}")
 
@@ -118,16 +118,6 @@ class BikeSpecification(BaseModel):
         
         return specs
     
-    def validate_and_clean_custom_fields(self, validation_func) -> None:
-        """Validate and clean custom fields using provided validation function"""
-        validated_custom_fields = {}
-        for field_name, value in self.custom_fields.items():
-            if validation_func(value):
-                validated_custom_fields[field_name] = value
-            else:
-                print(f"Rejected custom field '{field_name}': '{value}' - validation failed")
-        self.custom_fields = validated_custom_fields
-    
     def has_custom_fields(self) -> bool:
         """Check if bike specification has any custom fields"""
         return len(self.custom_fields) > 0
@@ -231,4 +221,13 @@ class ImageGenerationRequest(BaseModel):
     project_id: str
 
 class ImageGenerationResponse(BaseModel):
-    image_base64: str 
\ No newline at end of file
+    image_base64: str
+
+class ImageJobResponse(BaseModel):
+    job_id: str
+    project_id: str
+    status: Literal["queued", "running", "succeeded", "failed"]
+    error: Optional[str] = None
+    image_url: Optional[str] = None
+    status_url: str
+    events_url: str 
\ No newline at end of file
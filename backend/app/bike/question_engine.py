@@ -0,0 +1,281 @@
+"""
+Deterministic question engine for the bike builder
+Serves the fixed QuestionType steps from a versioned local catalog and only
+calls the LLM to phrase a follow-up when the user picks "Custom"
+"""
+
+import copy
+import json
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+
+from .conversation_store import ConversationStore
+from .models import (
+    BikeSpecification, QuestionOption, QuestionResponse, QuestionType, StructuredLLMResponse
+)
+from .prompt import QUESTIONS
+from .utils import clean_json_response
+
+# "local" serves predefined steps without the LLM, "llm" sends every turn to the model
+QUESTION_ENGINE = os.getenv("QUESTION_ENGINE", "local")
+
+QUESTION_CATALOG_VERSION = "1"
+CUSTOM_OPTION_VALUE = "custom"
+CUSTOM_ANSWER = "Custom"
+OTHER_OPTION_VALUE = "other"
+MAX_FOLLOW_UPS = 3
+START_MESSAGE = "Let's start building my dream bike!"
+MULTISELECT_QUESTIONS = {QuestionType.BIKE_CATEGORY.value}
+
+CUSTOM_FOLLOWUP_PROMPT = """
+You are a skilled bike mechanic helping a user describe a custom motorcycle part.
+The user picked "Custom" for: {label}
+Their answers so far: {answers}
+
+Write ONE short follow-up question that helps them describe their custom {label},
+with 3 concise, visually distinct suggestions. Keep it safe for image generation:
+no brand names, violence or offensive language.
+
+Respond with JSON only:
+{{"message": "short friendly sentence", "question_text": "the question", "options": ["suggestion 1", "suggestion 2", "suggestion 3"]}}
+"""
+
+
+def _slugify(text: str) -> str:
+    """Turn an option label into a stable value for matching, dropping "(e.g., ...)" examples"""
+    text = re.sub(r"\(.*?\)", "", text).lower()
+    return re.sub(r"[^a-z0-9]+", "_", text).strip("_")
+
+
+def _label(field: str) -> str:
+    return field.replace("_", " ")
+
+
+def _build_catalog() -> List[dict]:
+    """Build the question catalog from the QUESTIONS definitions, in QuestionType order"""
+    question_types = [qt for qt in QuestionType if qt != QuestionType.CUSTOM_FOLLOWUP]
+    catalog = []
+    for question_type, question in zip(question_types, QUESTIONS):
+        options = [
+            {"number": number, "text": text, "value": _slugify(text)}
+            for number, text in enumerate(question["options"], 1)
+        ]
+        options.append({"number": len(options) + 1, "text": "Custom (please specify)", "value": CUSTOM_OPTION_VALUE})
+        catalog.append({
+            "question_type": question_type.value,
+            "question_text": question["text"],
+            "options": options,
+            "is_multiselect": question_type.value in MULTISELECT_QUESTIONS
+        })
+    return catalog
+
+
+# Catalogs are versioned so sessions started on an older catalog finish on it
+QUESTION_CATALOGS: Dict[str, List[dict]] = {
+    QUESTION_CATALOG_VERSION: _build_catalog()
+}
+
+
+def _match_option(options: List[dict], token: str) -> Optional[dict]:
+    """Match a user token against option values, numbers or texts"""
+    token = token.strip().lower()
+    for option in options:
+        if token in (option["value"].lower(), str(option["number"]), option["text"].lower()):
+            return option
+    return None
+
+
+class QuestionEngine:
+    """State machine that walks the user through the predefined bike steps"""
+
+    def __init__(self, store: ConversationStore, catalog_version: str = QUESTION_CATALOG_VERSION):
+        self.store = store
+        self.catalog_version = catalog_version
+
+    def new_state(self) -> dict:
+        """Create the state for a fresh session"""
+        return {
+            "engine": "local",
+            "catalog_version": self.catalog_version,
+            "step": 0,
+            "answers": {},
+            "custom_fields": {},
+            "pending_custom": None
+        }
+
+    def catalog_for(self, state: dict) -> List[dict]:
+        return QUESTION_CATALOGS[state["catalog_version"]]
+
+    def is_complete(self, state: dict) -> bool:
+        return state["step"] >= len(self.catalog_for(state))
+
+    def apply_answer(self, state: dict, user_message: str) -> dict:
+        """Return the state after the user's answer; pure, so it is safe to retry"""
+        state = copy.deepcopy(state)
+        answer = (user_message or "").strip()
+        if not answer or answer == START_MESSAGE or self.is_complete(state):
+            return state
+
+        question = self.catalog_for(state)[state["step"]]
+        field = question["question_type"]
+        pending = state.get("pending_custom")
+
+        if pending:
+            option = _match_option(pending.get("options") or [], answer)
+            if option and option["value"] == OTHER_OPTION_VALUE:
+                if pending["follow_up_count"] < MAX_FOLLOW_UPS:
+                    # Ask for a free-text description instead
+                    state["pending_custom"] = {
+                        "parent": field,
+                        "follow_up_count": pending["follow_up_count"] + 1,
+                        "question_text": f"Please describe your custom {_label(field)}:",
+                        "message": "No problem, describe it in your own words.",
+                        "options": []
+                    }
+                    return state
+                option = None
+            state["custom_fields"][field] = (option["text"] if option else answer)[:500]
+            state["pending_custom"] = None
+            state["step"] += 1
+            return state
+
+        tokens = answer.split(",") if question["is_multiselect"] else [answer]
+        matched = [_match_option(question["options"], token) for token in tokens if token.strip()]
+
+        if not matched or any(option is None for option in matched):
+            # Free-text answer: keep it as the custom description for this step
+            state["answers"][field] = CUSTOM_ANSWER
+            state["custom_fields"][field] = answer[:500]
+            state["step"] += 1
+            return state
+
+        # Values are only for matching; the specification keeps the option texts
+        state["answers"][field] = ", ".join(
+            CUSTOM_ANSWER if option["value"] == CUSTOM_OPTION_VALUE else option["text"]
+            for option in matched
+        )
+        if any(option["value"] == CUSTOM_OPTION_VALUE for option in matched):
+            # The follow-up question is filled in by the LLM after the state is saved
+            state["pending_custom"] = {"parent": field, "follow_up_count": 1, "options": None}
+        else:
+            state["step"] += 1
+        return state
+
+    def build_question(self, state: dict) -> QuestionResponse:
+        """Render the question for the current step (or its pending custom follow-up)"""
+        catalog = self.catalog_for(state)
+        question = catalog[state["step"]]
+        pending = state.get("pending_custom")
+
+        if pending:
+            return QuestionResponse(
+                question_type=QuestionType.CUSTOM_FOLLOWUP.value,
+                question_text=pending.get("question_text") or f"Please describe your custom {_label(pending['parent'])}:",
+                options=[QuestionOption(**option) for option in pending.get("options") or []],
+                current_step=state["step"] + 1,
+                total_steps=len(catalog),
+                parent_question=pending["parent"],
+                follow_up_count=pending["follow_up_count"],
+                max_follow_ups=MAX_FOLLOW_UPS
+            )
+
+        return QuestionResponse(
+            question_type=question["question_type"],
+            question_text=question["question_text"],
+            options=[QuestionOption(**option) for option in question["options"]],
+            current_step=state["step"] + 1,
+            total_steps=len(catalog),
+            is_multiselect=question["is_multiselect"]
+        )
+
+    def build_bike_specification(self, state: dict) -> BikeSpecification:
+        """Build the final specification from the collected answers"""
+        return BikeSpecification(**state["answers"], custom_fields=dict(state["custom_fields"]))
+
+    def build_response(self, state: dict) -> StructuredLLMResponse:
+        """Build the structured response for the current state"""
+        if self.is_complete(state):
+            return StructuredLLMResponse(
+                type="completion",
+                content=self.build_bike_specification(state),
+                message="Perfect! Here's your complete bike specification."
+            )
+
+        pending = state.get("pending_custom")
+        if pending:
+            message = pending.get("message") or f"Tell me more about your custom {_label(pending['parent'])}."
+        elif state["step"] == 0:
+            message = "Let's build your dream bike! Pick the options that inspire you, or add a custom description."
+        else:
+            message = f"Great choice! Next up: {_label(self.catalog_for(state)[state['step']]['question_type'])}."
+
+        return StructuredLLMResponse(type="question", content=self.build_question(state), message=message)
+
+    async def generate_custom_followup(self, state: dict, client) -> Tuple[str, str, List[dict]]:
+        """Ask the LLM to phrase the follow-up for a custom pick; falls back to a free-text question"""
+        field = state["pending_custom"]["parent"]
+        fallback = (
+            f"Tell me more about your custom {_label(field)}.",
+            f"Please describe your custom {_label(field)}:",
+            []
+        )
+        try:
+            response = await client.chat.completions.create(
+                model=os.getenv("OPENAI_CHAT_MODEL"),
+                messages=[{
+                    "role": "user",
+                    "content": CUSTOM_FOLLOWUP_PROMPT.format(label=_label(field), answers=json.dumps(state["answers"]))
+                }],
+                max_tokens=300
+            )
+            data = json.loads(clean_json_response(response.choices[0].message.content))
+            suggestions = [str(text)[:200] for text in data.get("options", [])][:3]
+            options = [
+                {"number": number, "text": text, "value": _slugify(text) or f"option_{number}"}
+                for number, text in enumerate(suggestions, 1)
+            ]
+            options.append({"number": len(options) + 1, "text": "Other (describe)", "value": OTHER_OPTION_VALUE})
+            return data.get("message") or fallback[0], data.get("question_text") or fallback[1], options
+        except Exception as e:
+            print(f"❌ Error generating custom follow-up: {e}")
+            return fallback
+
+    async def handle_turn(self, project_id: str, user_message: str, client) -> Optional[Tuple[StructuredLLMResponse, bool]]:
+        """
+        Advance the project's state machine by one user turn.
+        Returns the structured response and whether the turn changed anything,
+        or None when the project is an LLM-driven session the engine must not take over.
+        A first message that already answers the opening question is applied to the new session.
+        """
+        state = await run_in_threadpool(self.store.get_state, project_id)
+        fresh = state is None or state.get("engine") != "local"
+        if fresh:
+            if await run_in_threadpool(self.store.get_messages, project_id):
+                return None
+            state = self.new_state()
+        elif state.get("catalog_version") not in QUESTION_CATALOGS:
+            return None
+
+        new_state = await run_in_threadpool(
+            self.store.update_state, project_id,
+            lambda current: self.apply_answer(current if current and current.get("engine") == "local" else state, user_message)
+        )
+        changed = fresh or new_state != state
+
+        pending = new_state.get("pending_custom")
+        if pending and pending.get("options") is None:
+            message, question_text, options = await self.generate_custom_followup(new_state, client)
+
+            def attach_followup(current: Optional[dict]) -> Optional[dict]:
+                current = copy.deepcopy(current)
+                current_pending = (current or {}).get("pending_custom")
+                if current_pending and current_pending.get("options") is None and current_pending["parent"] == pending["parent"]:
+                    current_pending.update(message=message, question_text=question_text, options=options)
+                return current
+
+            new_state = await run_in_threadpool(self.store.update_state, project_id, attach_followup)
+
+        return self.build_response(new_state), changed
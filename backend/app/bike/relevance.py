@@ -0,0 +1,142 @@
+"""
+Local relevance classifier for custom bike inputs
+Scores inputs against a motorcycle lexicon and the question catalog so clear
+accepts and clear rejects are settled without calling the validation model
+"""
+
+import os
+import re
+from typing import Iterable, List, Optional, Set
+
+from app import metrics
+from .models import QuestionType
+from .prompt import QUESTIONS
+
+# Ordered validation tiers; "lexicon" is the local scorer, "llm" the validation model
+RELEVANCE_TIERS = [tier.strip() for tier in os.getenv("RELEVANCE_TIERS", "lexicon,llm").split(",") if tier.strip()]
+# Share of content words that must be bike terms to accept locally
+RELEVANCE_ACCEPT_SCORE = float(os.getenv("RELEVANCE_ACCEPT_SCORE", "0.6"))
+
+BIKE_LEXICON = {
+    # Parts and components
+    "bike", "motorcycle", "motorbike", "moto", "engine", "motor", "cylinder", "piston", "exhaust", "pipe",
+    "muffler", "silencer", "header", "headers", "tank", "fuel", "seat", "saddle", "cowl", "backrest",
+    "handlebar", "handlebars", "bar", "bars", "grip", "grips", "clip", "mirror", "mirrors", "headlight",
+    "headlamp", "light", "lights", "lamp", "taillight", "indicator", "indicators", "blinker", "blinkers",
+    "wheel", "wheels", "rim", "rims", "spoke", "spokes", "tire", "tires", "tyre", "tyres", "hub",
+    "fork", "forks", "shock", "shocks", "suspension", "swingarm", "frame", "chassis", "subframe",
+    "fender", "fenders", "mudguard", "fairing", "fairings", "bodywork", "panel", "panels", "windscreen",
+    "windshield", "screen", "visor", "flyscreen", "brake", "brakes", "disc", "discs", "caliper", "calipers",
+    "chain", "sprocket", "belt", "clutch", "gearbox", "radiator", "intake", "airbox", "filter", "footpeg",
+    "footpegs", "pegs", "kickstand", "stand", "plate", "number", "dash", "gauge", "gauges", "speedometer",
+    "tachometer", "cluster", "battery", "bellypan", "skid", "crash", "guard", "guards", "luggage",
+    "pannier", "panniers", "saddlebag", "saddlebags", "rack", "tail", "tailsection", "cover", "covers",
+    # Styles and categories
+    "cafe", "racer", "scrambler", "bobber", "chopper", "cruiser", "tracker", "enduro", "motocross",
+    "supermoto", "touring", "tourer", "adventure", "naked", "streetfighter", "superbike", "sport", "sporty",
+    "retro", "vintage", "classic", "custom", "rally", "dirt", "offroad", "road", "street", "track", "race",
+    "racing", "brat", "minimal", "minimalist", "aggressive", "sleek", "aerodynamic", "bagger",
+    # Finishes, materials and colors
+    "matte", "matt", "gloss", "glossy", "satin", "metallic", "chrome", "chromed", "polished", "brushed",
+    "anodized", "powder", "coated", "painted", "paint", "livery", "stripe", "stripes", "pinstripe",
+    "pinstriping", "decal", "decals", "graphics", "carbon", "fiber", "fibre", "aluminium", "aluminum",
+    "alloy", "steel", "titanium", "leather", "suede", "alcantara", "brass", "copper", "bronze", "gold",
+    "black", "white", "red", "blue", "green", "yellow", "orange", "purple", "grey", "gray", "silver",
+    "olive", "khaki", "teal", "cream", "beige", "brown", "tan", "burgundy", "maroon", "navy", "camo",
+    "neon", "candy", "pearl", "gunmetal", "led", "halogen", "round", "dual", "twin", "single", "inline",
+    "upswept", "underbelly", "stubby", "knobby", "spoked", "cast", "forged", "springer", "telescopic",
+    "usd", "upside", "teardrop", "sculpted", "engraved", "quilted", "stitched", "stitching", "tuck",
+    "roll", "diamond", "ribbed", "low", "high", "slim", "wide", "long", "short", "raised", "flat",
+}
+
+OFF_TOPIC_LEXICON = {
+    "pizza", "burger", "recipe", "recipes", "homework", "essay", "poem", "lottery", "casino", "bitcoin",
+    "crypto", "stock", "stocks", "invest", "investment", "loan", "mortgage", "dating", "weather", "politics",
+    "election", "password", "hack", "hacking", "movie", "movies", "song", "lyrics", "football", "soccer",
+    "cricket", "basketball", "dog", "cat", "cook", "cooking", "diet", "medicine", "doctor",
+}
+
+STOPWORDS = {
+    "a", "an", "the", "and", "or", "with", "without", "of", "in", "on", "for", "to", "like", "style",
+    "styled", "type", "kind", "some", "my", "i", "want", "would", "please", "very", "more", "less", "it",
+    "its", "is", "be", "that", "this", "as", "at", "by", "from", "into", "plus", "all", "no", "not",
+}
+
+_WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def _tokenize(text: str) -> List[str]:
+    return _WORD_PATTERN.findall(text.lower())
+
+
+def _catalog_vocabulary() -> Set[str]:
+    """Words used by the predefined question options and question types"""
+    vocabulary: Set[str] = set()
+    for question in QUESTIONS:
+        for option in question["options"]:
+            # Drop the "(e.g., ...)" model examples, they name brands rather than parts
+            vocabulary.update(_tokenize(re.sub(r"\(.*?\)", "", option)))
+    for question_type in QuestionType:
+        vocabulary.update(_tokenize(question_type.value.replace("_", " ")))
+    return {word for word in vocabulary if len(word) > 1 and word not in STOPWORDS}
+
+
+class LocalRelevanceClassifier:
+    """
+    Lexicon-based relevance scorer.
+
+    classify() returns True for a clear accept, False for a clear reject and
+    None when the input is ambiguous and should go to the next tier.
+    """
+
+    def __init__(self, vocabulary: Iterable[str], off_topic: Iterable[str] = OFF_TOPIC_LEXICON,
+                 accept_score: float = RELEVANCE_ACCEPT_SCORE):
+        self.vocabulary = set(vocabulary)
+        self.off_topic = set(off_topic)
+        self.accept_score = accept_score
+
+    def _is_gibberish(self, text: str, words: List[str]) -> bool:
+        if not re.search(r"[a-zA-Z]", text):
+            return True
+        if re.search(r"(.)\1{4,}", text):
+            return True
+        # Long runs without vowels (keyboard mashing)
+        return any(len(word) >= 6 and word.isalpha() and not re.search(r"[aeiouy]", word) for word in words)
+
+    def classify(self, text: str) -> Optional[bool]:
+        words = [word for word in _tokenize(text) if word not in STOPWORDS]
+        if self._is_gibberish(text, words):
+            return False
+        if not words:
+            return None
+
+        bike_words = sum(1 for word in words if word in self.vocabulary)
+        off_topic_words = sum(1 for word in words if word in self.off_topic)
+
+        if off_topic_words and not bike_words:
+            return False
+        if not off_topic_words and bike_words / len(words) >= self.accept_score:
+            return True
+        return None
+
+
+local_relevance_classifier = LocalRelevanceClassifier(BIKE_LEXICON | _catalog_vocabulary())
+
+
+def classify_locally(text: str) -> Optional[bool]:
+    """
+    Run the local tier (when enabled) and count its decisions.
+    Returns the verdict, or None when the input must go to the next tier.
+    """
+    if "lexicon" not in RELEVANCE_TIERS:
+        return None
+    verdict = local_relevance_classifier.classify(text)
+    if verdict is None:
+        metrics.increment("relevance.tier_passthrough", tier="lexicon")
+    else:
+        metrics.increment("relevance.tier_hits", tier="lexicon", verdict="accept" if verdict else "reject")
+    return verdict
+
+
+def llm_tier_enabled() -> bool:
+    return "llm" in RELEVANCE_TIERS
@@ -0,0 +1,154 @@
+"""
+Incremental JSON parsing and server-sent event helpers for streamed chat responses
+"""
+
+import json
+from typing import Any, List, Optional, Tuple
+
+from .models import QuestionOption
+
+JSONPath = Tuple[Any, ...]
+
+WHITESPACE = " \t\r\n"
+
+
+class IncrementalJSONParser:
+    """
+    Parse a single JSON document fed in arbitrary chunks.
+
+    Every value (string, number, literal, object or array) is reported with its
+    path as soon as its closing character has been seen, so callers can act on
+    fields before the rest of the document arrives. Text before the first
+    opening brace/bracket (e.g. a ```json fence) and after the root value
+    closes is ignored.
+    """
+
+    def __init__(self):
+        self._stack: List[dict] = []
+        self._started = False
+        self._done = False
+        self._in_string = False
+        self._escape = False
+        self._string_buffer: List[str] = []
+        self._scalar_buffer: List[str] = []
+        self.root: Any = None
+
+    @property
+    def done(self) -> bool:
+        """Whether the root value has been fully parsed"""
+        return self._done
+
+    def feed(self, chunk: str) -> List[Tuple[JSONPath, Any]]:
+        """Consume a chunk of text and return the (path, value) pairs completed by it"""
+        events: List[Tuple[JSONPath, Any]] = []
+        for char in chunk:
+            if self._done:
+                break
+            if not self._started:
+                if char in "{[":
+                    self._started = True
+                    self._open_container(char)
+                continue
+            if self._in_string:
+                self._consume_string_char(char, events)
+                continue
+            self._consume_structural_char(char, events)
+        return events
+
+    def _consume_string_char(self, char: str, events: List[Tuple[JSONPath, Any]]) -> None:
+        if self._escape:
+            self._string_buffer.append(char)
+            self._escape = False
+        elif char == "\\":
+            self._string_buffer.append(char)
+            self._escape = True
+        elif char == '"':
+            self._in_string = False
+            value = json.loads('"' + "".join(self._string_buffer) + '"')
+            self._string_buffer = []
+            frame = self._stack[-1]
+            if isinstance(frame["container"], dict) and frame["key"] is None:
+                frame["key"] = value
+            else:
+                self._complete_value(value, events)
+        else:
+            self._string_buffer.append(char)
+
+    def _consume_structural_char(self, char: str, events: List[Tuple[JSONPath, Any]]) -> None:
+        if char in WHITESPACE:
+            self._flush_scalar(events)
+        elif char == '"':
+            self._flush_scalar(events)
+            self._in_string = True
+        elif char in "{[":
+            self._open_container(char)
+        elif char in "}]":
+            self._flush_scalar(events)
+            frame = self._stack.pop()
+            self._complete_value(frame["container"], events, path=frame["path"])
+        elif char == ",":
+            self._flush_scalar(events)
+        elif char == ":":
+            pass
+        else:
+            self._scalar_buffer.append(char)
+
+    def _open_container(self, char: str) -> None:
+        path = self._child_path() if self._stack else ()
+        self._stack.append({
+            "container": {} if char == "{" else [],
+            "key": None,
+            "path": path
+        })
+
+    def _child_path(self) -> JSONPath:
+        frame = self._stack[-1]
+        container = frame["container"]
+        if isinstance(container, dict):
+            return frame["path"] + (frame["key"],)
+        return frame["path"] + (len(container),)
+
+    def _flush_scalar(self, events: List[Tuple[JSONPath, Any]]) -> None:
+        if not self._scalar_buffer:
+            return
+        token = "".join(self._scalar_buffer)
+        self._scalar_buffer = []
+        self._complete_value(json.loads(token), events)
+
+    def _complete_value(self, value: Any, events: List[Tuple[JSONPath, Any]], path: Optional[JSONPath] = None) -> None:
+        if not self._stack:
+            # Root container closed
+            self.root = value
+            self._done = True
+            events.append(((), value))
+            return
+
+        if path is None:
+            path = self._child_path()
+        frame = self._stack[-1]
+        container = frame["container"]
+        if isinstance(container, dict):
+            container[frame["key"]] = value
+            frame["key"] = None
+        else:
+            container.append(value)
+        events.append((path, value))
+
+
+def chat_stream_event(path: JSONPath, value: Any) -> Optional[Tuple[str, dict]]:
+    """Map a completed value of a StructuredLLMResponse to an SSE event, if it is one we surface"""
+    if path == ("message",) and isinstance(value, str):
+        return "message", {"ai_message": value}
+    if path == ("content", "question_text") and isinstance(value, str):
+        return "question_text", {"question_text": value}
+    if len(path) == 3 and path[:2] == ("content", "options") and isinstance(value, dict):
+        try:
+            return "option", QuestionOption(**value).to_dict()
+        except Exception:
+            return None
+    return None
+
+
+def format_sse(event: str, data: Any) -> str:
+    """Format a server-sent event frame"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
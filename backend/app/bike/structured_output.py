@@ -0,0 +1,198 @@
+"""
+Schema-constrained structured outputs for the bike chat
+Derives a strict JSON schema response format from the pydantic response
+models and repairs near-miss JSON locally before giving up on a reply
+"""
+
+import copy
+import os
+import re
+from typing import Any, Dict, List, Optional, Set
+
+from .models import StructuredLLMResponse
+
+# "json_schema" sends a strict response_format, "none" relies on the prompt alone
+CHAT_RESPONSE_FORMAT = os.getenv("CHAT_RESPONSE_FORMAT", "json_schema")
+
+# Top-level key order the streaming parser relies on (message before content)
+STRUCTURED_RESPONSE_KEY_ORDER = ["type", "message", "content"]
+
+# Strict schemas cannot describe free-form maps, so Dict fields are sent as lists of these entries
+MAP_ENTRY_KEY = "key"
+MAP_ENTRY_VALUE = "value"
+
+_UNSUPPORTED_KEYWORDS = {"title", "default", "examples"}
+
+
+def _strictify(schema: Any, map_fields: Set[str], non_null_fields: Set[str], field_name: Optional[str] = None) -> Any:
+    """Rewrite a pydantic JSON schema node into the subset accepted by strict structured outputs"""
+    if isinstance(schema, list):
+        return [_strictify(item, map_fields, non_null_fields) for item in schema]
+    if not isinstance(schema, dict):
+        return schema
+
+    schema = {key: value for key, value in schema.items() if key not in _UNSUPPORTED_KEYWORDS}
+
+    if schema.get("type") == "object" and isinstance(schema.get("additionalProperties"), dict) and "properties" not in schema:
+        # Dict[str, X] -> [{"key": str, "value": X}]
+        if field_name:
+            map_fields.add(field_name)
+        return {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    MAP_ENTRY_KEY: {"type": "string"},
+                    MAP_ENTRY_VALUE: _strictify(schema["additionalProperties"], map_fields, non_null_fields)
+                },
+                "required": [MAP_ENTRY_KEY, MAP_ENTRY_VALUE],
+                "additionalProperties": False
+            }
+        }
+
+    if "properties" in schema:
+        required = set(schema.get("required", []))
+        properties = {}
+        for name, property_schema in schema["properties"].items():
+            property_schema = _strictify(property_schema, map_fields, non_null_fields, name)
+            if name not in required and not _is_nullable(property_schema):
+                # Fields with a non-null default become required and stay non-null;
+                # Optional fields are nullable in the pydantic schema already
+                non_null_fields.add(name)
+            properties[name] = property_schema
+        schema["properties"] = properties
+        schema["required"] = list(properties)
+        schema["additionalProperties"] = False
+
+    for keyword in ("anyOf", "items", "$defs"):
+        if keyword not in schema:
+            continue
+        if keyword == "$defs":
+            schema[keyword] = {name: _strictify(definition, map_fields, non_null_fields) for name, definition in schema[keyword].items()}
+        else:
+            schema[keyword] = _strictify(schema[keyword], map_fields, non_null_fields)
+
+    return schema
+
+
+def _is_nullable(schema: dict) -> bool:
+    return schema.get("type") == "null" or any(option.get("type") == "null" for option in schema.get("anyOf", []))
+
+
+def build_strict_schema(model: type, key_order: Optional[List[str]] = None) -> tuple:
+    """
+    Build a strict JSON schema for a pydantic model.
+    Returns the schema, the names of Dict fields encoded as entry lists and
+    the names of defaulted fields that must not be null.
+    """
+    map_fields: Set[str] = set()
+    non_null_fields: Set[str] = set()
+    schema = _strictify(model.model_json_schema(), map_fields, non_null_fields)
+    if key_order:
+        schema["properties"] = {key: schema["properties"][key] for key in key_order}
+        schema["required"] = list(key_order)
+    return schema, map_fields, non_null_fields
+
+
+STRUCTURED_RESPONSE_SCHEMA, STRUCTURED_RESPONSE_MAP_FIELDS, STRUCTURED_RESPONSE_NON_NULL_FIELDS = build_strict_schema(
+    StructuredLLMResponse, STRUCTURED_RESPONSE_KEY_ORDER
+)
+
+
+def structured_response_format() -> Optional[Dict[str, Any]]:
+    """response_format argument for structured chat completions, or None when disabled"""
+    if CHAT_RESPONSE_FORMAT != "json_schema":
+        return None
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": "structured_llm_response",
+            "strict": True,
+            "schema": copy.deepcopy(STRUCTURED_RESPONSE_SCHEMA)
+        }
+    }
+
+
+def decode_map_fields(data: Any, map_fields: Set[str] = STRUCTURED_RESPONSE_MAP_FIELDS) -> Any:
+    """Turn Dict fields sent as [{"key", "value"}] entry lists back into dicts"""
+    if isinstance(data, list):
+        return [decode_map_fields(item, map_fields) for item in data]
+    if not isinstance(data, dict):
+        return data
+    decoded = {}
+    for key, value in data.items():
+        if key in map_fields and isinstance(value, list) and all(
+            isinstance(entry, dict) and MAP_ENTRY_KEY in entry for entry in value
+        ):
+            value = {entry[MAP_ENTRY_KEY]: entry.get(MAP_ENTRY_VALUE) for entry in value}
+        decoded[key] = decode_map_fields(value, map_fields)
+    return decoded
+
+
+def drop_null_defaults(data: Any, non_null_fields: Set[str] = STRUCTURED_RESPONSE_NON_NULL_FIELDS) -> Any:
+    """
+    Drop nulls sent for defaulted fields that are not Optional, so they take their default.
+    Replies from the prompt-only mode can still carry them, and a null there would make
+    the content fail QuestionResponse and fall through the Union to BikeSpecification.
+    """
+    if isinstance(data, list):
+        return [drop_null_defaults(item, non_null_fields) for item in data]
+    if not isinstance(data, dict):
+        return data
+    return {
+        key: drop_null_defaults(value, non_null_fields)
+        for key, value in data.items()
+        if not (value is None and key in non_null_fields)
+    }
+
+
+def repair_json(text: str) -> str:
+    """
+    Best-effort repair of near-miss JSON: surrounding prose or code fences,
+    smart quotes, Python literals, trailing commas and unclosed strings,
+    arrays or objects (e.g. a reply cut off by max tokens).
+    """
+    start = min((index for index in (text.find("{"), text.find("[")) if index != -1), default=-1)
+    if start == -1:
+        return text
+    text = text[start:]
+    text = text.replace("“", '"').replace("”", '"').replace("‘", "'").replace("’", "'")
+
+    # Close strings and containers left open, ignoring anything after the root value
+    closers: List[str] = []
+    in_string = False
+    escape = False
+    end = len(text)
+    for index, char in enumerate(text):
+        if in_string:
+            if escape:
+                escape = False
+            elif char == "\\":
+                escape = True
+            elif char == '"':
+                in_string = False
+            continue
+        if char == '"':
+            in_string = True
+        elif char in "{[":
+            closers.append("}" if char == "{" else "]")
+        elif char in "}]":
+            if closers:
+                closers.pop()
+            if not closers:
+                end = index + 1
+                break
+    text = text[:end]
+    if in_string:
+        text += '"'
+    text = re.sub(r",\s*$", "", text)
+    text += "".join(reversed(closers))
+
+    # Python literals and trailing commas outside of strings
+    parts = re.split(r'("(?:\\.|[^"\\])*")', text)
+    for index in range(0, len(parts), 2):
+        part = re.sub(r"\bTrue\b", "true", parts[index])
+        part = re.sub(r"\bFalse\b", "false", part)
+        part = re.sub(r"\bNone\b", "null", part)
+        parts[index] = re.sub(r",(\s*[}\]])", r"\1", part)
+    return "".join(parts)
@@ -1,11 +1,18 @@
 import openai
+import httpx
 import os
 import json
 import base64
+import asyncio
 from datetime import datetime
-from typing import List, Dict, Optional, TypeVar, Type
+from typing import List, Dict, Optional, Tuple, TypeVar, Type
 from dotenv import load_dotenv
 from fastapi import HTTPException
+from .conversation_store import create_conversation_store
+from .verdict_cache import create_verdict_cache
+from .relevance import classify_locally, llm_tier_enabled
+from .structured_output import decode_map_fields, drop_null_defaults, repair_json
+from app import metrics
 
 load_dotenv()
 
@@ -14,13 +21,29 @@ CHAT_MODEL = os.getenv("OPENAI_CHAT_MODEL")
 IMAGE_MODEL = os.getenv("OPENAI_IMAGE_MODEL")
 VALIDATION_MODEL = os.getenv("OPENAI_VALIDATION_MODEL")
 ENABLE_LLM_VALIDATION = os.getenv("ENABLE_LLM_VALIDATION", "true").lower() == "true"
+# "batch" validates all custom fields in one LLM call, "fanout" makes one call per field concurrently
+VALIDATION_BATCH_MODE = os.getenv("VALIDATION_BATCH_MODE", "batch")
+VALIDATION_CONCURRENCY = int(os.getenv("VALIDATION_CONCURRENCY", "4"))
 OUTPUT_DIR = "bike/output"
 
-# Global stores
-session_store = {}
-image_files = {}
-bike_specs = {}
-custom_followup_tracking = {}
+# OpenAI HTTP connection pool configuration
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "60"))
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "50"))
+OPENAI_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", "20"))
+OPENAI_KEEPALIVE_EXPIRY = float(os.getenv("OPENAI_KEEPALIVE_EXPIRY", "30"))
+
+# Bump when the corresponding validation prompt changes so cached verdicts are not reused
+RELEVANCE_PROMPT_VERSION = "1"
+IMAGE_SAFETY_PROMPT_VERSION = "1"
+
+# Conversation state (messages, bike specs, image files, custom follow-up tracking)
+conversation_store = create_conversation_store()
+
+# Cached validation verdicts keyed by normalized input and prompt version
+verdict_cache = create_verdict_cache()
+
+# Process-wide async OpenAI client, created in the app lifespan
+async_openai_client: Optional[openai.AsyncOpenAI] = None
 
 # Type variable for generic response models
 T = TypeVar('T')
@@ -32,6 +55,41 @@ def get_openai_client():
         raise HTTPException(status_code=500, detail="OpenAI API key not set.")
     return openai.OpenAI(api_key=api_key)
 
+def create_async_openai_client() -> openai.AsyncOpenAI:
+    """Create an AsyncOpenAI client backed by a bounded keep-alive connection pool"""
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        raise HTTPException(status_code=500, detail="OpenAI API key not set.")
+    http_client = httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=OPENAI_MAX_CONNECTIONS,
+            max_keepalive_connections=OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=OPENAI_KEEPALIVE_EXPIRY
+        ),
+        timeout=httpx.Timeout(OPENAI_TIMEOUT, connect=10.0)
+    )
+    return openai.AsyncOpenAI(api_key=api_key, http_client=http_client)
+
+async def init_async_openai_client() -> None:
+    """Create the shared AsyncOpenAI client on application startup"""
+    global async_openai_client
+    if async_openai_client is None and os.getenv("OPENAI_API_KEY"):
+        async_openai_client = create_async_openai_client()
+
+async def close_async_openai_client() -> None:
+    """Close the shared AsyncOpenAI client and its connection pool on shutdown"""
+    global async_openai_client
+    if async_openai_client is not None:
+        await async_openai_client.close()
+        async_openai_client = None
+
+def get_async_openai_client() -> openai.AsyncOpenAI:
+    """Get the shared AsyncOpenAI client, creating it on first use"""
+    global async_openai_client
+    if async_openai_client is None:
+        async_openai_client = create_async_openai_client()
+    return async_openai_client
+
 def clean_json_response(response_text: str) -> str:
     """Clean JSON response by removing markdown formatting"""
     cleaned_text = response_text.strip()
@@ -42,24 +100,43 @@ def clean_json_response(response_text: str) -> str:
     return cleaned_text.strip()
 
 def parse_llm_response(response_text: str, response_model: Type[T]) -> T:
-    """Parse LLM response and validate JSON structure"""
+    """Parse LLM response and validate JSON structure, repairing near-miss JSON locally"""
+    cleaned_text = clean_json_response(response_text)
     try:
-        cleaned_text = clean_json_response(response_text)
         data = json.loads(cleaned_text)
-        result = response_model(**data)
-        return result
-        
+        parse_path = "direct"
     except json.JSONDecodeError as e:
-        raise HTTPException(status_code=500, detail=f"Invalid JSON response from LLM: {str(e)}")
+        try:
+            data = json.loads(repair_json(cleaned_text))
+            parse_path = "repaired"
+        except json.JSONDecodeError:
+            metrics.increment("chat.parse_failures", stage="json")
+            raise HTTPException(status_code=500, detail=f"Invalid JSON response from LLM: {str(e)}")
+    
+    try:
+        result = response_model(**decode_map_fields(drop_null_defaults(data)))
     except Exception as e:
+        metrics.increment("chat.parse_failures", stage="validation")
         raise HTTPException(status_code=500, detail=f"Error parsing LLM response: {str(e)}")
+    
+    metrics.increment("chat.parse_success", path=parse_path)
+    return result
 
 def validate_input_basic(value: str) -> bool:
     """Basic validation for custom input"""
     return 3 <= len(value.strip()) <= 500
 
-def validate_input_with_llm(value: str, client) -> bool:
-    """LLM-based semantic validation for custom input"""
+async def validate_input_with_llm(value: str, client) -> bool:
+    """LLM-based semantic validation for custom input, served from the verdict cache when possible"""
+    return await verdict_cache.get_or_compute(
+        "relevance",
+        f"{RELEVANCE_PROMPT_VERSION}:{VALIDATION_MODEL}",
+        value,
+        lambda: _classify_input_relevance(value, client)
+    )
+
+async def _classify_input_relevance(value: str, client) -> bool:
+    """Ask the validation model whether the input is bike-related"""
     validation_prompt = f"""
     You are a bike expert. Determine if this user input is relevant to motorcycle/bike customization or specification.
     
@@ -76,7 +153,7 @@ def validate_input_with_llm(value: str, client) -> bool:
     Respond with only "YES" if relevant to bikes/motorcycles, or "NO" if not relevant.
     """
     
-    response = client.chat.completions.create(
+    response = await client.chat.completions.create(
         model=VALIDATION_MODEL, 
         messages=[{"role": "user", "content": validation_prompt}],
         max_tokens=10,
@@ -86,26 +163,43 @@ def validate_input_with_llm(value: str, client) -> bool:
     result = response.choices[0].message.content.strip().upper()
     return result == "YES"
 
-def validate_custom_input(value: str) -> bool:
+async def validate_custom_input(value: str) -> bool:
     """Validate custom input for bike relevance"""
     if not validate_input_basic(value):
         return False
     
-    if not ENABLE_LLM_VALIDATION:
+    verdict = classify_locally(value)
+    if verdict is not None:
+        return verdict
+    
+    if not ENABLE_LLM_VALIDATION or not llm_tier_enabled():
         return True
     
     try:
-        client = get_openai_client()
-        return validate_input_with_llm(value, client)
+        client = get_async_openai_client()
+        verdict = await validate_input_with_llm(value, client)
+        metrics.increment("relevance.tier_hits", tier="llm", verdict="accept" if verdict else "reject")
+        return verdict
     except Exception as e:
         # Fallback to basic validation on LLM failure
         return True
 
-def validate_custom_message_for_image_generation(custom_message: str, client) -> dict:
+async def validate_custom_message_for_image_generation(custom_message: str, client) -> dict:
     """
     Pre-validate custom message for image generation policy compliance.
-    Returns a dict with validation result and suggestions.
+    Returns a dict with validation result and suggestions, served from the
+    verdict cache when the message has been judged before.
     """
+    return await verdict_cache.get_or_compute(
+        "image_safety",
+        f"{IMAGE_SAFETY_PROMPT_VERSION}:{VALIDATION_MODEL}",
+        custom_message,
+        lambda: _check_image_safety(custom_message, client),
+        cacheable=lambda result: result.get("violation_type") != "validation_error"
+    )
+
+async def _check_image_safety(custom_message: str, client) -> dict:
+    """Ask the validation model whether the message is safe for image generation"""
     validation_prompt = f"""
     You are an AI content safety expert with deep knowledge of motorcycle culture and design. Analyze this custom motorcycle description, focusing ONLY on truly harmful content while allowing creative expression.
 
@@ -143,7 +237,7 @@ def validate_custom_message_for_image_generation(custom_message: str, client) ->
     """
     
     try:
-        response = client.chat.completions.create(
+        response = await client.chat.completions.create(
             model=VALIDATION_MODEL,
             messages=[{"role": "user", "content": validation_prompt}],
             max_tokens=300,
@@ -174,33 +268,193 @@ def initialize_session(project_id: str, system_prompt: str) -> List[dict]:
         {"role": "system", "content": system_prompt},
         {"role": "user", "content": "Let's start building my dream bike!"}
     ]
-    custom_followup_tracking[project_id] = {}
+    conversation_store.reset_followups(project_id)
     return messages
 
+def load_session(project_id: str, system_prompt: str) -> Tuple[List[dict], int]:
+    """
+    Get or initialize session messages using project_id.
+    Returns the messages and the index of the first message not yet persisted.
+    """
+    stored_messages = conversation_store.get_messages(project_id)
+    if stored_messages is None:
+        # Everything after the system prompt is new
+        return initialize_session(project_id, system_prompt), 1
+    messages = [{"role": "system", "content": system_prompt}] + stored_messages
+    return messages, len(messages)
+
 def get_session_messages(project_id: str, system_prompt: str) -> List[dict]:
     """Get or initialize session messages using project_id"""
-    if project_id not in session_store:
-        return initialize_session(project_id, system_prompt)
-    return session_store[project_id]
+    messages, _ = load_session(project_id, system_prompt)
+    return messages
+
+def save_session_messages(project_id: str, messages: List[dict]) -> None:
+    """Persist messages added during a turn (the system prompt is never stored)"""
+    conversation_store.append_messages(project_id, messages)
 
 def track_custom_followup(project_id: str, question_content) -> None:
     """Track custom follow-up questions"""
     if hasattr(question_content, 'question_type') and question_content.question_type == "custom_followup":
         parent = getattr(question_content, 'parent_question', None)
         if parent:
-            if parent not in custom_followup_tracking[project_id]:
-                custom_followup_tracking[project_id][parent] = 0
-            custom_followup_tracking[project_id][parent] += 1
+            conversation_store.increment_followup(project_id, parent)
+
+def record_chat_usage(project_id: str, usage, context_mode: str, prompt_version: str) -> None:
+    """Record per-turn token counts and provider prefix-cache hits of a chat completion"""
+    if usage is None:
+        return
+    prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+    completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached_tokens = (getattr(details, "cached_tokens", 0) or 0) if details else 0
+
+    metrics.observe("chat.prompt_tokens", prompt_tokens, context_mode=context_mode)
+    metrics.observe("chat.completion_tokens", completion_tokens, context_mode=context_mode)
+    metrics.increment("chat.requests", prompt_version=prompt_version)
+    metrics.increment("chat.prompt_tokens_total", prompt_tokens, prompt_version=prompt_version)
+    metrics.increment("chat.cached_tokens_total", cached_tokens, prompt_version=prompt_version)
+    if cached_tokens:
+        metrics.increment("chat.cache_hit_requests", prompt_version=prompt_version)
+    print(
+        f"📊 Chat turn for project {project_id} ({context_mode}, prompt {prompt_version}): "
+        f"{prompt_tokens} prompt ({cached_tokens} cached) / {completion_tokens} completion tokens"
+    )
+
+def prompt_cache_stats() -> Dict[str, dict]:
+    """Aggregate prefix-cache hit ratios per prompt version"""
+    requests = metrics.counters_by_label("chat.requests", "prompt_version")
+    prompt_tokens = metrics.counters_by_label("chat.prompt_tokens_total", "prompt_version")
+    cached_tokens = metrics.counters_by_label("chat.cached_tokens_total", "prompt_version")
+    hit_requests = metrics.counters_by_label("chat.cache_hit_requests", "prompt_version")
+
+    stats = {}
+    for version, request_count in requests.items():
+        version_prompt_tokens = prompt_tokens.get(version, 0)
+        version_cached_tokens = cached_tokens.get(version, 0)
+        stats[version] = {
+            "requests": request_count,
+            "prompt_tokens": version_prompt_tokens,
+            "cached_tokens": version_cached_tokens,
+            "cached_token_ratio": version_cached_tokens / version_prompt_tokens if version_prompt_tokens else 0.0,
+            "request_hit_ratio": hit_requests.get(version, 0) / request_count if request_count else 0.0
+        }
+    return stats
+
+async def _classify_inputs_relevance_batch(values: Dict[str, str], client) -> Dict[str, bool]:
+    """Ask the validation model for a YES/NO relevance verdict on every input in one call"""
+    validation_prompt = f"""
+    You are a bike expert. For each input below, determine if it is relevant to motorcycle/bike customization or specification.
+    
+    Inputs (JSON object of id -> input):
+    {json.dumps(values, ensure_ascii=False)}
+    
+    Consider if each input describes:
+    - Bike parts, components, or features
+    - Customization details, modifications, or preferences
+    - Design elements, styles, or aesthetics
+    - Technical specifications or requirements
+    - Materials, colors, or finishes
+    - Performance or functional aspects
+    
+    Respond with only a JSON object mapping every id to "YES" if relevant to bikes/motorcycles, or "NO" if not relevant.
+    """
+    
+    response = await client.chat.completions.create(
+        model=VALIDATION_MODEL,
+        messages=[{"role": "user", "content": validation_prompt}],
+        response_format={"type": "json_object"},
+        # Every id is echoed back; a character per token plus quoting and a verdict leaves room for whitespace
+        max_tokens=100 + sum(len(key) + 20 for key in values),
+        temperature=0.1
+    )
+    
+    verdicts = json.loads(clean_json_response(response.choices[0].message.content))
+    if not isinstance(verdicts, dict):
+        raise ValueError("Batch relevance reply is not a JSON object")
+    return {
+        key: str(verdicts[key]).strip().upper() == "YES"
+        for key in values if key in verdicts
+    }
+
+async def _classify_inputs_relevance_fanout(values: Dict[str, str], client) -> Dict[str, bool]:
+    """One relevance request per input, concurrently; inputs whose request failed are left out"""
+    semaphore = asyncio.Semaphore(VALIDATION_CONCURRENCY)
+    
+    async def classify(value: str) -> bool:
+        async with semaphore:
+            return await _classify_input_relevance(value, client)
+    
+    results = await asyncio.gather(*[classify(value) for value in values.values()], return_exceptions=True)
+    return {key: result for key, result in zip(values, results) if isinstance(result, bool)}
+
+async def validate_custom_inputs(values: Dict[str, str]) -> Dict[str, bool]:
+    """
+    Validate several custom inputs for bike relevance at once.
+    Cached verdicts are reused and the remaining inputs are sent to the model
+    in a single batch request (or concurrently, one per input, in fan-out mode).
+    """
+    verdicts = {key: validate_input_basic(value) for key, value in values.items()}
+    pending = {}
+    for key, value in values.items():
+        if not verdicts[key]:
+            continue
+        local_verdict = classify_locally(value)
+        if local_verdict is None:
+            pending[key] = value
+        else:
+            verdicts[key] = local_verdict
+    if not pending or not ENABLE_LLM_VALIDATION or not llm_tier_enabled():
+        return verdicts
+    
+    prompt_version = f"{RELEVANCE_PROMPT_VERSION}:{VALIDATION_MODEL}"
+    cached = await asyncio.gather(*[
+        verdict_cache.get("relevance", prompt_version, value) for value in pending.values()
+    ])
+    for key, verdict in zip(list(pending), cached):
+        if verdict is not None:
+            verdicts[key] = verdict
+            del pending[key]
+    if not pending:
+        return verdicts
+    
+    try:
+        client = get_async_openai_client()
+        batch_verdicts = {}
+        batched = VALIDATION_BATCH_MODE != "fanout" and len(pending) > 1
+        if batched:
+            try:
+                batch_verdicts = await _classify_inputs_relevance_batch(pending, client)
+            except Exception as e:
+                print(f"❌ Batch relevance validation failed, falling back to one request per input: {e}")
+        # Inputs the batch reply did not cover are asked about one by one rather than accepted below
+        missing = {key: value for key, value in pending.items() if key not in batch_verdicts}
+        if missing:
+            if batched:
+                metrics.increment("relevance.batch_fallbacks")
+            batch_verdicts.update(await _classify_inputs_relevance_fanout(missing, client))
+    except Exception as e:
+        print(f"❌ Error validating custom inputs: {e}")
+        batch_verdicts = {}
+    
+    for key, value in pending.items():
+        if key in batch_verdicts:
+            verdicts[key] = batch_verdicts[key]
+            metrics.increment("relevance.tier_hits", tier="llm", verdict="accept" if batch_verdicts[key] else "reject")
+            await verdict_cache.set("relevance", prompt_version, value, batch_verdicts[key])
+        else:
+            # Fallback to basic validation on LLM failure
+            verdicts[key] = True
+    return verdicts
 
-def validate_custom_fields(bike_spec) -> dict:
+async def validate_custom_fields(bike_spec) -> dict:
     """Validate and clean custom fields"""
+    verdicts = await validate_custom_inputs(bike_spec.custom_fields)
     validated_custom_fields = {}
     for field_name, value in bike_spec.custom_fields.items():
-        if validate_custom_input(value):
+        if verdicts.get(field_name):
             validated_custom_fields[field_name] = value
         else:
-            # Field validation failed, skip it
-            pass
+            print(f"Rejected custom field '{field_name}': '{value}' - validation failed")
     return validated_custom_fields
 
 def create_image_prompt(specs: dict) -> str:
@@ -257,16 +511,9 @@ def get_summary_prompt(messages: List[Dict], client) -> str:
 
 def cleanup_session(project_id: str) -> None:
     """Clean up session data when project is completed or deleted"""
-    if project_id in session_store:
-        del session_store[project_id]
-    if project_id in bike_specs:
-        del bike_specs[project_id]
-    if project_id in image_files:
-        del image_files[project_id]
-    if project_id in custom_followup_tracking:
-        del custom_followup_tracking[project_id]
-
-def generate_bike_image(prompt: str, client) -> str:
+    conversation_store.delete(project_id)
+
+async def generate_bike_image(prompt: str, client) -> str:
     """Generate bike image using OpenAI and return base64 string"""
     try:
         # Prepare image generation parameters
@@ -281,7 +528,7 @@ def generate_bike_image(prompt: str, client) -> str:
         if IMAGE_MODEL and "dall-e-3" in IMAGE_MODEL.lower():
             image_params["quality"] = "standard"
         
-        image_response = client.images.generate(**image_params)
+        image_response = await client.images.generate(**image_params)
         
         if not image_response.data:
             raise ValueError("No image data returned from API.")
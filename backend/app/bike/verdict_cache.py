@@ -0,0 +1,159 @@
+"""
+Content-addressed cache for LLM validation verdicts
+Verdicts are keyed by a hash of the normalized input and the prompt version,
+with an in-process LRU tier in front of a shared Redis tier
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional
+
+import redis
+from fastapi.concurrency import run_in_threadpool
+
+from app import metrics
+
+VERDICT_CACHE_TTL = int(os.getenv("VERDICT_CACHE_TTL", str(30 * 24 * 3600)))
+VERDICT_CACHE_MAX_ENTRIES = int(os.getenv("VERDICT_CACHE_MAX_ENTRIES", "10000"))
+VERDICT_CACHE_BACKEND = os.getenv("VERDICT_CACHE", "redis" if os.getenv("REDIS_URL") else "memory")
+
+
+def normalize_input(text: str) -> str:
+    """Normalize text so trivially different spellings share a verdict"""
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    text = re.sub(r"\s+", " ", text)
+    return text.strip(" .,!?;:'\"")
+
+
+def verdict_key(kind: str, prompt_version: str, text: str) -> str:
+    """Content address of a verdict"""
+    digest = hashlib.sha256(f"{prompt_version}\n{normalize_input(text)}".encode("utf-8")).hexdigest()
+    return f"{kind}:{digest}"
+
+
+class VerdictCache:
+    """
+    Two-tier verdict cache.
+
+    The local tier is a bounded LRU with per-entry expiry; the Redis tier is
+    shared across workers and expires entries with SETEX. Redis failures are
+    logged and treated as misses so validation never depends on the cache.
+    """
+
+    def __init__(self, redis_client: Optional[redis.Redis] = None,
+                 max_entries: int = VERDICT_CACHE_MAX_ENTRIES, ttl: int = VERDICT_CACHE_TTL):
+        self.redis = redis_client
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.key_prefix = "verdict:"
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def _get_local(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def _set_local(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _get_remote(self, key: str) -> Optional[Any]:
+        if self.redis is None:
+            return None
+        try:
+            value = self.redis.get(self.key_prefix + key)
+            return json.loads(value) if value else None
+        except Exception as e:
+            print(f"❌ Verdict cache read failed: {e}")
+            return None
+
+    def _set_remote(self, key: str, value: Any) -> None:
+        if self.redis is None:
+            return
+        try:
+            self.redis.setex(self.key_prefix + key, self.ttl, json.dumps(value, separators=(",", ":")))
+        except Exception as e:
+            print(f"❌ Verdict cache write failed: {e}")
+
+    async def get(self, kind: str, prompt_version: str, text: str) -> Optional[Any]:
+        """Look up a verdict in the local tier, then the shared tier"""
+        key = verdict_key(kind, prompt_version, text)
+
+        value = self._get_local(key)
+        if value is not None:
+            metrics.increment("verdict_cache.hits", kind=kind, tier="local")
+            return value
+
+        value = await run_in_threadpool(self._get_remote, key)
+        if value is not None:
+            metrics.increment("verdict_cache.hits", kind=kind, tier="redis")
+            self._set_local(key, value)
+            return value
+
+        metrics.increment("verdict_cache.misses", kind=kind)
+        return None
+
+    async def set(self, kind: str, prompt_version: str, text: str, value: Any) -> None:
+        """Store a verdict in both tiers"""
+        key = verdict_key(kind, prompt_version, text)
+        self._set_local(key, value)
+        await run_in_threadpool(self._set_remote, key, value)
+
+    async def get_or_compute(
+        self,
+        kind: str,
+        prompt_version: str,
+        text: str,
+        compute: Callable[[], Awaitable[Any]],
+        cacheable: Callable[[Any], bool] = lambda value: True
+    ) -> Any:
+        """
+        Return the cached verdict for the input, computing and storing it on a miss.
+        Results rejected by `cacheable` (e.g. error fallbacks) are returned but not stored.
+        """
+        value = await self.get(kind, prompt_version, text)
+        if value is not None:
+            return value
+
+        value = await compute()
+        if value is not None and cacheable(value):
+            await self.set(kind, prompt_version, text, value)
+        return value
+
+    def clear_local(self) -> None:
+        """Drop all entries from the in-process tier"""
+        with self._lock:
+            self._entries.clear()
+
+
+def create_verdict_cache(backend: str = VERDICT_CACHE_BACKEND) -> VerdictCache:
+    """
+    Create a verdict cache
+
+    Args:
+        backend: "redis" (uses REDIS_URL as the shared tier) or "memory" (local tier only)
+
+    Returns:
+        VerdictCache instance
+    """
+    if backend == "redis":
+        redis_client = redis.Redis.from_url(os.getenv("REDIS_URL"), decode_responses=True)
+        return VerdictCache(redis_client)
+    return VerdictCache()
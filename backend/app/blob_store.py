@@ -0,0 +1,174 @@
+"""
+Content-addressed blob storage
+Stores binary objects (generated images, thumbnails) under the SHA-256 of
+their bytes so identical content is written once and keys never go stale
+"""
+
+import hashlib
+import os
+import re
+import struct
+import tempfile
+from abc import ABC, abstractmethod
+from typing import BinaryIO, Dict, Optional, Tuple
+
+BLOB_STORE_BACKEND = os.getenv("BLOB_STORE", "local")
+BLOB_STORE_PATH = os.getenv("BLOB_STORE_PATH", "data/blobs")
+
+_KEY_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+
+def blob_key(data: bytes) -> str:
+    """Content address of a blob"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def image_dimensions(data: bytes) -> Tuple[Optional[int], Optional[int]]:
+    """Read (width, height) from a PNG, JPEG or WebP header without decoding the image"""
+    if data[:8] == b"\x89PNG\r\n\x1a\n" and len(data) >= 24:
+        return struct.unpack(">II", data[16:24])
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP" and len(data) >= 30:
+        chunk = data[12:16]
+        if chunk == b"VP8 ":
+            width, height = struct.unpack("<HH", data[26:30])
+            return width & 0x3FFF, height & 0x3FFF
+        if chunk == b"VP8L":
+            bits = int.from_bytes(data[21:25], "little")
+            return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+        if chunk == b"VP8X":
+            return int.from_bytes(data[24:27], "little") + 1, int.from_bytes(data[27:30], "little") + 1
+    if data[:2] == b"\xff\xd8":
+        index = 2
+        while index + 9 < len(data):
+            if data[index] != 0xFF:
+                index += 1
+                continue
+            marker = data[index + 1]
+            segment_length = struct.unpack(">H", data[index + 2:index + 4])[0]
+            if marker in (0xC0, 0xC1, 0xC2):
+                height, width = struct.unpack(">HH", data[index + 5:index + 9])
+                return width, height
+            index += 2 + segment_length
+    return None, None
+
+
+def image_content_type(data: bytes) -> str:
+    """Sniff the MIME type of image bytes"""
+    if data[:8] == b"\x89PNG\r\n\x1a\n":
+        return "image/png"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    if data[:2] == b"\xff\xd8":
+        return "image/jpeg"
+    return "application/octet-stream"
+
+
+class BlobStore(ABC):
+    """Interface for content-addressed blob storage"""
+
+    @abstractmethod
+    def put(self, data: bytes) -> str:
+        """Store bytes and return their key (storing the same bytes twice is a no-op)"""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        """Get the bytes stored under a key"""
+
+    @abstractmethod
+    def open(self, key: str) -> Optional[BinaryIO]:
+        """Open a blob for streaming reads (caller closes it)"""
+
+    @abstractmethod
+    def size(self, key: str) -> Optional[int]:
+        """Get the size in bytes of a blob"""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Delete a blob"""
+
+    def exists(self, key: str) -> bool:
+        return self.size(key) is not None
+
+
+class LocalFileBlobStore(BlobStore):
+    """Stores blobs as files under root/<aa>/<bb>/<key>"""
+
+    def __init__(self, root: str = BLOB_STORE_PATH):
+        self.root = root
+
+    def _path(self, key: str) -> str:
+        if not _KEY_PATTERN.match(key or ""):
+            raise ValueError(f"Invalid blob key: {key}")
+        return os.path.join(self.root, key[:2], key[2:4], key)
+
+    def put(self, data: bytes) -> str:
+        key = blob_key(data)
+        path = self._path(key)
+        if os.path.exists(path):
+            return key
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temp file and rename so readers never see a partial blob
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as temp_file:
+                temp_file.write(data)
+            os.replace(temp_path, path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return key
+
+    def get(self, key: str) -> Optional[bytes]:
+        blob = self.open(key)
+        if blob is None:
+            return None
+        with blob:
+            return blob.read()
+
+    def open(self, key: str) -> Optional[BinaryIO]:
+        try:
+            return open(self._path(key), "rb")
+        except FileNotFoundError:
+            return None
+
+    def size(self, key: str) -> Optional[int]:
+        try:
+            return os.path.getsize(self._path(key))
+        except FileNotFoundError:
+            return None
+
+    def delete(self, key: str) -> None:
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+
+def create_blob_store(backend: str = BLOB_STORE_BACKEND) -> BlobStore:
+    """
+    Create a blob store
+
+    Args:
+        backend: "local" (files under BLOB_STORE_PATH)
+
+    Returns:
+        BlobStore instance
+    """
+    if backend != "local":
+        raise ValueError(f"Unsupported blob store backend: {backend}")
+    return LocalFileBlobStore(BLOB_STORE_PATH)
+
+
+blob_store = create_blob_store()
+
+
+def put_image(data: bytes) -> Tuple[str, int, Optional[int], Optional[int]]:
+    """Store image bytes; returns (key, size, width, height) for the row that references them"""
+    width, height = image_dimensions(data)
+    return blob_store.put(data), len(data), width, height
+
+
+def put_thumbnails(thumbnails: Dict[str, bytes]) -> Dict[str, str]:
+    """Store rendered thumbnails; returns their keys by size"""
+    return {size: blob_store.put(data) for size, data in thumbnails.items()}
@@ -3,23 +3,103 @@ Dependencies for FastAPI application
 Provides dependency injection for database, Redis, and session management
 """
 
-from typing import Generator, Optional
+from contextlib import contextmanager
+from typing import AsyncGenerator, Generator, Iterator, Optional
+from uuid import UUID
 import os
+import time
 from fastapi import Depends, HTTPException, status, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from redis import Redis
+from . import metrics
+from .schemas import CurrentUser
 from .session_manager import create_session_manager, RedisSessionManager
 
 # Security
 security = HTTPBearer()
 
+# Connection pool (per engine and per worker process)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+
+
+class _InstrumentedPoolMixin:
+    """Records how long checkouts wait for a connection and how often they time out"""
+
+    pool_name = "sync"
+
+    def _do_get(self):
+        started_at = time.monotonic()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            metrics.increment("db_pool.timeouts", pool=self.pool_name)
+            raise
+        finally:
+            metrics.observe("db_pool.wait_seconds", time.monotonic() - started_at, pool=self.pool_name)
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    pool_name = "sync"
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pool_name = "async"
+
+
+def _pool_options() -> dict:
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        # Recycle before server or proxy idle timeouts close the connection underneath us
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+
+def _sync_database_url(url: Optional[str]) -> Optional[str]:
+    """
+    Pin the psycopg2 driver, which is what requirements.txt installs;
+    SQLAlchemy 2.1 maps a bare postgresql:// URL to psycopg 3 instead
+    """
+    if not url:
+        return url
+    for prefix in ("postgresql://", "postgres://"):
+        if url.startswith(prefix):
+            return "postgresql+psycopg2://" + url[len(prefix):]
+    return url
+
+
 # Database
-DATABASE_URL = os.getenv("DATABASE_URL")
-engine = create_engine(DATABASE_URL)
+DATABASE_URL = _sync_database_url(os.getenv("DATABASE_URL"))
+engine = create_engine(DATABASE_URL, poolclass=InstrumentedQueuePool, **_pool_options())
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+def _async_database_url(url: Optional[str]) -> Optional[str]:
+    """Same database through the asyncpg driver"""
+    if not url:
+        return url
+    for prefix in ("postgresql+psycopg2://", "postgresql://", "postgres://"):
+        if url.startswith(prefix):
+            return "postgresql+asyncpg://" + url[len(prefix):]
+    return url
+
+
+# Async database (asyncpg) for routes migrated off the threadpool
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or _async_database_url(DATABASE_URL)
+async_engine = create_async_engine(ASYNC_DATABASE_URL, poolclass=InstrumentedAsyncQueuePool, **_pool_options())
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 # Redis
 REDIS_URL = os.getenv("REDIS_URL")
 redis_client = Redis.from_url(REDIS_URL, decode_responses=True)
@@ -37,6 +117,26 @@ def get_db() -> Generator[Session, None, None]:
         db.close()
 
 
+@contextmanager
+def session_scope() -> Iterator[Session]:
+    """
+    Open one short-lived session for the duration of the block.
+    For helpers that run outside a request's get_db session (threadpool chat
+    helpers, background jobs), so each holds a pooled connection only while it works.
+    """
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """Async database session dependency"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 def get_redis() -> Redis:
     """Redis client dependency"""
     try:
@@ -132,6 +232,55 @@ def get_current_user_jwt(
         )
 
 
+def get_current_user_record(
+    current_user: dict = Depends(get_current_user_jwt)
+) -> CurrentUser:
+    """
+    Resolve the authenticated user and quota (required)
+    
+    FastAPI caches the dependency for the duration of a request; across
+    requests the snapshot comes from the current user cache, so warm
+    requests authenticate without a database round trip. A miss runs one
+    joined query on a short-lived session that is released before the
+    route checks out its own.
+    
+    Args:
+        current_user: JWT payload from get_current_user_jwt
+        
+    Returns:
+        CurrentUser snapshot
+        
+    Raises:
+        HTTPException: If the token subject is invalid or the user does not exist
+    """
+    from .services.user_cache import current_user_cache
+    from .services.user_service import UserService
+    
+    try:
+        user_id = UUID(current_user["id"])
+    except (KeyError, TypeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid token subject"
+        )
+    
+    def load_user() -> Optional[dict]:
+        with session_scope() as db:
+            user = UserService(db).get_current_user(user_id)
+        return user.model_dump(mode="json") if user else None
+    
+    if current_user_cache is not None:
+        user_data = current_user_cache.get_or_load(user_id, load_user)
+    else:
+        user_data = load_user()
+    if not user_data:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    return CurrentUser.model_validate(user_data)
+
+
 def get_optional_user(
     request: Request,
     session_manager: RedisSessionManager = Depends(get_session_manager)
@@ -208,13 +357,37 @@ def require_admin(user: dict = Depends(require_auth)) -> dict:
 
 
 # Health check dependencies
+def _pool_stats(pool, name: str) -> dict:
+    """Gauges of one connection pool plus its checkout wait summary"""
+    checked_out = pool.checkedout()
+    capacity = pool.size() + DB_MAX_OVERFLOW
+    return {
+        "size": pool.size(),
+        "max_overflow": DB_MAX_OVERFLOW,
+        "checked_out": checked_out,
+        "checked_in": pool.checkedin(),
+        # QueuePool counts overflow from -size, so it is negative until the pool is full
+        "overflow": max(0, pool.overflow()),
+        "saturated": checked_out >= capacity,
+        "wait_seconds": metrics.get_summary("db_pool.wait_seconds", pool=name),
+        "timeouts": metrics.get_counter("db_pool.timeouts", pool=name),
+    }
+
+
+def database_pool_stats() -> dict:
+    """Connection pool gauges of the sync and async engines"""
+    return {
+        "sync": _pool_stats(engine.pool, "sync"),
+        "async": _pool_stats(async_engine.sync_engine.pool, "async"),
+    }
+
+
 def check_database_health() -> dict:
     """Check database connection health"""
     try:
-        db = SessionLocal()
-        db.execute("SELECT 1")
-        db.close()
-        return {"status": "healthy", "service": "database"}
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+        return {"status": "healthy", "service": "database", "pool": database_pool_stats()}
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
@@ -12,7 +12,7 @@ from ..dependencies import get_current_user_jwt_optional
 router = APIRouter()
 
 @router.post("/submit", response_model=FeedbackResponse)
-async def submit_feedback(
+def submit_feedback(
     feedback: FeedbackCreate,
     db: Session = Depends(get_db),
     current_user: Optional[dict] = Depends(get_current_user_jwt_optional)
@@ -0,0 +1,99 @@
+"""
+In-process application metrics
+Thread-safe counters and value summaries keyed by name and labels, exposed
+as JSON by the /metrics endpoint
+"""
+
+import asyncio
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+MetricKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+_lock = threading.Lock()
+_counters: Dict[MetricKey, float] = {}
+_summaries: Dict[MetricKey, Dict[str, float]] = {}
+
+
+def _key(name: str, labels: Dict[str, Any]) -> MetricKey:
+    return name, tuple(sorted((label, str(value)) for label, value in labels.items()))
+
+
+def _format_key(key: MetricKey) -> str:
+    name, labels = key
+    if not labels:
+        return name
+    return name + "{" + ",".join(f"{label}={value}" for label, value in labels) + "}"
+
+
+def increment(name: str, amount: float = 1, **labels) -> None:
+    """Increment a counter"""
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+
+def observe(name: str, value: float, **labels) -> None:
+    """Record a value in a summary (count, sum, min, max, last)"""
+    key = _key(name, labels)
+    with _lock:
+        summary = _summaries.get(key)
+        if summary is None:
+            _summaries[key] = {"count": 1, "sum": value, "min": value, "max": value, "last": value}
+            return
+        summary["count"] += 1
+        summary["sum"] += value
+        summary["min"] = min(summary["min"], value)
+        summary["max"] = max(summary["max"], value)
+        summary["last"] = value
+
+
+def get_counter(name: str, **labels) -> float:
+    """Get the current value of a counter"""
+    with _lock:
+        return _counters.get(_key(name, labels), 0)
+
+
+def get_summary(name: str, **labels) -> Optional[Dict[str, float]]:
+    """Get a copy of a summary with its average, or None if nothing was observed"""
+    with _lock:
+        summary = _summaries.get(_key(name, labels))
+        if summary is None:
+            return None
+        return dict(summary, avg=summary["sum"] / summary["count"])
+
+
+def counters_by_label(name: str, label: str) -> Dict[str, float]:
+    """Get a counter's values grouped by one label"""
+    grouped: Dict[str, float] = {}
+    with _lock:
+        for (counter_name, labels), value in _counters.items():
+            if counter_name != name:
+                continue
+            label_value = dict(labels).get(label, "")
+            grouped[label_value] = grouped.get(label_value, 0) + value
+    return grouped
+
+
+def snapshot() -> Dict[str, Any]:
+    """Get all metrics as a JSON-serializable dict"""
+    with _lock:
+        summaries = {}
+        for key, summary in _summaries.items():
+            summaries[_format_key(key)] = dict(summary, avg=summary["sum"] / summary["count"])
+        return {
+            "counters": {_format_key(key): value for key, value in _counters.items()},
+            "summaries": summaries
+        }
+
+
+async def monitor_event_loop_lag(interval: float = 0.1) -> None:
+    """
+    Record how late the event loop wakes up from a sleep as event_loop.lag_seconds.
+    Any blocking call on the loop (e.g. a synchronous query in an async route) shows up as lag.
+    """
+    while True:
+        started_at = time.monotonic()
+        await asyncio.sleep(interval)
+        observe("event_loop.lag_seconds", max(0.0, time.monotonic() - started_at - interval))
@@ -2,15 +2,20 @@
 SQLAlchemy models for the Build Yourself API
 """
 
-from sqlalchemy import Column, String, Text, DateTime, Boolean, JSON, ForeignKey, Enum, UniqueConstraint, Integer, Float, CheckConstraint
-from sqlalchemy.dialects.postgresql import UUID, ARRAY, JSONB, ENUM
+from sqlalchemy import Column, String, Text, DateTime, Boolean, JSON, ForeignKey, Enum, UniqueConstraint, Integer, Float, CheckConstraint, Computed, case
+from sqlalchemy.dialects.postgresql import UUID, ARRAY, JSONB, ENUM, TSVECTOR
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship, backref
+from sqlalchemy.orm import relationship, backref, column_property, deferred
 from sqlalchemy.sql import func
+from typing import Dict, Optional
 import enum
 
+
 Base = declarative_base()
 
+# Text search configuration of projects.search_vector (see migration 010)
+PROJECT_SEARCH_CONFIG = "english"
+
 
 # Status enums
 class UserStatus(enum.Enum):
@@ -67,8 +72,21 @@ class Project(Base):
     project_type = Column(String(50), nullable=False)  # 'bike', 'car', etc.
     status = Column(ENUM(ProjectStatus, name="project_status"), default=ProjectStatus.DRAFT, nullable=True)
     configuration = Column(JSONB, nullable=True)
-    image_base64 = Column(Text, nullable=True)  # Store generated image as base64
-    conversation_history = Column(JSONB, nullable=True)  # Store chat conversation history
+    # Large columns are deferred: they load on first access or with undefer() in a load profile
+    image_base64_legacy = deferred(Column("image_base64", Text, nullable=True))  # Pre-blob-store images, moved out by scripts/migrate_images_to_blob_store.py
+    image_key = Column(String(64), nullable=True)  # SHA-256 key of the generated image in the blob store
+    image_size = Column(Integer, nullable=True)
+    image_width = Column(Integer, nullable=True)
+    image_height = Column(Integer, nullable=True)
+    thumbnail_keys = Column(JSONB, nullable=True)  # {"<max side>": blob key} of WebP thumbnails, see app/thumbnails.py
+    image_placeholder = Column(Text, nullable=True)  # Tiny WebP data URI shown while thumbnails load
+    conversation_history = deferred(Column(JSONB, nullable=True))  # Store chat conversation history
+    # Generated by Postgres from name (weight A) and description (weight B), GIN-indexed for search
+    search_vector = deferred(Column(TSVECTOR, Computed(
+        f"setweight(to_tsvector('{PROJECT_SEARCH_CONFIG}', coalesce(name, '')), 'A') || "
+        f"setweight(to_tsvector('{PROJECT_SEARCH_CONFIG}', coalesce(description, '')), 'B')",
+        persisted=True
+    ), nullable=True))
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=True)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=True)
     
@@ -77,11 +95,53 @@ class Project(Base):
     favorites = relationship("UserFavorite", back_populates="project", cascade="all, delete-orphan")
     credit_transactions = relationship("CreditTransaction", back_populates="project", cascade="all, delete-orphan")
 
+    # Lets listings link legacy images without loading the base64 column
+    has_legacy_image = column_property(image_base64_legacy.columns[0].isnot(None))
+    # Number of conversation messages, so listings can show progress without loading the history
+    conversation_length = column_property(
+        case(
+            (func.jsonb_typeof(conversation_history.columns[0]) == "array", func.jsonb_array_length(conversation_history.columns[0])),
+            else_=0
+        ),
+        deferred=True
+    )
+
     @property
     def is_favorite(self) -> bool:
         """Check if project has any favorites"""
         return bool(self.favorites)
 
+    @property
+    def image_url(self) -> Optional[str]:
+        """URL of the full image (content-addressed when it is in the blob store)"""
+        if self.image_key:
+            return f"/bike/image/blob/{self.image_key}"
+        if self.has_legacy_image:
+            return f"/bike/image/project/{self.id}"
+        return None
+
+    @property
+    def thumbnail_urls(self) -> Dict[str, str]:
+        """Thumbnail URLs by longest side in pixels"""
+        return {size: f"/bike/image/blob/{key}" for size, key in (self.thumbnail_keys or {}).items()}
+
+    def set_image(self, image_key: Optional[str], size: Optional[int] = None,
+                  width: Optional[int] = None, height: Optional[int] = None) -> None:
+        """Reference an image stored with blob_store.put_image (None clears it)"""
+        previous_key = self.image_key
+        self.image_key = image_key
+        self.image_size, self.image_width, self.image_height = (size, width, height) if image_key else (None, None, None)
+        self.image_base64_legacy = None
+        if self.image_key != previous_key:
+            # Thumbnails belong to the previous image; they are re-rendered after generation
+            self.thumbnail_keys = None
+            self.image_placeholder = None
+
+    def set_thumbnails(self, thumbnail_keys: Dict[str, str], placeholder: Optional[str]) -> None:
+        """Reference thumbnails stored with blob_store.put_thumbnails"""
+        self.thumbnail_keys = thumbnail_keys
+        self.image_placeholder = placeholder
+
 
 class UserFavorite(Base):
     __tablename__ = "user_favorites"
@@ -35,7 +35,7 @@ class PaymentVerificationRequest(BaseModel):
     razorpay_signature: str
 
 @router.post("/create-order")
-async def create_order(
+def create_order(
     request: OrderRequest,
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
@@ -76,7 +76,7 @@ async def create_order(
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/verify")
-async def verify_payment(
+def verify_payment(
     request: PaymentVerificationRequest,
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
@@ -3,13 +3,13 @@ API endpoints for currency and credit package management
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from uuid import UUID
 from sqlalchemy.dialects.postgresql import UUID as PGUUID
 
-from ..dependencies import get_db, get_current_user_jwt
-from ..services.currency_service import CurrencyService
+from ..dependencies import get_async_db, get_current_user_jwt
+from ..services.currency_service import AsyncCurrencyService
 from ..schemas import (
     CurrencyResponse,
     CreditPackageResponse,
@@ -21,41 +21,41 @@ router = APIRouter()
 @router.get("/currencies", response_model=List[CurrencyResponse])
 async def list_currencies(
     active_only: bool = True,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _: dict = Depends(get_current_user_jwt)
 ):
     """Get list of available currencies"""
-    currency_service = CurrencyService(db)
-    return currency_service.get_currencies(active_only)
+    currency_service = AsyncCurrencyService(db)
+    return await currency_service.get_currencies(active_only)
 
 @router.get("/packages", response_model=List[CreditPackageResponse])
 async def list_credit_packages(
     active_only: bool = True,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _: dict = Depends(get_current_user_jwt)
 ):
     """Get list of credit packages"""
-    currency_service = CurrencyService(db)
-    return currency_service.get_credit_packages(active_only)
+    currency_service = AsyncCurrencyService(db)
+    return await currency_service.get_credit_packages(active_only)
 
 @router.get("/packages/{package_id}/price/{currency_code}", response_model=PriceResponse)
 async def get_package_price(
     package_id: UUID,
     currency_code: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _: dict = Depends(get_current_user_jwt)
 ):
     """Get price for a credit package in specified currency"""
-    currency_service = CurrencyService(db)
+    currency_service = AsyncCurrencyService(db)
     
-    currency = currency_service.get_currency_by_code(currency_code)
+    currency = await currency_service.get_currency_by_code(currency_code)
     if not currency:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Currency {currency_code} not found"
         )
     
-    package = currency_service.get_credit_package(package_id)
+    package = await currency_service.get_credit_package(package_id)
     if not package:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -2,13 +2,14 @@
 Project API router for project management endpoints
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query, Header
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, Query, Header
 from sqlalchemy.orm import Session
-from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, List, Optional
 from uuid import UUID
-from app.dependencies import get_db, get_current_user_jwt
-from app.services.project_service import ProjectService
-from app.services.user_service import UserService
+from app.dependencies import get_db, get_async_db, get_current_user_record
+from app.services.project_service import ProjectService, AsyncProjectService, PROJECT_DETAIL_LOAD
+from app.thumbnails import create_project_thumbnails
 from app.schemas import (
     ProjectCreateSimple,
     ProjectUpdate, 
@@ -18,13 +19,26 @@ from app.schemas import (
     PaginatedResponse,
     FavoriteToggle,
     FavoriteResponse,
-    ErrorResponse
+    ErrorResponse,
+    CurrentUser
 )
 
 
 router = APIRouter()
 
 
+def _parse_attribute_filters(values: Optional[List[str]], require_value: bool) -> Dict[str, Optional[str]]:
+    """Parse repeated `key:value` (or bare `key` when values are optional) query parameters"""
+    filters: Dict[str, Optional[str]] = {}
+    for item in values or []:
+        key, separator, value = item.partition(":")
+        key, value = key.strip(), value.strip()
+        if not key or (require_value and not separator):
+            raise ValueError(f"Invalid filter '{item}', expected key:value")
+        filters[key] = value if separator else None
+    return filters
+
+
 @router.get("/ping")
 def ping():
     return {"message": "Projects module is alive!"}
@@ -32,21 +46,13 @@ def ping():
 
 
 @router.post("/", response_model=ProjectResponse, status_code=status.HTTP_201_CREATED)
-async def create_project(
+def create_project(
     project_data: ProjectCreateSimple,
     db: Session = Depends(get_db),
-    current_user: dict = Depends(get_current_user_jwt)
+    user: CurrentUser = Depends(get_current_user_record)
 ):
     """Create a new project with auto-generated name"""
     try:
-        user_service = UserService(db)
-        user = user_service.get_user_by_id(UUID(current_user["id"]))
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User not found"
-            )
-        
         project_service = ProjectService(db)
         project = project_service.create_project_simple(
             user_id=user.id,
@@ -72,19 +78,15 @@ async def list_projects(
     sort_order: str = Query("desc", description="Sort order (asc/desc)"),
     page: int = Query(1, ge=1, description="Page number"),
     page_size: int = Query(20, ge=1, le=100, description="Page size"),
-    db: Session = Depends(get_db),
-    current_user: dict = Depends(get_current_user_jwt)
+    spec: Optional[List[str]] = Query(None, description="Bike specification filter field:value, repeatable (e.g. bike_category:Cruiser)"),
+    custom_field: Optional[List[str]] = Query(None, description="Custom field filter key or key:value, repeatable"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page (keyset pagination)"),
+    include_total: bool = Query(True, description="Include the total count (skip for cheaper cursor pages)"),
+    db: AsyncSession = Depends(get_async_db),
+    user: CurrentUser = Depends(get_current_user_record)
 ):
     """Get paginated list of projects for the authenticated user with search and filters"""
     try:
-        user_service = UserService(db)
-        user = user_service.get_user_by_id(UUID(current_user["id"]))
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User not found"
-            )
-        
         # Create search parameters
         search_params = ProjectSearchParams(
             search_key=search_key,
@@ -94,16 +96,27 @@ async def list_projects(
             sort_by=sort_by,
             sort_order=sort_order,
             page=page,
-            page_size=page_size
+            page_size=page_size,
+            spec_filters=_parse_attribute_filters(spec, require_value=True),
+            custom_field_filters=_parse_attribute_filters(custom_field, require_value=False),
+            cursor=cursor,
+            include_total=include_total
         )
         
-        project_service = ProjectService(db)
-        result = project_service.get_user_projects(
+        project_service = AsyncProjectService(db)
+        result = await project_service.get_user_projects(
             user_id=user.id,
             search_params=search_params
         )
         
         return result
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -112,25 +125,18 @@ async def list_projects(
 
 
 @router.get("/{project_id}", response_model=ProjectResponse)
-async def get_project(
+def get_project(
     project_id: UUID,
     db: Session = Depends(get_db),
-    current_user: dict = Depends(get_current_user_jwt)
+    user: CurrentUser = Depends(get_current_user_record)
 ):
     """Get a specific project by ID"""
     try:
-        user_service = UserService(db)
-        user = user_service.get_user_by_id(UUID(current_user["id"]))
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User not found"
-            )
-        
         project_service = ProjectService(db)
         project = project_service.get_project_by_id(
             project_id=project_id,
-            user_id=user.id
+            user_id=user.id,
+            load_profile=PROJECT_DETAIL_LOAD
         )
         
         if not project:
@@ -151,22 +157,15 @@ async def get_project(
 
 
 @router.put("/{project_id}", response_model=ProjectResponse)
-async def update_project(
+def update_project(
     project_id: UUID,
     project_data: ProjectUpdate,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
-    current_user: dict = Depends(get_current_user_jwt)
+    user: CurrentUser = Depends(get_current_user_record)
 ):
     """Update an existing project"""
     try:
-        user_service = UserService(db)
-        user = user_service.get_user_by_id(UUID(current_user["id"]))
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User not found"
-            )
-        
         project_service = ProjectService(db)
         project = project_service.update_project(
             project_id=project_id,
@@ -180,6 +179,10 @@ async def update_project(
                 detail="Project not found"
             )
         
+        # A new image drops the old thumbnails; render them after the response is sent
+        if project.image_key and not project.thumbnail_keys:
+            background_tasks.add_task(create_project_thumbnails, project.id, project.image_key)
+        
         # Convert SQLAlchemy model to Pydantic schema
         return ProjectResponse.model_validate(project)
     except HTTPException:
@@ -192,22 +195,15 @@ async def update_project(
 
 
 @router.put("/{project_id}/image", response_model=ProjectResponse)
-async def update_project_image(
+def update_project_image(
     project_id: UUID,
     image_data: dict,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
-    current_user: dict = Depends(get_current_user_jwt)
+    user: CurrentUser = Depends(get_current_user_record)
 ):
     """Update project with generated image"""
     try:
-        user_service = UserService(db)
-        user = user_service.get_user_by_id(UUID(current_user["id"]))
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User not found"
-            )
-        
         if "image_base64" not in image_data:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -227,6 +223,10 @@ async def update_project_image(
                 detail="Project not found"
             )
         
+        # Render listing thumbnails for the new image after the response is sent
+        if project.image_key and not project.thumbnail_keys:
+            background_tasks.add_task(create_project_thumbnails, project.id, project.image_key)
+        
         # Convert SQLAlchemy model to Pydantic schema
         return ProjectResponse.model_validate(project)
     except HTTPException:
@@ -239,22 +239,14 @@ async def update_project_image(
 
 
 @router.put("/{project_id}/conversation", response_model=ProjectResponse)
-async def update_conversation_history(
+def update_conversation_history(
     project_id: UUID,
     conversation_data: dict,
     db: Session = Depends(get_db),
-    current_user: dict = Depends(get_current_user_jwt)
+    user: CurrentUser = Depends(get_current_user_record)
 ):
     """Update project conversation history"""
     try:
-        user_service = UserService(db)
-        user = user_service.get_user_by_id(UUID(current_user["id"]))
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User not found"
-            )
-        
         if "conversation_history" not in conversation_data:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -286,23 +278,15 @@ async def update_conversation_history(
 
 
 @router.delete("/{project_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_project(
+def delete_project(
     project_id: UUID,
     db: Session = Depends(get_db),
-    current_user: dict = Depends(get_current_user_jwt),
+    user: CurrentUser = Depends(get_current_user_record),
     x_soft_delete: bool = Header(True, description="Whether to perform soft deletion"),
     x_abandoned: bool = Header(False, description="Whether the project was abandoned")
 ):
     """Delete a project. By default uses soft deletion by setting status to ARCHIVED."""
     try:
-        user_service = UserService(db)
-        user = user_service.get_user_by_id(UUID(current_user["id"]))
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User not found"
-            )
-        
         project_service = ProjectService(db)
         success = project_service.delete_project(
             project_id=project_id,
@@ -333,21 +317,13 @@ async def delete_project(
 
 
 @router.post("/{project_id}/favorite", response_model=FavoriteResponse)
-async def toggle_favorite(
+def toggle_favorite(
     project_id: UUID,
     db: Session = Depends(get_db),
-    current_user: dict = Depends(get_current_user_jwt)
+    user: CurrentUser = Depends(get_current_user_record)
 ):
     """Toggle favorite status for a project"""
     try:
-        user_service = UserService(db)
-        user = user_service.get_user_by_id(UUID(current_user["id"]))
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User not found"
-            )
-        
         project_service = ProjectService(db)
         result = project_service.toggle_favorite(
             user_id=user.id,
@@ -368,21 +344,13 @@ async def toggle_favorite(
 
 @router.get("/categories/list")
 async def get_project_categories(
-    db: Session = Depends(get_db),
-    current_user: dict = Depends(get_current_user_jwt)
+    db: AsyncSession = Depends(get_async_db),
+    user: CurrentUser = Depends(get_current_user_record)
 ):
     """Get unique project categories for the authenticated user"""
     try:
-        user_service = UserService(db)
-        user = user_service.get_user_by_id(UUID(current_user["id"]))
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User not found"
-            )
-        
-        project_service = ProjectService(db)
-        categories = project_service.get_project_categories(user_id=user.id)
+        project_service = AsyncProjectService(db)
+        categories = await project_service.get_project_categories(user_id=user.id)
         
         return {"categories": categories}
     except Exception as e:
@@ -392,23 +360,34 @@ async def get_project_categories(
         )
 
 
+@router.get("/facets/summary")
+async def get_project_facets(
+    search_key: Optional[str] = Query(None, description="Restrict counts to projects matching this search term"),
+    db: AsyncSession = Depends(get_async_db),
+    user: CurrentUser = Depends(get_current_user_record)
+):
+    """Get dashboard filter counts (per project type, per status and favorites) in one query"""
+    try:
+        project_service = AsyncProjectService(db)
+        return await project_service.get_project_facets(user_id=user.id, search_key=search_key)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+
 @router.get("/stats/summary")
 async def get_project_stats(
-    db: Session = Depends(get_db),
-    current_user: dict = Depends(get_current_user_jwt)
+    db: AsyncSession = Depends(get_async_db),
+    user: CurrentUser = Depends(get_current_user_record)
 ):
     """Get project statistics for the authenticated user"""
     try:
-        user_service = UserService(db)
-        user = user_service.get_user_by_id(UUID(current_user["id"]))
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User not found"
-            )
-        
-        project_service = ProjectService(db)
-        stats = project_service.get_project_stats(user_id=user.id)
+        project_service = AsyncProjectService(db)
+        stats = await project_service.get_project_stats(user_id=user.id)
         
         return stats
     except Exception as e:
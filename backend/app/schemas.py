@@ -27,7 +27,6 @@ class ProjectBase(BaseModel):
     project_type: str = Field(..., min_length=1, max_length=50, description="Project type (e.g., 'bike', 'car')")
     status: Literal["DRAFT", "IN_PROGRESS", "COMPLETED", "ARCHIVED"] = Field(ProjectStatus.DRAFT, description="Project status")
     configuration: Optional[Dict[str, Any]] = Field(None, description="Project configuration data")
-    image_base64: Optional[str] = Field(None, description="Generated image as base64 string")
     conversation_history: Optional[List[Dict[str, Any]]] = Field(None, description="Chat conversation history")
 
 
@@ -83,13 +82,26 @@ class UserResponse(UserBase):
         return super().model_validate(obj)
 
 
+class CurrentUser(BaseModel):
+    """Authenticated user and quota counters, resolved once per request and cached briefly"""
+    id: UUID
+    email: str
+    full_name: Optional[str] = None
+    avatar_url: Optional[str] = None
+    status: str
+    credits: int = 0
+    completed_projects_count: int = 0
+
+
 class ProjectSearchResponse(BaseModel):
     id: UUID
     name: str
     description: Optional[str]
     project_type: str
     status: str
-    image_base64: Optional[str] = None
+    image_url: Optional[str] = None
+    thumbnail_urls: Dict[str, str] = Field(default_factory=dict, description="Thumbnail URLs by longest side in pixels")
+    image_placeholder: Optional[str] = Field(None, description="Tiny inline image to show while thumbnails load")
     completion_timestamp: Optional[datetime] = None
     progress: Optional[int] = None
     is_favorite: bool = False
@@ -98,7 +110,8 @@ class ProjectSearchResponse(BaseModel):
         from_attributes = True
     
     @classmethod
-    def model_validate(cls, obj):
+    def model_validate(cls, obj, is_favorite: Optional[bool] = None):
+        """Build the listing item; listings pass is_favorite from their join instead of loading favorites"""
         status = getattr(obj, 'status', None)
         status = status.value if hasattr(status, 'value') else status
         
@@ -110,13 +123,15 @@ class ProjectSearchResponse(BaseModel):
         
         progress = None
         if status == 'DRAFT':
-            conversation_history = getattr(obj, 'conversation_history', []) or []
-            if conversation_history:
+            conversation_length = getattr(obj, 'conversation_length', None)
+            if conversation_length is None:
+                conversation_length = len(getattr(obj, 'conversation_history', []) or [])
+            if conversation_length:
                 total_questions = 15
                 if isinstance(configuration, dict):
                     custom_fields = configuration.get('bike_specification', {}).get('custom_fields', {})
                     total_questions += len(custom_fields) if custom_fields else 0
-                progress = min(100, int((len(conversation_history) / total_questions) * 100))
+                progress = min(100, int((conversation_length / total_questions) * 100))
         
         return super().model_validate({
             'id': getattr(obj, 'id', None),
@@ -124,8 +139,10 @@ class ProjectSearchResponse(BaseModel):
             'description': getattr(obj, 'description', None),
             'project_type': project_type,
             'status': status,
-            'image_base64': getattr(obj, 'image_base64', None),
-            'is_favorite': getattr(obj, 'is_favorite', False),
+            'image_url': getattr(obj, 'image_url', None),
+            'thumbnail_urls': getattr(obj, 'thumbnail_urls', None) or {},
+            'image_placeholder': getattr(obj, 'image_placeholder', None),
+            'is_favorite': getattr(obj, 'is_favorite', False) if is_favorite is None else is_favorite,
             'completion_timestamp': completion_timestamp,
             'progress': progress
         })
@@ -134,6 +151,9 @@ class ProjectSearchResponse(BaseModel):
 class ProjectResponse(ProjectBase):
     id: UUID
     user_id: UUID
+    image_url: Optional[str] = None
+    thumbnail_urls: Dict[str, str] = Field(default_factory=dict, description="Thumbnail URLs by longest side in pixels")
+    image_placeholder: Optional[str] = Field(None, description="Tiny inline image to show while thumbnails load")
     created_at: datetime
     updated_at: datetime
     is_favorite: bool = False
@@ -166,10 +186,14 @@ class ProjectSearchParams(BaseModel):
     category: Optional[str] = Field(None, description="Filter by project type/category")
     status: Optional[Literal["DRAFT", "IN_PROGRESS", "COMPLETED", "ARCHIVED"]] = Field(None, description="Filter by project status")
     is_favorite: Optional[bool] = Field(None, description="Filter by favorite status")
-    sort_by: str = Field("created_at", description="Sort field (created_at, name, updated_at)")
+    sort_by: str = Field("created_at", description="Sort field (created_at, name, updated_at, status, relevance)")
     sort_order: str = Field("desc", description="Sort order (asc, desc)")
-    page: int = Field(1, ge=1, description="Page number")
+    page: int = Field(1, ge=1, description="Page number (ignored when a cursor is given)")
     page_size: int = Field(20, ge=1, le=100, description="Page size")
+    spec_filters: Dict[str, str] = Field(default_factory=dict, description="Exact bike specification values by field, e.g. {\"bike_category\": \"Cruiser\"}")
+    custom_field_filters: Dict[str, Optional[str]] = Field(default_factory=dict, description="Custom field keys, with an exact value or None for any value")
+    cursor: Optional[str] = Field(None, description="Opaque next_cursor of the previous page (keyset pagination)")
+    include_total: bool = Field(True, description="Count matching projects; skip for cheaper cursor pages")
     
     @validator('sort_order')
     def validate_sort_order(cls, v):
@@ -179,7 +203,7 @@ class ProjectSearchParams(BaseModel):
     
     @validator('sort_by')
     def validate_sort_by(cls, v):
-        allowed_fields = ['created_at', 'name', 'updated_at', 'status']
+        allowed_fields = ['created_at', 'name', 'updated_at', 'status', 'relevance']
         if v not in allowed_fields:
             raise ValueError(f'sort_by must be one of: {", ".join(allowed_fields)}')
         return v
@@ -188,10 +212,11 @@ class ProjectSearchParams(BaseModel):
 # Pagination response
 class PaginatedResponse(BaseModel, Generic[T]):
     items: List[T]
-    total: int
+    total: Optional[int] = None
     page: int
     page_size: int
-    total_pages: int
+    total_pages: Optional[int] = None
+    next_cursor: Optional[str] = None
 
 class FavoriteToggle(BaseModel):
     project_id: UUID = Field(..., description="Project ID to toggle favorite status")
@@ -3,6 +3,7 @@ from uuid import UUID
 from sqlalchemy.orm import Session
 from ..models import CreditTransaction, ProjectQuota, User, Project
 from ..models import CreditTransactionType, CreditTransactionStatus
+from .user_cache import invalidate_current_user
 
 class CreditTransactionService:
     def __init__(self, db: Session):
@@ -41,6 +42,7 @@ class CreditTransactionService:
         )
         self.db.add(transaction)
         self.db.commit()
+        invalidate_current_user(user.id)
 
         return transaction
 
@@ -73,6 +75,7 @@ class CreditTransactionService:
         )
         self.db.add(transaction)
         self.db.commit()
+        invalidate_current_user(user.id)
 
         return transaction
 
@@ -105,5 +108,6 @@ class CreditTransactionService:
         )
         self.db.add(transaction)
         self.db.commit()
+        invalidate_current_user(user_id)
 
         return transaction
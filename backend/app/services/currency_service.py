@@ -3,6 +3,7 @@ Service for managing currencies and credit packages
 """
 
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from uuid import UUID
 from typing import List, Optional
@@ -87,3 +88,34 @@ class CurrencyService:
             return None
             
         return currency.convert_from_usd(package.base_price_usd)
+
+
+class AsyncCurrencyService:
+    """Async variant of CurrencyService's reads for routes on the asyncpg engine"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_currencies(self, active_only: bool = True) -> List[Currency]:
+        """Get all currencies"""
+        query = select(Currency)
+        if active_only:
+            query = query.where(Currency.is_active == True)
+        return list((await self.db.execute(query)).scalars().all())
+
+    async def get_currency_by_code(self, code: str) -> Optional[Currency]:
+        """Get currency by code"""
+        result = await self.db.execute(select(Currency).where(Currency.code == code.upper()).limit(1))
+        return result.scalars().first()
+
+    async def get_credit_packages(self, active_only: bool = True) -> List[CreditPackage]:
+        """Get all credit packages"""
+        query = select(CreditPackage)
+        if active_only:
+            query = query.where(CreditPackage.is_active == True)
+        return list((await self.db.execute(query)).scalars().all())
+
+    async def get_credit_package(self, package_id: UUID) -> Optional[CreditPackage]:
+        """Get credit package by ID"""
+        result = await self.db.execute(select(CreditPackage).where(CreditPackage.id == package_id).limit(1))
+        return result.scalars().first()
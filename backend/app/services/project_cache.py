@@ -0,0 +1,166 @@
+"""
+Per-user cache for project dashboard reads
+Caches the first listing pages and the stats summary under a per-user version
+number; every project write bumps the version, so stale entries are never read
+and simply expire
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+from uuid import UUID
+
+import redis
+from fastapi.concurrency import run_in_threadpool
+
+from app import metrics
+
+PROJECT_CACHE_TTL = int(os.getenv("PROJECT_CACHE_TTL", "300"))
+PROJECT_CACHE_BACKEND = os.getenv("PROJECT_CACHE", "redis" if os.getenv("REDIS_URL") else "memory")
+
+
+class ProjectCache:
+    """
+    Versioned per-user cache.
+
+    Entries live under project_cache:<user_id>:v<version>:<name>. Writers bump
+    project_cache:<user_id>:version with INCR, which makes every entry of the
+    previous version unreachable. Without Redis the entries are kept in
+    process, which is only correct with a single worker. Redis failures are
+    logged and treated as misses, so reads fall back to Postgres.
+    """
+
+    def __init__(self, redis_client: Optional[redis.Redis] = None, ttl: int = PROJECT_CACHE_TTL):
+        self.redis = redis_client
+        self.ttl = ttl
+        self.key_prefix = "project_cache:"
+        self._lock = threading.Lock()
+        self._versions: Dict[str, int] = {}
+        self._entries: Dict[str, tuple] = {}
+
+    def _version_key(self, user_id: UUID) -> str:
+        return f"{self.key_prefix}{user_id}:version"
+
+    def _entry_key(self, user_id: UUID, version: int, name: str) -> str:
+        return f"{self.key_prefix}{user_id}:v{version}:{name}"
+
+    def get_version(self, user_id: UUID) -> Optional[int]:
+        """Current cache version of a user, or None when the cache is unavailable"""
+        if self.redis is None:
+            with self._lock:
+                return self._versions.get(str(user_id), 0)
+        try:
+            return int(self.redis.get(self._version_key(user_id)) or 0)
+        except Exception as e:
+            print(f"❌ Project cache version read failed: {e}")
+            return None
+
+    def bump(self, user_id: UUID) -> None:
+        """Invalidate every cached entry of a user"""
+        if self.redis is None:
+            with self._lock:
+                key = str(user_id)
+                self._versions[key] = self._versions.get(key, 0) + 1
+                prefix = f"{self.key_prefix}{user_id}:"
+                for entry_key in [entry_key for entry_key in self._entries if entry_key.startswith(prefix)]:
+                    del self._entries[entry_key]
+            return
+        try:
+            with self.redis.pipeline(transaction=True) as pipe:
+                pipe.incr(self._version_key(user_id))
+                pipe.expire(self._version_key(user_id), self.ttl * 2)
+                pipe.execute()
+        except Exception as e:
+            print(f"❌ Project cache invalidation failed: {e}")
+
+    def get(self, user_id: UUID, version: int, name: str) -> Optional[Any]:
+        key = self._entry_key(user_id, version, name)
+        if self.redis is None:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is None or entry[0] < time.monotonic():
+                    return None
+                return entry[1]
+        try:
+            value = self.redis.get(key)
+            return json.loads(value) if value else None
+        except Exception as e:
+            print(f"❌ Project cache read failed: {e}")
+            return None
+
+    def set(self, user_id: UUID, version: int, name: str, value: Any) -> None:
+        key = self._entry_key(user_id, version, name)
+        if self.redis is None:
+            with self._lock:
+                # Drop the write if the user was invalidated while it was computed
+                if self._versions.get(str(user_id), 0) == version:
+                    self._entries[key] = (time.monotonic() + self.ttl, value)
+            return
+        try:
+            with self.redis.pipeline(transaction=True) as pipe:
+                pipe.setex(key, self.ttl, json.dumps(value, separators=(",", ":")))
+                # Every write pushes the version's expiry past the entry's own, so the
+                # counter cannot expire and restart at a number that still has live entries
+                pipe.expire(self._version_key(user_id), self.ttl * 2)
+                pipe.execute()
+        except Exception as e:
+            print(f"❌ Project cache write failed: {e}")
+
+    def get_or_compute(self, user_id: UUID, name: str, compute: Callable[[], Any]) -> Any:
+        """
+        Return the cached JSON-serializable value, computing and storing it on a miss.
+        The version is read before computing, so a write that lands meanwhile
+        leaves the new value under the old, unreachable version.
+        """
+        version = self.get_version(user_id)
+        if version is None:
+            return compute()
+
+        value = self.get(user_id, version, name)
+        if value is not None:
+            metrics.increment("project_cache.hits", entry=name.split(":", 1)[0])
+            return value
+
+        metrics.increment("project_cache.misses", entry=name.split(":", 1)[0])
+        value = compute()
+        self.set(user_id, version, name, value)
+        return value
+
+    async def get_or_compute_async(self, user_id: UUID, name: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """get_or_compute for async callers; Redis calls run in the threadpool"""
+        version = await run_in_threadpool(self.get_version, user_id)
+        if version is None:
+            return await compute()
+
+        value = await run_in_threadpool(self.get, user_id, version, name)
+        if value is not None:
+            metrics.increment("project_cache.hits", entry=name.split(":", 1)[0])
+            return value
+
+        metrics.increment("project_cache.misses", entry=name.split(":", 1)[0])
+        value = await compute()
+        await run_in_threadpool(self.set, user_id, version, name, value)
+        return value
+
+
+def create_project_cache(backend: str = PROJECT_CACHE_BACKEND) -> Optional[ProjectCache]:
+    """
+    Create the project cache
+
+    Args:
+        backend: "redis" (uses REDIS_URL), "memory" (single worker only) or "off"
+
+    Returns:
+        ProjectCache instance, or None when caching is off
+    """
+    if backend == "off":
+        return None
+    if backend == "redis":
+        redis_client = redis.Redis.from_url(os.getenv("REDIS_URL"), decode_responses=True)
+        return ProjectCache(redis_client)
+    return ProjectCache()
+
+
+project_cache = create_project_cache()
@@ -3,36 +3,39 @@ Service for managing project quotas
 """
 
 from sqlalchemy.orm import Session
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects.postgresql import insert
+from typing import Optional
 from uuid import UUID
 
 from ..models import ProjectQuota, Project
 from ..schemas import ProjectQuotaCreate
+from .user_cache import invalidate_current_user
 
 class ProjectQuotaService:
     def __init__(self, db: Session):
         self.db = db
 
-    def get_user_quota(self, user_id: UUID) -> ProjectQuota:
-        """Get or create user's project quota"""
-        quota = self.db.query(ProjectQuota).filter(ProjectQuota.user_id == user_id).first()
-        if not quota:
-            quota = ProjectQuota(user_id=user_id, completed_projects_count=0)
-            self.db.add(quota)
-            try:
-                self.db.commit()
-                self.db.refresh(quota)
-            except IntegrityError:
-                self.db.rollback()
-                # In case of race condition, try to get again
-                quota = self.db.query(ProjectQuota).filter(ProjectQuota.user_id == user_id).first()
-        
-        return quota
+    def get_user_quota(self, user_id: UUID) -> Optional[ProjectQuota]:
+        """Get user's project quota (read-only, None if the user has none)"""
+        return self.db.query(ProjectQuota).filter(ProjectQuota.user_id == user_id).first()
+
+    def ensure_user_quota(self, user_id: UUID) -> ProjectQuota:
+        """
+        Create the user's project quota if missing and return it.
+        The upsert is idempotent under concurrency and joins the caller's
+        transaction; the caller commits.
+        """
+        self.db.execute(
+            insert(ProjectQuota)
+            .values(user_id=user_id, completed_projects_count=0, credits=0)
+            .on_conflict_do_nothing(index_elements=[ProjectQuota.user_id])
+        )
+        return self.get_user_quota(user_id)
 
     def increment_completed_projects(self, user_id: UUID, project_id: UUID = None) -> ProjectQuota:
         """Increment completed projects count and log credit deduction if applicable"""
         try:
-            quota = self.get_user_quota(user_id)
+            quota = self.ensure_user_quota(user_id)
             
             # First use credits if available
             if quota.credits > 0:
@@ -59,6 +62,7 @@ class ProjectQuotaService:
                 quota.completed_projects_count += 1
                 
             self.db.commit()
+            invalidate_current_user(user_id)
             self.db.refresh(quota)
             return quota
             
@@ -69,7 +73,7 @@ class ProjectQuotaService:
     def can_create_project(self, user_id: UUID) -> bool:
         """Check if user can create a new project"""
         quota = self.get_user_quota(user_id)
-        return quota.has_free_projects
+        return quota is not None and quota.has_free_projects
 
     def add_credits(self, user_id: UUID, amount: int, package_id: UUID = None, description: str = None) -> ProjectQuota:
         """Add credits to user's quota and log the transaction"""
@@ -96,9 +100,10 @@ class ProjectQuotaService:
                 )
             else:
                 # If no project exists yet, just update the quota directly
-                quota = self.get_user_quota(user_id)
+                quota = self.ensure_user_quota(user_id)
                 quota.add_credits(amount)
                 self.db.commit()
+                invalidate_current_user(user_id)
                 self.db.refresh(quota)
 
             return self.get_user_quota(user_id)
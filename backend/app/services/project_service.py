@@ -3,22 +3,288 @@ Project service layer for business logic
 """
 
 from typing import List, Optional, Dict, Any
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, desc, asc, func
+from sqlalchemy.orm import Session, load_only, raiseload, undefer
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, or_, desc, asc, func, tuple_, cast, text, select
+from sqlalchemy.dialects.postgresql import JSONPATH
+from datetime import datetime
 from uuid import UUID
+import base64
 import json
 
-from ..models import Project, User, UserFavorite, ProjectStatus
+from ..models import Project, User, UserFavorite, ProjectStatus, PROJECT_SEARCH_CONFIG
+from ..blob_store import put_image, put_thumbnails
+from ..bike.models import BikeSpecification
 from .credit_transaction_service import CreditTransactionService
+from .project_cache import project_cache
 from ..schemas import ProjectCreate, ProjectCreateSimple, ProjectUpdate, ProjectSearchParams, PaginatedResponse, ProjectSearchResponse
 
 
+# Load profiles: the columns each kind of read fetches. The legacy image and the
+# conversation history are deferred on the model, so mutation paths skip them by default.
+PROJECT_LISTING_LOAD = (
+    load_only(
+        Project.id, Project.name, Project.description, Project.project_type, Project.status,
+        Project.configuration, Project.image_key, Project.thumbnail_keys, Project.image_placeholder,
+        Project.has_legacy_image, Project.conversation_length, Project.created_at, Project.updated_at
+    ),
+    raiseload(Project.favorites),  # is_favorite comes from the listing's join; loading favorites is a bug
+)
+PROJECT_DETAIL_LOAD = (
+    undefer(Project.conversation_history),
+)
+PROJECT_MUTATION_LOAD = ()
+
+
+def encode_project_cursor(sort_by: str, sort_order: str, sort_value: Any, project_id: UUID) -> str:
+    """Opaque keyset cursor: the sort column value and id of the last row on a page"""
+    if isinstance(sort_value, datetime):
+        sort_value = sort_value.isoformat()
+    elif isinstance(sort_value, ProjectStatus):
+        sort_value = sort_value.value
+    payload = json.dumps({"s": sort_by, "o": sort_order, "v": sort_value, "id": str(project_id)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_project_cursor(cursor: str, sort_by: str, sort_order: str) -> tuple:
+    """Decode a keyset cursor into (sort value, project id); raises ValueError when invalid"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        issued_for = (payload["s"], payload["o"])
+        sort_value = payload["v"]
+        if sort_by in ("created_at", "updated_at"):
+            sort_value = datetime.fromisoformat(sort_value)
+        elif sort_by == "status":
+            sort_value = ProjectStatus(sort_value)
+        project_id = UUID(payload["id"])
+    except (KeyError, TypeError, ValueError):
+        raise ValueError("Invalid cursor")
+    if issued_for != (sort_by, sort_order):
+        raise ValueError("Cursor was issued for a different sort order")
+    return sort_value, project_id
+
+
+def project_search(search_key: str) -> tuple:
+    """
+    Search criterion and relevance score for a search term.
+    Ranked full-text search matches whole words via the GIN-indexed search_vector;
+    the trigram-indexed ILIKE catches partial words and substrings the parser splits differently.
+    """
+    text_query = func.websearch_to_tsquery(PROJECT_SEARCH_CONFIG, search_key)
+    search_term = f"%{search_key}%"
+    criterion = or_(
+        Project.search_vector.op("@@")(text_query),
+        Project.name.ilike(search_term),
+        Project.description.ilike(search_term)
+    )
+    rank = func.ts_rank_cd(Project.search_vector, text_query) + func.similarity(Project.name, search_key)
+    return criterion, rank
+
+
+# Bike specification fields that can be filtered on (custom fields are filtered by key)
+SPEC_FILTER_FIELDS = [name for name in BikeSpecification.model_fields if name != "custom_fields"]
+
+
+def project_spec_filters(spec_filters: Dict[str, str], custom_field_filters: Dict[str, Optional[str]]) -> list:
+    """
+    Criteria over configuration.bike_specification, all served by the jsonb_path_ops
+    GIN index: exact values become one containment (@>) test, key-only custom
+    field filters become jsonpath existence (@?) tests. Raises ValueError for unknown fields.
+    """
+    unknown_fields = [field for field in spec_filters if field not in SPEC_FILTER_FIELDS]
+    if unknown_fields:
+        raise ValueError(f"Unknown specification fields: {', '.join(unknown_fields)}")
+
+    specification: Dict[str, Any] = dict(spec_filters)
+    custom_values = {key: value for key, value in custom_field_filters.items() if value is not None}
+    if custom_values:
+        specification["custom_fields"] = custom_values
+
+    criteria = []
+    if specification:
+        criteria.append(Project.configuration.contains({"bike_specification": specification}))
+    for key, value in custom_field_filters.items():
+        if value is None:
+            path = f"$.bike_specification.custom_fields.{json.dumps(key)}"
+            criteria.append(Project.configuration.op("@?")(cast(path, JSONPATH)))
+    return criteria
+
+
+def user_projects_statements(user_id: UUID, search_params: ProjectSearchParams) -> tuple:
+    """
+    Statements for one listing page: (effective sort, count statement or None, page statement).
+    The page statement fetches one extra row to tell whether there is a next page.
+    Raises ValueError for an invalid cursor or filter.
+    """
+    sort_by = search_params.sort_by
+    if sort_by == "relevance" and not search_params.search_key:
+        sort_by = "created_at"
+    if sort_by == "relevance" and search_params.cursor:
+        raise ValueError("Cursor pagination is not available when sorting by relevance")
+    cursor = decode_project_cursor(search_params.cursor, sort_by, search_params.sort_order) if search_params.cursor else None
+
+    criteria = [Project.user_id == user_id, Project.status != ProjectStatus.ARCHIVED]
+    search_rank = None
+
+    if search_params.search_key:
+        search_criterion, search_rank = project_search(search_params.search_key)
+        criteria.append(search_criterion)
+
+    if search_params.category:
+        criteria.append(Project.project_type == search_params.category)
+
+    criteria.extend(project_spec_filters(search_params.spec_filters, search_params.custom_field_filters))
+
+    if search_params.status:
+        criteria.append(Project.status == search_params.status)
+
+    if search_params.is_favorite is not None:
+        favorited_projects = select(UserFavorite.project_id).where(UserFavorite.user_id == user_id)
+        criteria.append(Project.id.in_(favorited_projects) if search_params.is_favorite else ~Project.id.in_(favorited_projects))
+
+    count_statement = select(func.count(Project.id)).where(*criteria) if search_params.include_total else None
+
+    sort_field = {
+        "name": Project.name,
+        "updated_at": Project.updated_at,
+        "status": Project.status,
+        "relevance": search_rank
+    }.get(sort_by, Project.created_at)
+
+    # Order by (sort column, id) so the keyset is unique and matches the composite indexes
+    order = asc if search_params.sort_order == "asc" else desc
+    statement = select(Project, UserFavorite.id.isnot(None).label('is_favorite')).options(*PROJECT_LISTING_LOAD).outerjoin(
+        UserFavorite, and_(UserFavorite.project_id == Project.id, UserFavorite.user_id == user_id)
+    ).where(*criteria).order_by(order(sort_field), order(Project.id))
+
+    if cursor:
+        sort_value, last_id = cursor
+        keyset = tuple_(sort_field, Project.id)
+        bound = tuple_(sort_value, last_id)
+        statement = statement.where(keyset > bound if search_params.sort_order == "asc" else keyset < bound)
+    else:
+        statement = statement.offset((search_params.page - 1) * search_params.page_size)
+
+    return sort_by, count_statement, statement.limit(search_params.page_size + 1)
+
+
+def user_projects_page(search_params: ProjectSearchParams, sort_by: str, rows: list, total: Optional[int]) -> PaginatedResponse[ProjectSearchResponse]:
+    """Build the listing response from the rows of user_projects_statements"""
+    has_more = len(rows) > search_params.page_size
+    rows = rows[:search_params.page_size]
+
+    next_cursor = None
+    if has_more and sort_by != "relevance":
+        last_project = rows[-1][0]
+        next_cursor = encode_project_cursor(
+            sort_by,
+            search_params.sort_order,
+            getattr(last_project, sort_by),
+            last_project.id
+        )
+
+    project_schemas = [
+        ProjectSearchResponse.model_validate(project, is_favorite=bool(is_favorite))
+        for project, is_favorite in rows
+    ]
+
+    return PaginatedResponse(
+        items=project_schemas,
+        total=total,
+        page=search_params.page,
+        page_size=search_params.page_size,
+        total_pages=(total + search_params.page_size - 1) // search_params.page_size if total is not None else None,
+        next_cursor=next_cursor
+    )
+
+
+def user_projects_cache_name(search_params: ProjectSearchParams) -> Optional[str]:
+    """Cache entry name for the first pages of the dashboard views, or None when the page is not cached"""
+    if (search_params.search_key or search_params.cursor or search_params.page != 1
+            or search_params.spec_filters or search_params.custom_field_filters):
+        return None
+    return "listing:" + ":".join(str(value) for value in (
+        search_params.category,
+        search_params.status,
+        search_params.is_favorite,
+        search_params.sort_by,
+        search_params.sort_order,
+        search_params.page_size,
+        search_params.include_total
+    ))
+
+
+def project_categories_statement(user_id: UUID):
+    return select(Project.project_type).where(Project.user_id == user_id).distinct()
+
+
+def project_facets_statement(user_id: UUID, search_key: Optional[str]):
+    """
+    One round trip: GROUPING SETS yields per-type rows, per-status rows and a grand total row;
+    grouping() tells them apart (1 = type row, 2 = status row, 3 = total row)
+    """
+    grouping_level = func.grouping(Project.project_type, Project.status)
+    statement = select(
+        grouping_level,
+        Project.project_type,
+        Project.status,
+        func.count(Project.id),
+        func.count(UserFavorite.id)
+    ).outerjoin(
+        UserFavorite, and_(UserFavorite.project_id == Project.id, UserFavorite.user_id == user_id)
+    ).where(
+        Project.user_id == user_id,
+        Project.status != ProjectStatus.ARCHIVED
+    )
+
+    if search_key:
+        search_criterion, _ = project_search(search_key)
+        statement = statement.where(search_criterion)
+
+    return statement.group_by(func.grouping_sets(Project.project_type, Project.status, text("()")))
+
+
+def project_facets_from_rows(rows: list) -> Dict[str, Any]:
+    facets = {"total": 0, "favorites": 0, "project_types": {}, "statuses": {}}
+    for level, project_type, project_status, count, favorites in rows:
+        if level == 1:
+            facets["project_types"][project_type] = count
+        elif level == 2:
+            facets["statuses"][project_status.value if project_status else None] = count
+        else:
+            facets["total"] = count
+            facets["favorites"] = favorites
+    return facets
+
+
+def project_stats_statements(user_id: UUID) -> tuple:
+    """Statements for (total projects, projects by status, total favorites)"""
+    return (
+        select(func.count(Project.id)).where(Project.user_id == user_id),
+        select(Project.status, func.count(Project.id)).where(Project.user_id == user_id).group_by(Project.status),
+        select(func.count(UserFavorite.id)).where(UserFavorite.user_id == user_id)
+    )
+
+
+def project_stats_result(total_projects: Optional[int], projects_by_status: list, total_favorites: Optional[int]) -> Dict[str, Any]:
+    return {
+        "total_projects": total_projects or 0,
+        "total_favorites": total_favorites or 0,
+        "by_status": {status.value if status else None: count for status, count in projects_by_status}
+    }
+
+
 class ProjectService:
     """Service class for project operations"""
     
     def __init__(self, db: Session):
         self.db = db
     
+    def _invalidate_user_cache(self, user_id: UUID) -> None:
+        """Bump the user's project cache version after a committed write"""
+        if project_cache is not None:
+            project_cache.bump(user_id)
+    
     def _generate_project_name(self, user_id: UUID, project_type: str) -> str:
         """Generate an auto-incremented project name like 'Untitled (1)', 'Untitled (2)'"""
         try:
@@ -49,13 +315,13 @@ class ProjectService:
                 project_type=project_data.project_type,
                 status=ProjectStatus.DRAFT,
                 configuration={},
-                image_base64=None,
                 conversation_history=[]
             )
             
             self.db.add(project)
             self.db.commit()
             self.db.refresh(project)
+            self._invalidate_user_cache(user_id)
             
             return project
         except Exception as e:
@@ -72,13 +338,15 @@ class ProjectService:
                 project_type=project_data.project_type,
                 status=project_data.status,
                 configuration=project_data.configuration,
-                image_base64=project_data.image_base64,
                 conversation_history=project_data.conversation_history or []
             )
+            if project_data.image_base64:
+                project.set_image(*put_image(base64.b64decode(project_data.image_base64)))
             
             self.db.add(project)
             self.db.commit()
             self.db.refresh(project)
+            self._invalidate_user_cache(user_id)
             
             return project
         except Exception as e:
@@ -110,10 +378,11 @@ class ProjectService:
                 )
 
                 try:
-                    # Attempt image generation (update image)
-                    project.image_base64 = image_base64
+                    # Store the image bytes in the blob store
+                    project.set_image(*put_image(base64.b64decode(image_base64)))
                     self.db.commit()
                     self.db.refresh(project)
+                    self._invalidate_user_cache(user_id)
                     return project
 
                 except Exception as image_error:
@@ -134,6 +403,21 @@ class ProjectService:
             self.db.rollback()
             raise Exception(f"Failed to update project image: {str(e)}")
     
+    def set_project_thumbnails(self, project_id: UUID, image_key: str, rendered: Dict[str, Any]) -> bool:
+        """Attach rendered thumbnails if the project still shows the image they were rendered from"""
+        try:
+            project = self.db.query(Project).filter(Project.id == project_id).first()
+            if not project or project.image_key != image_key:
+                return False
+            
+            project.set_thumbnails(put_thumbnails(rendered["thumbnails"]), rendered["placeholder"])
+            self.db.commit()
+            self._invalidate_user_cache(project.user_id)
+            return True
+        except Exception as e:
+            self.db.rollback()
+            raise Exception(f"Failed to save project thumbnails: {str(e)}")
+    
     def update_conversation_history(self, project_id: UUID, user_id: UUID, conversation_history: List[Dict[str, Any]]) -> Optional[Project]:
         """Update project conversation history"""
         try:
@@ -144,6 +428,7 @@ class ProjectService:
             project.conversation_history = conversation_history
             self.db.commit()
             self.db.refresh(project)
+            self._invalidate_user_cache(user_id)
             
             return project
         except Exception as e:
@@ -152,64 +437,48 @@ class ProjectService:
 
 
     
-    def get_project_by_id(self, project_id: UUID, user_id: UUID) -> Optional[Project]:
-        """Get a project by ID for a specific user"""
-        return self.db.query(Project).filter(
+    def get_project_by_id(self, project_id: UUID, user_id: UUID, load_profile: tuple = PROJECT_MUTATION_LOAD) -> Optional[Project]:
+        """Get a project by ID for a specific user, loading the columns of the given load profile"""
+        return self.db.query(Project).options(*load_profile).filter(
             and_(
                 Project.id == project_id,
                 Project.user_id == user_id
             )
         ).first()
     
+    def user_owns_project(self, project_id: UUID, user_id: UUID) -> bool:
+        """Ownership check that reads only the primary key"""
+        return self.db.query(Project.id).filter(
+            and_(
+                Project.id == project_id,
+                Project.user_id == user_id
+            )
+        ).first() is not None
+    
     def get_user_projects(self, user_id: UUID, search_params: ProjectSearchParams) -> PaginatedResponse[ProjectSearchResponse]:
+        """
+        List a user's projects. Pages by offset, or by keyset when search_params.cursor
+        is set; every page with more rows after it carries a next_cursor.
+        Raises ValueError for an invalid cursor.
+        """
+        cache_name = user_projects_cache_name(search_params)
+        if project_cache is None or cache_name is None:
+            return self._query_user_projects(user_id, search_params)
+        
+        # First pages of the dashboard views are served from the per-user cache
+        data = project_cache.get_or_compute(
+            user_id,
+            cache_name,
+            lambda: self._query_user_projects(user_id, search_params).model_dump(mode="json")
+        )
+        return PaginatedResponse[ProjectSearchResponse].model_validate(data)
+    
+    def _query_user_projects(self, user_id: UUID, search_params: ProjectSearchParams) -> PaginatedResponse[ProjectSearchResponse]:
+        sort_by, count_statement, statement = user_projects_statements(user_id, search_params)
         try:
-            query = self.db.query(Project, UserFavorite.id.isnot(None).label('is_favorite')).outerjoin(
-                UserFavorite, and_(UserFavorite.project_id == Project.id, UserFavorite.user_id == user_id)
-            ).filter(
-                Project.user_id == user_id,
-                Project.status != ProjectStatus.ARCHIVED
-            )
-
-            if search_params.search_key:
-                search_term = f"%{search_params.search_key}%"
-                query = query.filter(or_(Project.name.ilike(search_term), Project.description.ilike(search_term)))
-
-            if search_params.category:
-                query = query.filter(Project.project_type == search_params.category)
-
-            if search_params.status:
-                query = query.filter(Project.status == search_params.status)
-
-            if search_params.is_favorite is not None:
-                favorited_projects = self.db.query(UserFavorite.project_id).filter(UserFavorite.user_id == user_id).subquery()
-                query = query.filter(Project.id.in_(favorited_projects) if search_params.is_favorite else ~Project.id.in_(favorited_projects))
-
-            total = query.count()
-
-            sort_field = {
-                "name": Project.name,
-                "updated_at": Project.updated_at,
-                "status": Project.status
-            }.get(search_params.sort_by, Project.created_at)
-
-            query = query.order_by(asc(sort_field) if search_params.sort_order == "asc" else desc(sort_field))
-
-            offset = (search_params.page - 1) * search_params.page_size
-            results = query.offset(offset).limit(search_params.page_size).all()
-
-            project_schemas = [
-                ProjectSearchResponse.model_validate(project).copy(update={'is_favorite': bool(is_favorite)})
-                for project, is_favorite in results
-            ]
-
-            return PaginatedResponse(
-                items=project_schemas,
-                total=total,
-                page=search_params.page,
-                page_size=search_params.page_size,
-                total_pages=(total + search_params.page_size - 1) // search_params.page_size
-            )
-            
+            total = self.db.execute(count_statement).scalar() if count_statement is not None else None
+            rows = self.db.execute(statement).all()
+            return user_projects_page(search_params, sort_by, rows, total)
         except Exception as e:
             raise Exception(f"Failed to get user projects: {str(e)}")
     
@@ -230,6 +499,12 @@ class ProjectService:
             
             # Update only provided fields
             update_data = project_data.dict(exclude_unset=True)
+            if 'image_base64' in update_data:
+                image_base64 = update_data.pop('image_base64')
+                if image_base64:
+                    project.set_image(*put_image(base64.b64decode(image_base64)))
+                else:
+                    project.set_image(None)
             for field, value in update_data.items():
                 setattr(project, field, value)
             
@@ -243,6 +518,7 @@ class ProjectService:
             
             self.db.commit()
             self.db.refresh(project)
+            self._invalidate_user_cache(user_id)
             
             return project
         except Exception as e:
@@ -265,6 +541,7 @@ class ProjectService:
             else:
                 self.db.delete(project)
                 self.db.commit()
+            self._invalidate_user_cache(user_id)
             
             return True
         except Exception as e:
@@ -275,8 +552,7 @@ class ProjectService:
         """Toggle favorite status for a project"""
         try:
             # Check if project exists and belongs to user
-            project = self.get_project_by_id(project_id, user_id)
-            if not project:
+            if not self.user_owns_project(project_id, user_id):
                 raise Exception("Project not found")
             
             # Check if already favorited
@@ -307,6 +583,7 @@ class ProjectService:
                 created_at = new_favorite.created_at
             
             self.db.commit()
+            self._invalidate_user_cache(user_id)
             
             return {
                 "project_id": project_id,
@@ -322,37 +599,107 @@ class ProjectService:
     def get_project_categories(self, user_id: UUID) -> List[str]:
         """Get unique project categories for a user"""
         try:
-            categories = self.db.query(Project.project_type).filter(
-                Project.user_id == user_id
-            ).distinct().all()
+            categories = self.db.execute(project_categories_statement(user_id)).all()
             
             return [category[0] for category in categories]
         except Exception as e:
             raise Exception(f"Failed to get project categories: {str(e)}")
     
+    def get_project_facets(self, user_id: UUID, search_key: Optional[str] = None) -> Dict[str, Any]:
+        """Filter counts for the dashboard: per project type, per status and favorites"""
+        if project_cache is None or search_key:
+            return self._query_project_facets(user_id, search_key)
+        return project_cache.get_or_compute(user_id, "facets", lambda: self._query_project_facets(user_id, None))
+    
+    def _query_project_facets(self, user_id: UUID, search_key: Optional[str]) -> Dict[str, Any]:
+        try:
+            rows = self.db.execute(project_facets_statement(user_id, search_key)).all()
+            return project_facets_from_rows(rows)
+        except Exception as e:
+            raise Exception(f"Failed to get project facets: {str(e)}")
+    
     def get_project_stats(self, user_id: UUID) -> Dict[str, Any]:
         """Get project statistics for a user"""
+        if project_cache is None:
+            return self._query_project_stats(user_id)
+        return project_cache.get_or_compute(user_id, "stats", lambda: self._query_project_stats(user_id))
+    
+    def _query_project_stats(self, user_id: UUID) -> Dict[str, Any]:
         try:
-            total_projects = self.db.query(func.count(Project.id)).filter(
-                Project.user_id == user_id
-            ).scalar()
-            
-            projects_by_status = self.db.query(
-                Project.status,
-                func.count(Project.id)
-            ).filter(
-                Project.user_id == user_id
-            ).group_by(Project.status).all()
-            
-            total_favorites = self.db.query(func.count(UserFavorite.id)).filter(
-                UserFavorite.user_id == user_id
-            ).scalar()
-            
-            return {
-                "total_projects": total_projects or 0,
-                "total_favorites": total_favorites or 0,
-                "by_status": {status: count for status, count in projects_by_status}
-            }
-            
+            total_statement, by_status_statement, favorites_statement = project_stats_statements(user_id)
+            return project_stats_result(
+                self.db.execute(total_statement).scalar(),
+                self.db.execute(by_status_statement).all(),
+                self.db.execute(favorites_statement).scalar()
+            )
+        except Exception as e:
+            raise Exception(f"Failed to get project stats: {str(e)}")
+
+
+class AsyncProjectService:
+    """
+    Async variant of ProjectService's read paths for routes on the asyncpg engine.
+    Runs the same statements as ProjectService, so both return identical results.
+    """
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def get_user_projects(self, user_id: UUID, search_params: ProjectSearchParams) -> PaginatedResponse[ProjectSearchResponse]:
+        """List a user's projects (see ProjectService.get_user_projects)"""
+        cache_name = user_projects_cache_name(search_params)
+        if project_cache is None or cache_name is None:
+            return await self._query_user_projects(user_id, search_params)
+        
+        async def compute():
+            return (await self._query_user_projects(user_id, search_params)).model_dump(mode="json")
+        
+        data = await project_cache.get_or_compute_async(user_id, cache_name, compute)
+        return PaginatedResponse[ProjectSearchResponse].model_validate(data)
+    
+    async def _query_user_projects(self, user_id: UUID, search_params: ProjectSearchParams) -> PaginatedResponse[ProjectSearchResponse]:
+        sort_by, count_statement, statement = user_projects_statements(user_id, search_params)
+        try:
+            total = (await self.db.execute(count_statement)).scalar() if count_statement is not None else None
+            rows = (await self.db.execute(statement)).all()
+            return user_projects_page(search_params, sort_by, rows, total)
+        except Exception as e:
+            raise Exception(f"Failed to get user projects: {str(e)}")
+    
+    async def get_project_categories(self, user_id: UUID) -> List[str]:
+        """Get unique project categories for a user"""
+        try:
+            categories = (await self.db.execute(project_categories_statement(user_id))).all()
+            return [category[0] for category in categories]
+        except Exception as e:
+            raise Exception(f"Failed to get project categories: {str(e)}")
+    
+    async def get_project_facets(self, user_id: UUID, search_key: Optional[str] = None) -> Dict[str, Any]:
+        """Filter counts for the dashboard: per project type, per status and favorites"""
+        if project_cache is None or search_key:
+            return await self._query_project_facets(user_id, search_key)
+        return await project_cache.get_or_compute_async(user_id, "facets", lambda: self._query_project_facets(user_id, None))
+    
+    async def _query_project_facets(self, user_id: UUID, search_key: Optional[str]) -> Dict[str, Any]:
+        try:
+            rows = (await self.db.execute(project_facets_statement(user_id, search_key))).all()
+            return project_facets_from_rows(rows)
+        except Exception as e:
+            raise Exception(f"Failed to get project facets: {str(e)}")
+    
+    async def get_project_stats(self, user_id: UUID) -> Dict[str, Any]:
+        """Get project statistics for a user"""
+        if project_cache is None:
+            return await self._query_project_stats(user_id)
+        return await project_cache.get_or_compute_async(user_id, "stats", lambda: self._query_project_stats(user_id))
+    
+    async def _query_project_stats(self, user_id: UUID) -> Dict[str, Any]:
+        try:
+            total_statement, by_status_statement, favorites_statement = project_stats_statements(user_id)
+            return project_stats_result(
+                (await self.db.execute(total_statement)).scalar(),
+                (await self.db.execute(by_status_statement)).all(),
+                (await self.db.execute(favorites_statement)).scalar()
+            )
         except Exception as e:
             raise Exception(f"Failed to get project stats: {str(e)}")
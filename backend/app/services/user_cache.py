@@ -0,0 +1,139 @@
+"""
+Short-lived cache of the authenticated user and quota
+Lets warm requests resolve the current user without touching Postgres; user
+and credit writes invalidate the entry, everything else waits for the TTL
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+from uuid import UUID
+
+import redis
+
+from app import metrics
+
+CURRENT_USER_CACHE_TTL = int(os.getenv("CURRENT_USER_CACHE_TTL", "60"))
+CURRENT_USER_LOCAL_TTL = float(os.getenv("CURRENT_USER_LOCAL_TTL", "5"))
+CURRENT_USER_CACHE_BACKEND = os.getenv("CURRENT_USER_CACHE", "redis" if os.getenv("REDIS_URL") else "memory")
+
+
+class CurrentUserCache:
+    """
+    Two-tier cache keyed by user id.
+
+    The in-process tier answers repeated requests of the same user without a
+    network hop; with Redis it keeps entries for CURRENT_USER_LOCAL_TTL only,
+    because invalidations reach the local tier of this process alone. Redis
+    holds entries under current_user:<user_id> for CURRENT_USER_CACHE_TTL.
+    Redis failures are logged and treated as misses.
+    """
+
+    def __init__(
+        self,
+        redis_client: Optional[redis.Redis] = None,
+        ttl: int = CURRENT_USER_CACHE_TTL,
+        local_ttl: float = CURRENT_USER_LOCAL_TTL,
+        max_local_entries: int = 10000
+    ):
+        self.redis = redis_client
+        self.ttl = ttl
+        # Without Redis the local tier is the only tier
+        self.local_ttl = local_ttl if redis_client is not None else ttl
+        self.max_local_entries = max_local_entries
+        self.key_prefix = "current_user:"
+        self._lock = threading.Lock()
+        self._entries: Dict[str, tuple] = {}
+
+    def _key(self, user_id: UUID) -> str:
+        return f"{self.key_prefix}{user_id}"
+
+    def _get_local(self, user_id: UUID) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(str(user_id))
+            if entry is None or entry[0] < time.monotonic():
+                return None
+            return entry[1]
+
+    def _set_local(self, user_id: UUID, value: Dict[str, Any]) -> None:
+        with self._lock:
+            if len(self._entries) >= self.max_local_entries:
+                self._entries.clear()
+            self._entries[str(user_id)] = (time.monotonic() + self.local_ttl, value)
+
+    def get(self, user_id: UUID) -> Optional[Dict[str, Any]]:
+        value = self._get_local(user_id)
+        if value is not None or self.redis is None:
+            return value
+        try:
+            raw = self.redis.get(self._key(user_id))
+        except Exception as e:
+            print(f"❌ Current user cache read failed: {e}")
+            return None
+        if not raw:
+            return None
+        value = json.loads(raw)
+        self._set_local(user_id, value)
+        return value
+
+    def set(self, user_id: UUID, value: Dict[str, Any]) -> None:
+        self._set_local(user_id, value)
+        if self.redis is None:
+            return
+        try:
+            self.redis.setex(self._key(user_id), self.ttl, json.dumps(value, separators=(",", ":")))
+        except Exception as e:
+            print(f"❌ Current user cache write failed: {e}")
+
+    def invalidate(self, user_id: UUID) -> None:
+        """Drop the cached entry of a user after a write to the user or the quota"""
+        with self._lock:
+            self._entries.pop(str(user_id), None)
+        if self.redis is None:
+            return
+        try:
+            self.redis.delete(self._key(user_id))
+        except Exception as e:
+            print(f"❌ Current user cache invalidation failed: {e}")
+
+    def get_or_load(self, user_id: UUID, load: Callable[[], Optional[Dict[str, Any]]]) -> Optional[Dict[str, Any]]:
+        """Return the cached entry, loading and storing it on a miss; missing users are not cached"""
+        value = self.get(user_id)
+        if value is not None:
+            metrics.increment("current_user_cache.hits")
+            return value
+
+        metrics.increment("current_user_cache.misses")
+        value = load()
+        if value is not None:
+            self.set(user_id, value)
+        return value
+
+
+def create_current_user_cache(backend: str = CURRENT_USER_CACHE_BACKEND) -> Optional[CurrentUserCache]:
+    """
+    Create the current user cache
+
+    Args:
+        backend: "redis" (uses REDIS_URL), "memory" (single worker only) or "off"
+
+    Returns:
+        CurrentUserCache instance, or None when caching is off
+    """
+    if backend == "off":
+        return None
+    if backend == "redis":
+        redis_client = redis.Redis.from_url(os.getenv("REDIS_URL"), decode_responses=True)
+        return CurrentUserCache(redis_client)
+    return CurrentUserCache()
+
+
+current_user_cache = create_current_user_cache()
+
+
+def invalidate_current_user(user_id: Optional[UUID]) -> None:
+    """Invalidate the cached current user, if caching is on"""
+    if current_user_cache is not None and user_id is not None:
+        current_user_cache.invalidate(user_id)
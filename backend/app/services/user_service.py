@@ -2,15 +2,113 @@
 User service layer for business logic
 """
 
-from typing import Optional, Dict, Any, List
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, desc, asc
+from typing import Optional, Dict, Any, List, Tuple
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import and_, or_, desc, asc, select, func, literal, literal_column
+from sqlalchemy.dialects.postgresql import insert
 from uuid import UUID
 import json
 
-from ..models import User, UserStatus
+from ..models import User, UserStatus, ProjectQuota, Project
+from ..models import CreditTransaction, CreditTransactionType, CreditTransactionStatus
 from .project_quota_service import ProjectQuotaService
-from ..schemas import UserCreate, UserUpdate, UserResponse
+from .user_cache import invalidate_current_user
+from ..schemas import CurrentUser, UserCreate, UserUpdate, UserResponse
+
+
+INITIAL_FREE_CREDITS = 2
+
+
+def google_sign_in_statement(user_data: UserCreate):
+    """
+    Sign a Google user in with one statement, returning (User, created).
+
+    - Upserts the user on email; an existing user keeps its google_id if it has one.
+    - Upserts the quota; a user at zero credits gets the initial free credits,
+      exactly as every sign-in did before.
+    - Records the grant as a recharge transaction when the user has a project
+      to attach it to (the transaction table requires one).
+
+    All three run as data-modifying CTEs, so the caller only has to commit.
+    """
+    users = User.__table__
+    user_insert = insert(users).values(
+        email=user_data.email,
+        full_name=user_data.full_name,
+        avatar_url=user_data.avatar_url,
+        google_id=user_data.google_id,
+        status=UserStatus.ACTIVE
+    )
+    signed_in_user = (
+        user_insert
+        .on_conflict_do_update(
+            index_elements=[users.c.email],
+            set_={"google_id": func.coalesce(users.c.google_id, user_insert.excluded.google_id)}
+        )
+        # xmax is 0 only on a freshly inserted row version
+        .returning(*users.c, literal_column("(xmax = 0)").label("created"))
+        .cte("signed_in_user")
+    )
+
+    quotas = ProjectQuota.__table__
+    granted_quota = (
+        insert(quotas)
+        .from_select(
+            ["user_id", "completed_projects_count", "credits"],
+            select(signed_in_user.c.id, literal(0), literal(INITIAL_FREE_CREDITS))
+        )
+        .on_conflict_do_update(
+            index_elements=[quotas.c.user_id],
+            set_={"credits": quotas.c.credits + INITIAL_FREE_CREDITS},
+            where=quotas.c.credits == 0
+        )
+        # Only inserted or updated rows come back, i.e. users who got the grant
+        .returning(quotas.c.user_id)
+        .cte("granted_quota")
+    )
+
+    transactions = CreditTransaction.__table__
+    initial_credit_transaction = (
+        insert(transactions)
+        .from_select(
+            ["user_id", "project_id", "amount", "type", "status", "description"],
+            select(
+                granted_quota.c.user_id,
+                Project.id,
+                literal(INITIAL_FREE_CREDITS),
+                literal(CreditTransactionType.RECHARGE, transactions.c.type.type),
+                literal(CreditTransactionStatus.SUCCESS, transactions.c.status.type),
+                literal("Initial free credits")
+            )
+            .join(Project, Project.user_id == granted_quota.c.user_id)
+            .limit(1)
+        )
+        .cte("initial_credit_transaction")
+    )
+
+    return (
+        select(aliased(User, signed_in_user), signed_in_user.c.created)
+        .add_cte(granted_quota)
+        .add_cte(initial_credit_transaction)
+        .execution_options(populate_existing=True)
+    )
+
+
+def current_user_statement(user_id: UUID):
+    """User columns and quota counters in one round trip; quota columns are NULL without a quota row"""
+    return (
+        select(
+            User.id,
+            User.email,
+            User.full_name,
+            User.avatar_url,
+            User.status,
+            ProjectQuota.credits,
+            ProjectQuota.completed_projects_count
+        )
+        .outerjoin(ProjectQuota, ProjectQuota.user_id == User.id)
+        .where(User.id == user_id)
+    )
 
 
 class UserService:
@@ -29,12 +127,22 @@ class UserService:
     
     def get_user_by_id(self, user_id: UUID) -> Optional[User]:
         """Get user by ID"""
-        user = self.db.query(User).filter(User.id == user_id).first()
-        if user:
-            # Load project quota
-            quota_service = ProjectQuotaService(self.db)
-            quota_service.get_user_quota(user_id)  # This will create if not exists
-        return user
+        return self.db.query(User).filter(User.id == user_id).first()
+    
+    def get_current_user(self, user_id: UUID) -> Optional[CurrentUser]:
+        """Get the user and quota snapshot used to authorize a request, without creating anything"""
+        row = self.db.execute(current_user_statement(user_id)).first()
+        if row is None:
+            return None
+        return CurrentUser(
+            id=row.id,
+            email=row.email,
+            full_name=row.full_name,
+            avatar_url=row.avatar_url,
+            status=row.status.value if row.status else UserStatus.ACTIVE.value,
+            credits=row.credits or 0,
+            completed_projects_count=row.completed_projects_count or 0
+        )
     
     def create_user(self, user_data: UserCreate) -> User:
         """Create a new user"""
@@ -48,17 +156,18 @@ class UserService:
             )
             
             self.db.add(user)
-            self.db.commit()
-            self.db.refresh(user)
+            self.db.flush()
 
-            # Initialize project quota with free credits
+            # Every user gets a quota row at signup, in the same transaction
             quota_service = ProjectQuotaService(self.db)
-            quota = quota_service.get_user_quota(user.id)
+            quota_service.ensure_user_quota(user.id)
+            self.db.commit()
+            self.db.refresh(user)
 
-            # Add initial free credits (2) as a recharge transaction
+            # Add initial free credits as a recharge transaction
             quota_service.add_credits(
                 user_id=user.id,
-                amount=2,  # Initial free credits
+                amount=INITIAL_FREE_CREDITS,
                 description="Initial free credits"
             )
             
@@ -67,40 +176,26 @@ class UserService:
             self.db.rollback()
             raise Exception(f"Failed to create user: {str(e)}")
     
-    def create_or_get_user(self, user_data: UserCreate) -> User:
+    def create_or_get_user(self, user_data: UserCreate) -> Tuple[User, bool]:
         """
         Create a new user if they don't exist, otherwise return existing user
-        This is used during OAuth signin
+        This is used during OAuth signin; the user, quota and initial credit
+        grant are written in one statement and one transaction
+
+        Returns:
+            The user and whether it was created by this call
         """
         try:
-            # Check if user exists by email
-            existing_user = self.get_user_by_email(user_data.email)
-            if existing_user:
-                # Update Google ID if not set
-                if user_data.google_id and not existing_user.google_id:
-                    existing_user.google_id = user_data.google_id
-                    self.db.commit()
-                    self.db.refresh(existing_user)
-
-                # Check if user has a project quota
-                quota_service = ProjectQuotaService(self.db)
-                quota = quota_service.get_user_quota(existing_user.id)
-
-                # If no credits, add initial free credits
-                if quota.credits == 0:
-                    quota_service.add_credits(
-                        user_id=existing_user.id,
-                        amount=2,  # Initial free credits
-                        description="Initial free credits"
-                    )
-
-                return existing_user
-            
-            # Create new user if not found
-            new_user = self.create_user(user_data)
-            return new_user
-            
+            user, created = self.db.execute(google_sign_in_statement(user_data)).one()
+            # RETURNING loaded every column; detach so the commit does not expire
+            # them and reading the user afterwards costs no refresh query
+            self.db.expunge(user)
+            self.db.commit()
+            # The sign-in may have granted credits
+            invalidate_current_user(user.id)
+            return user, created
         except Exception as e:
+            self.db.rollback()
             raise Exception(f"Failed to create or get user: {str(e)}")
     
     def update_user(self, user_id: UUID, user_data: UserUpdate) -> Optional[User]:
@@ -116,6 +211,7 @@ class UserService:
                 setattr(user, field, value)
             
             self.db.commit()
+            invalidate_current_user(user.id)
             self.db.refresh(user)
             
             return user
@@ -132,6 +228,7 @@ class UserService:
             
             user.status = UserStatus.INACTIVE
             self.db.commit()
+            invalidate_current_user(user.id)
             
             return True
         except Exception as e:
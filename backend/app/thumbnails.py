@@ -0,0 +1,100 @@
+"""
+Thumbnails and placeholders for generated images
+Renders WebP thumbnails and a tiny inline placeholder in a process pool so
+image decoding and encoding never block the event loop; listings reference
+the thumbnails instead of shipping full images
+"""
+
+import asyncio
+import base64
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+from uuid import UUID
+
+from fastapi.concurrency import run_in_threadpool
+from PIL import Image
+
+from app import metrics
+from app.blob_store import blob_store
+
+THUMBNAIL_SIZES = [int(size) for size in os.getenv("THUMBNAIL_SIZES", "256,640").split(",") if size.strip()]
+THUMBNAIL_QUALITY = int(os.getenv("THUMBNAIL_QUALITY", "80"))
+THUMBNAIL_WORKERS = int(os.getenv("THUMBNAIL_WORKERS", "2"))
+
+# Longest side of the inline placeholder; ~200-400 bytes as a data URI
+PLACEHOLDER_SIZE = 16
+PLACEHOLDER_QUALITY = 30
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def _encode_webp(image: Image.Image, max_side: int, quality: int) -> bytes:
+    resized = image.copy()
+    resized.thumbnail((max_side, max_side), Image.LANCZOS)
+    buffer = io.BytesIO()
+    resized.save(buffer, "WEBP", quality=quality, method=4)
+    return buffer.getvalue()
+
+
+def render_thumbnails(data: bytes, sizes: List[int] = THUMBNAIL_SIZES) -> Dict[str, object]:
+    """
+    Render WebP thumbnails (longest side = each size) and a placeholder data URI.
+    Runs in worker processes, so it must stay a picklable module-level function.
+
+    Returns:
+        {"thumbnails": {"<size>": bytes, ...}, "placeholder": "data:image/webp;base64,..."}
+    """
+    with Image.open(io.BytesIO(data)) as source:
+        image = source.convert("RGBA" if "A" in source.getbands() else "RGB")
+    thumbnails = {str(size): _encode_webp(image, size, THUMBNAIL_QUALITY) for size in sizes}
+    placeholder = _encode_webp(image, PLACEHOLDER_SIZE, PLACEHOLDER_QUALITY)
+    return {
+        "thumbnails": thumbnails,
+        "placeholder": "data:image/webp;base64," + base64.b64encode(placeholder).decode("ascii")
+    }
+
+
+def get_thumbnail_executor() -> ProcessPoolExecutor:
+    """Process pool shared by thumbnail rendering, created on first use"""
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=THUMBNAIL_WORKERS)
+    return _executor
+
+
+def shutdown_thumbnail_executor() -> None:
+    """Stop the thumbnail process pool"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True, cancel_futures=True)
+        _executor = None
+
+
+async def render_thumbnails_async(data: bytes) -> Dict[str, object]:
+    """Render thumbnails in the process pool without blocking the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_thumbnail_executor(), render_thumbnails, data)
+
+
+def _save_project_thumbnails(project_id: UUID, image_key: str, rendered: Dict[str, object]) -> bool:
+    from app.dependencies import session_scope
+    from app.services.project_service import ProjectService
+
+    with session_scope() as db:
+        return ProjectService(db).set_project_thumbnails(project_id, image_key, rendered)
+
+
+async def create_project_thumbnails(project_id: UUID, image_key: str) -> bool:
+    """
+    Post-generation step: render and attach thumbnails for a project's image.
+    Returns False when the image is missing or was replaced in the meantime.
+    """
+    data = await run_in_threadpool(blob_store.get, image_key)
+    if not data:
+        return False
+    rendered = await render_thumbnails_async(data)
+    saved = await run_in_threadpool(_save_project_thumbnails, project_id, image_key, rendered)
+    metrics.increment("thumbnails.rendered", status="saved" if saved else "stale")
+    return saved
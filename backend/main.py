@@ -1,3 +1,6 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -6,13 +9,40 @@ CORS_ORIGINS = ["*"]
 API_TITLE = "Build Yourself API"
 API_DESCRIPTION = "API for building your customs"
 API_VERSION = "0.1.0"
+EVENT_LOOP_LAG_INTERVAL = float(os.getenv("EVENT_LOOP_LAG_INTERVAL", "0.1"))
+
+@asynccontextmanager
+async def _lifespan(app: FastAPI):
+    """Create process-wide clients on startup and release them on shutdown"""
+    try:
+        from app.bike.utils import init_async_openai_client, close_async_openai_client
+        from app.bike.api import image_job_workers
+        from app.thumbnails import shutdown_thumbnail_executor
+        from app.dependencies import async_engine
+    except ImportError:
+        yield
+        return
+
+    from app import metrics
+    lag_monitor = asyncio.create_task(metrics.monitor_event_loop_lag(EVENT_LOOP_LAG_INTERVAL))
+    await init_async_openai_client()
+    await image_job_workers.start()
+    try:
+        yield
+    finally:
+        await image_job_workers.stop()
+        shutdown_thumbnail_executor()
+        await close_async_openai_client()
+        await async_engine.dispose()
+        lag_monitor.cancel()
 
 def _create_app():
     """Create and configure FastAPI application"""
     app = FastAPI(
         title=API_TITLE,
         description=API_DESCRIPTION,
-        version=API_VERSION
+        version=API_VERSION,
+        lifespan=_lifespan
     )
     
     app.add_middleware(
@@ -100,6 +130,34 @@ def health_check():
         "timestamp": "2024-01-01T00:00:00Z"
     }
 
+def _register_metrics(app: FastAPI):
+    """Expose /metrics to admins only; without the auth dependencies it is not exposed at all"""
+    try:
+        from fastapi import Depends
+        from app.dependencies import require_admin
+    except ImportError as e:
+        print(f"Metrics endpoint disabled, admin auth unavailable: {e}")
+        return
+
+    @app.get("/metrics", dependencies=[Depends(require_admin)])
+    def get_metrics():
+        """In-process application metrics (counters and value summaries)"""
+        from app import metrics
+        snapshot = metrics.snapshot()
+        try:
+            from app.bike.utils import prompt_cache_stats
+            snapshot["prompt_cache"] = prompt_cache_stats()
+        except ImportError:
+            pass
+        try:
+            from app.dependencies import database_pool_stats
+            snapshot["db_pool"] = database_pool_stats()
+        except ImportError:
+            pass
+        return snapshot
+
+_register_metrics(app)
+
 @app.get("/health/detailed")
 async def detailed_health_check():
     """Detailed health check for all services"""
@@ -0,0 +1,29 @@
+"""add project image blob reference
+
+Revision ID: 007
+Revises: 006
+Create Date: 2024-04-02 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '007'
+down_revision = '006'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    # Images move to the content-addressed blob store; the row keeps only the key, size and dimensions.
+    # Existing image_base64 values are moved out by scripts/migrate_images_to_blob_store.py
+    op.add_column('projects', sa.Column('image_key', sa.String(64), nullable=True))
+    op.add_column('projects', sa.Column('image_size', sa.Integer, nullable=True))
+    op.add_column('projects', sa.Column('image_width', sa.Integer, nullable=True))
+    op.add_column('projects', sa.Column('image_height', sa.Integer, nullable=True))
+
+def downgrade() -> None:
+    op.drop_column('projects', 'image_height')
+    op.drop_column('projects', 'image_width')
+    op.drop_column('projects', 'image_size')
+    op.drop_column('projects', 'image_key')
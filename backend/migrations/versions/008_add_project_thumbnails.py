@@ -0,0 +1,26 @@
+"""add project thumbnails
+
+Revision ID: 008
+Revises: 007
+Create Date: 2024-04-09 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '008'
+down_revision = '007'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    # Listings reference WebP thumbnails in the blob store instead of the full image.
+    # Existing images are processed by scripts/backfill_thumbnails.py
+    op.add_column('projects', sa.Column('thumbnail_keys', postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+    op.add_column('projects', sa.Column('image_placeholder', sa.Text, nullable=True))
+
+def downgrade() -> None:
+    op.drop_column('projects', 'image_placeholder')
+    op.drop_column('projects', 'thumbnail_keys')
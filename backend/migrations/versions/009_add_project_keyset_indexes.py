@@ -0,0 +1,34 @@
+"""add project keyset pagination indexes
+
+Revision ID: 009
+Revises: 008
+Create Date: 2024-04-16 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '009'
+down_revision = '008'
+branch_labels = None
+depends_on = None
+
+# Listings order by (sort column, id) within one user; each index serves one sort key
+KEYSET_INDEXES = {
+    'idx_projects_user_created_at': ['user_id', 'created_at', 'id'],
+    'idx_projects_user_updated_at': ['user_id', 'updated_at', 'id'],
+    'idx_projects_user_name': ['user_id', 'name', 'id'],
+    'idx_projects_user_status_created_at': ['user_id', 'status', 'created_at', 'id'],
+}
+
+def upgrade() -> None:
+    # Build concurrently so existing listings keep working while the indexes are created
+    with op.get_context().autocommit_block():
+        for name, columns in KEYSET_INDEXES.items():
+            op.create_index(name, 'projects', columns, unique=False, postgresql_concurrently=True, if_not_exists=True)
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name in KEYSET_INDEXES:
+            op.drop_index(name, table_name='projects', postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,44 @@
+"""add project search indexes
+
+Revision ID: 010
+Revises: 009
+Create Date: 2024-04-23 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '010'
+down_revision = '009'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    # Ranked full-text search over name and description; must match Project.search_vector
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute("""
+        ALTER TABLE projects ADD COLUMN search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('english', coalesce(name, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(description, '')), 'B')
+        ) STORED
+    """)
+
+    with op.get_context().autocommit_block():
+        op.create_index('idx_projects_search_vector', 'projects', ['search_vector'], unique=False,
+                        postgresql_using='gin', postgresql_concurrently=True, if_not_exists=True)
+        # Trigram indexes serve ILIKE '%term%' substring matches
+        op.create_index('idx_projects_name_trgm', 'projects', ['name'], unique=False,
+                        postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'},
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('idx_projects_description_trgm', 'projects', ['description'], unique=False,
+                        postgresql_using='gin', postgresql_ops={'description': 'gin_trgm_ops'},
+                        postgresql_concurrently=True, if_not_exists=True)
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('idx_projects_description_trgm', table_name='projects', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('idx_projects_name_trgm', table_name='projects', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('idx_projects_search_vector', table_name='projects', postgresql_concurrently=True, if_exists=True)
+    op.drop_column('projects', 'search_vector')
@@ -0,0 +1,33 @@
+"""index project configuration for specification filters
+
+Revision ID: 011
+Revises: 010
+Create Date: 2024-04-30 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '011'
+down_revision = '010'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    # Specification filters query configuration with @> and @?, which jsonb_path_ops serves
+    # with a smaller index than the default operator class. Nothing queries
+    # conversation_history, so its GIN index only slowed down every chat turn.
+    with op.get_context().autocommit_block():
+        op.create_index('idx_projects_configuration', 'projects', ['configuration'], unique=False,
+                        postgresql_using='gin', postgresql_ops={'configuration': 'jsonb_path_ops'},
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.drop_index('idx_projects_conversation_history', table_name='projects',
+                      postgresql_concurrently=True, if_exists=True)
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index('idx_projects_conversation_history', 'projects', ['conversation_history'], unique=False,
+                        postgresql_using='gin', postgresql_concurrently=True, if_not_exists=True)
+        op.drop_index('idx_projects_configuration', table_name='projects',
+                      postgresql_concurrently=True, if_exists=True)
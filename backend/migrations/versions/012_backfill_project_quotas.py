@@ -0,0 +1,30 @@
+"""backfill project quotas for users without one
+
+Revision ID: 012
+Revises: 011
+Create Date: 2024-05-07 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '012'
+down_revision = '011'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    # Quota rows are now created at signup; reads no longer create them on demand.
+    # Give every existing user without one the row the read path used to insert.
+    op.execute("""
+        INSERT INTO project_quotas (user_id, completed_projects_count, credits)
+        SELECT u.id, 0, 0
+        FROM users u
+        WHERE NOT EXISTS (SELECT 1 FROM project_quotas q WHERE q.user_id = u.id)
+        ON CONFLICT (user_id) DO NOTHING;
+    """)
+
+def downgrade() -> None:
+    # Backfilled rows are indistinguishable from ones created on read; keep them
+    pass
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Render listing thumbnails and placeholders for projects that have an image but none yet
+
+Legacy images still in projects.image_base64 are skipped; move them first with
+scripts/migrate_images_to_blob_store.py
+
+Usage:
+    python scripts/backfill_thumbnails.py [--batch-size 20] [--workers 4] [--dry-run]
+"""
+
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.blob_store import blob_store, put_thumbnails
+from app.dependencies import SessionLocal
+from app.models import Project
+from app.thumbnails import THUMBNAIL_WORKERS, render_thumbnails
+
+
+def backfill_thumbnails(batch_size: int, workers: int, dry_run: bool) -> int:
+    """Render thumbnails in batches; returns the number of projects processed"""
+    processed = 0
+    last_id = None
+    db = SessionLocal()
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            while True:
+                query = db.query(Project).filter(
+                    Project.image_key.isnot(None),
+                    Project.thumbnail_keys.is_(None)
+                )
+                if last_id is not None:
+                    query = query.filter(Project.id > last_id)
+                projects = query.order_by(Project.id).limit(batch_size).all()
+                if not projects:
+                    break
+                last_id = projects[-1].id
+
+                if dry_run:
+                    processed += len(projects)
+                    print(f"✅ {processed} projects found so far")
+                    db.expunge_all()
+                    continue
+
+                images = [(project, blob_store.get(project.image_key)) for project in projects]
+                images = [(project, data) for project, data in images if data]
+                renders = executor.map(render_thumbnails, [data for _, data in images])
+                for (project, _), rendered in zip(images, renders):
+                    project.set_thumbnails(put_thumbnails(rendered["thumbnails"]), rendered["placeholder"])
+                    processed += 1
+
+                db.commit()
+                print(f"✅ {processed} projects processed so far")
+                db.expunge_all()
+    finally:
+        db.close()
+    return processed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render thumbnails for existing project images")
+    parser.add_argument("--batch-size", type=int, default=20, help="Projects per transaction")
+    parser.add_argument("--workers", type=int, default=THUMBNAIL_WORKERS, help="Rendering processes")
+    parser.add_argument("--dry-run", action="store_true", help="Count projects without rendering")
+    args = parser.parse_args()
+
+    processed = backfill_thumbnails(args.batch_size, args.workers, args.dry_run)
+    print(f"🎉 Done: {processed} projects {'to process' if args.dry_run else 'processed'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Measure request latency and event loop lag of a running API under concurrent load
+
+Run it against a build before and after a change and compare the reports;
+the lag figures come from event_loop.lag_seconds in /metrics, sampled only
+while the load runs
+
+Usage:
+    python scripts/benchmark_event_loop_lag.py --token <jwt> [--base-url http://localhost:8000]
+        [--path /projects/] [--concurrency 50] [--requests 1000]
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+LAG_SUMMARY = "event_loop.lag_seconds"
+
+
+async def lag_summary(client: httpx.AsyncClient) -> dict:
+    response = await client.get("/metrics")
+    response.raise_for_status()
+    return response.json()["summaries"].get(LAG_SUMMARY, {"count": 0, "sum": 0.0, "max": 0.0})
+
+
+async def run_load(client: httpx.AsyncClient, path: str, concurrency: int, total: int) -> tuple:
+    """Send total requests with at most concurrency in flight; returns (latencies, errors)"""
+    latencies = []
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one_request():
+        nonlocal errors
+        async with semaphore:
+            started_at = time.perf_counter()
+            try:
+                response = await client.get(path)
+                if response.status_code >= 400:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - started_at)
+
+    await asyncio.gather(*(one_request() for _ in range(total)))
+    return latencies, errors
+
+
+def percentile(values: list, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+async def main(args) -> None:
+    headers = {"Authorization": f"Bearer {args.token}"}
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, headers=headers, limits=limits, timeout=60) as client:
+        before = await lag_summary(client)
+        started_at = time.perf_counter()
+        latencies, errors = await run_load(client, args.path, args.concurrency, args.requests)
+        elapsed = time.perf_counter() - started_at
+        after = await lag_summary(client)
+
+    samples = after["count"] - before["count"]
+    print(f"📊 {args.requests} x GET {args.path} at concurrency {args.concurrency} in {elapsed:.2f}s")
+    print(f"   throughput: {args.requests / elapsed:.1f} req/s, errors: {errors}")
+    print(
+        f"   latency p50/p95/p99: {statistics.median(latencies) * 1000:.1f} / "
+        f"{percentile(latencies, 0.95) * 1000:.1f} / {percentile(latencies, 0.99) * 1000:.1f} ms"
+    )
+    if samples > 0:
+        # max is process-lifetime, so it is only meaningful on a fresh server
+        print(
+            f"   event loop lag: avg {(after['sum'] - before['sum']) / samples * 1000:.1f} ms "
+            f"over {samples} samples, max {after['max'] * 1000:.1f} ms"
+        )
+    else:
+        print("   event loop lag: no samples (is the lag monitor running?)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark request latency and event loop lag")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--token", required=True, help="Bearer token of a test user")
+    parser.add_argument("--path", default="/projects/")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=1000)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Move project images from the legacy projects.image_base64 column into the blob store
+
+Usage:
+    python scripts/migrate_images_to_blob_store.py [--batch-size 50] [--dry-run]
+"""
+
+import argparse
+import base64
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.dependencies import SessionLocal
+from app.blob_store import put_image
+from app.models import Project
+
+
+def migrate_images(batch_size: int, dry_run: bool) -> int:
+    """Move legacy images in batches; returns the number of projects migrated"""
+    migrated = 0
+    last_id = None
+    db = SessionLocal()
+    try:
+        while True:
+            query = db.query(Project).filter(
+                Project.image_base64_legacy.isnot(None),
+                Project.image_key.is_(None)
+            )
+            if last_id is not None:
+                query = query.filter(Project.id > last_id)
+            projects = query.order_by(Project.id).limit(batch_size).all()
+            if not projects:
+                break
+
+            for project in projects:
+                last_id = project.id
+                try:
+                    data = base64.b64decode(project.image_base64_legacy)
+                except Exception as e:
+                    print(f"❌ Project {project.id}: invalid base64 image ({e}), skipped")
+                    continue
+                if not dry_run:
+                    project.set_image(*put_image(data))
+                migrated += 1
+
+            if dry_run:
+                db.rollback()
+            else:
+                db.commit()
+            print(f"✅ {migrated} project images {'found' if dry_run else 'migrated'} so far")
+            db.expunge_all()
+    finally:
+        db.close()
+    return migrated
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move project images into the blob store")
+    parser.add_argument("--batch-size", type=int, default=50, help="Projects per transaction")
+    parser.add_argument("--dry-run", action="store_true", help="Count images without moving them")
+    args = parser.parse_args()
+
+    migrated = migrate_images(args.batch_size, args.dry_run)
+    print(f"🎉 Done: {migrated} project images {'to migrate' if args.dry_run else 'migrated'}")
+
+
+if __name__ == "__main__":
+    main()
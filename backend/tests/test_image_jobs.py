@@ -0,0 +1,105 @@
+"""
+Image job pool tests: a timed-out job is compensated once, and never after
+its handler kept the result or already compensated it; success follow-ups
+run after the job succeeded, outside the job timeout
+"""
+
+import asyncio
+import threading
+import time
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.bike.image_jobs import (
+    JOB_FAILED, JOB_SETTLED_COMPENSATED, JOB_SETTLED_KEPT, JOB_SUCCEEDED,
+    ImageJobWorkerPool, InMemoryImageJobQueue, new_job
+)
+
+
+class Credits:
+    """Counts refunds, like _refund_image_credit_for_project would issue them"""
+
+    def __init__(self):
+        self.refunds = 0
+        self._lock = threading.Lock()
+
+    def refund(self) -> None:
+        with self._lock:
+            self.refunds += 1
+
+    async def on_abandoned(self, job: dict) -> None:
+        await run_in_threadpool(self.refund)
+
+
+def run_job(handler, on_succeeded=None, job_timeout: float = 0.05) -> tuple:
+    queue = InMemoryImageJobQueue()
+    credits = Credits()
+    pool = ImageJobWorkerPool(
+        queue, lambda job: handler(queue, credits, job),
+        on_abandoned=credits.on_abandoned, on_succeeded=on_succeeded, job_timeout=job_timeout
+    )
+    job = new_job("project")
+    queue.enqueue(job)
+
+    async def main():
+        await pool._run(queue.dequeue(0))
+        await pool.stop()
+        # Let threads the timeout left running finish
+        await asyncio.sleep(0.2)
+
+    asyncio.run(main())
+    return queue.get(job["job_id"]), credits
+
+
+def slow_thread_step(queue, job, outcome, action=None) -> None:
+    if queue.settle(job["job_id"], outcome):
+        time.sleep(0.1)
+        if action is not None:
+            action()
+
+
+def test_timeout_while_generating_refunds_once():
+    async def handler(queue, credits, job):
+        await asyncio.sleep(1)
+
+    job, credits = run_job(handler)
+    assert job["status"] == JOB_FAILED
+    assert job["settled"] == JOB_SETTLED_COMPENSATED
+    assert credits.refunds == 1
+
+
+def test_timeout_after_the_image_was_kept_does_not_refund():
+    async def handler(queue, credits, job):
+        # The save is still committing in its thread when the timeout fires
+        await run_in_threadpool(slow_thread_step, queue, job, JOB_SETTLED_KEPT)
+
+    job, credits = run_job(handler)
+    assert job["settled"] == JOB_SETTLED_KEPT
+    assert credits.refunds == 0
+
+
+def test_timeout_during_the_handler_refund_does_not_refund_twice():
+    async def handler(queue, credits, job):
+        await run_in_threadpool(slow_thread_step, queue, job, JOB_SETTLED_COMPENSATED, credits.refund)
+
+    job, credits = run_job(handler)
+    assert job["settled"] == JOB_SETTLED_COMPENSATED
+    assert credits.refunds == 1
+
+
+def test_follow_up_runs_after_success_outside_the_timeout():
+    seen = []
+
+    async def handler(queue, credits, job):
+        queue.settle(job["job_id"], JOB_SETTLED_KEPT)
+        return {"image_key": "key"}
+
+    async def on_succeeded(job, result):
+        # Longer than the job timeout
+        await asyncio.sleep(0.1)
+        seen.append(result["image_key"])
+
+    job, credits = run_job(handler, on_succeeded)
+    assert job["status"] == JOB_SUCCEEDED
+    assert seen == ["key"]
+    assert credits.refunds == 0
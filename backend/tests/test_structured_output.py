@@ -0,0 +1,69 @@
+"""
+Structured output tests: the strict schema only allows null for Optional
+fields, and replies that still send null for defaulted fields parse into the
+intended model instead of failing or falling through the content Union
+"""
+
+import json
+
+from app.bike.models import BikeSpecification, QuestionResponse, StructuredLLMResponse
+from app.bike.structured_output import STRUCTURED_RESPONSE_SCHEMA, _is_nullable
+from app.bike.utils import parse_llm_response
+
+QUESTION_DEFAULTED_FIELDS = ["total_steps", "is_complete", "is_multiselect", "follow_up_count", "max_follow_ups"]
+
+
+def test_schema_only_allows_null_for_optional_fields():
+    question = STRUCTURED_RESPONSE_SCHEMA["$defs"]["QuestionResponse"]["properties"]
+    bike_spec = STRUCTURED_RESPONSE_SCHEMA["$defs"]["BikeSpecification"]["properties"]
+
+    assert not any(_is_nullable(question[name]) for name in QUESTION_DEFAULTED_FIELDS)
+    assert not _is_nullable(bike_spec["custom_fields"])
+    assert _is_nullable(question["parent_question"])
+    assert _is_nullable(bike_spec["bike_category"])
+
+
+def test_question_with_null_defaults_keeps_its_options():
+    reply = {
+        "type": "question",
+        "message": "Next up: handlebar.",
+        "content": {
+            "question_type": "handlebar",
+            "question_text": "What kind of handlebar do you prefer?",
+            "options": [{"number": 1, "text": "Straight", "value": "straight"}],
+            "current_step": 6,
+            "user_feedback": None,
+            "parent_question": None,
+            **{name: None for name in QUESTION_DEFAULTED_FIELDS}
+        }
+    }
+    response = parse_llm_response(json.dumps(reply), StructuredLLMResponse)
+
+    assert isinstance(response.content, QuestionResponse)
+    assert response.content.options[0].text == "Straight"
+    assert response.content.total_steps == 15
+    assert response.content.max_follow_ups == 3
+
+
+def test_completion_with_null_custom_fields():
+    reply = {
+        "type": "completion",
+        "message": "Here's your bike.",
+        "content": {"bike_category": "Cruiser", "custom_fields": None}
+    }
+    response = parse_llm_response(json.dumps(reply), StructuredLLMResponse)
+
+    assert isinstance(response.content, BikeSpecification)
+    assert response.content.bike_category == "Cruiser"
+    assert response.content.custom_fields == {}
+
+
+def test_completion_custom_fields_entries_are_decoded():
+    reply = {
+        "type": "completion",
+        "message": "Here's your bike.",
+        "content": {"custom_fields": [{"key": "handlebar", "value": "scorpion claw"}]}
+    }
+    response = parse_llm_response(json.dumps(reply), StructuredLLMResponse)
+
+    assert response.content.custom_fields == {"handlebar": "scorpion claw"}
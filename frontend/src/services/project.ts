@@ -53,6 +53,8 @@ class ProjectService {
       if (searchParams.sort_order) queryParams.append('sort_order', searchParams.sort_order);
       if (searchParams.page) queryParams.append('page', searchParams.page.toString());
       if (searchParams.page_size) queryParams.append('page_size', searchParams.page_size.toString());
+      if (searchParams.cursor) queryParams.append('cursor', searchParams.cursor);
+      if (searchParams.include_total !== undefined) queryParams.append('include_total', searchParams.include_total.toString());
 
       const response = await fetch(
         `${API_CONFIG.BASE_URL}${API_ENDPOINTS.PROJECTS.LIST}?${queryParams.toString()}`,
@@ -24,7 +24,13 @@ export interface ImageApiRequest {
 }
 
 export interface ImageApiResponse {
-  image_base64: string;
+  job_id: string;
+  project_id: string;
+  status: 'queued' | 'running' | 'succeeded' | 'failed';
+  error?: string | null;
+  image_url?: string | null;
+  status_url: string;
+  events_url: string;
 }
 
 export interface ApiError {
@@ -6,7 +6,10 @@ export interface Project {
   project_type: string;
   status: ProjectStatus;
   configuration?: Record<string, any>;
-  image_base64?: string;
+  image_url?: string | null;
+  /** Thumbnail URLs keyed by longest side in pixels */
+  thumbnail_urls?: Record<string, string>;
+  image_placeholder?: string | null;
   conversation_history?: ConversationMessage[];
   lastUpdated: string;
 }
@@ -38,10 +41,13 @@ export interface ProjectSearchParams {
   project_type?: 'bike' | 'car';
   status?: ProjectStatus;
   is_favorite?: boolean;
-  sort_by: 'created_at' | 'name' | 'updated_at' | 'status';
+  sort_by: 'created_at' | 'name' | 'updated_at' | 'status' | 'relevance';
   sort_order: 'asc' | 'desc';
   page: number;
   page_size: number;
+  /** next_cursor of the previous page; switches to keyset pagination */
+  cursor?: string;
+  include_total?: boolean;
 }
 
 export interface PaginatedResponse<T> {
@@ -50,6 +56,7 @@ export interface PaginatedResponse<T> {
   page: number;
   page_size: number;
   total_pages: number;
+  next_cursor?: string | null;
 }
 
 export interface FavoriteToggle {
@@ -79,7 +86,10 @@ export interface ProjectSearch {
   description?: string;
   project_type: string;
   status: ProjectStatus;
-  image_base64?: string;
+  image_url?: string | null;
+  /** Thumbnail URLs keyed by longest side in pixels */
+  thumbnail_urls?: Record<string, string>;
+  image_placeholder?: string | null;
   completion_timestamp?: string;
   progress?: number;
   is_favorite?: boolean;
@@ -1,6 +1,17 @@
 import type { ProjectSearch } from '../types/project';
 import type { Project as DashboardProject, InProgressProject } from '../components/dashboard/types';
 import { formatReadableTime } from './time';
+import { buildApiUrl } from '../config/api';
+
+// Smallest thumbnail that still fills a dashboard card
+const CARD_THUMBNAIL_SIZE = 640;
+
+const projectImageUrl = (apiProject: ProjectSearch): string => {
+  const sizes = Object.keys(apiProject.thumbnail_urls || {}).map(Number).sort((a, b) => a - b);
+  const size = sizes.find(candidate => candidate >= CARD_THUMBNAIL_SIZE) ?? sizes[sizes.length - 1];
+  const url = size !== undefined ? apiProject.thumbnail_urls![String(size)] : apiProject.image_url;
+  return url ? buildApiUrl(url) : '';
+};
 
 export const mapToDashboardProject = (apiProject: ProjectSearch): DashboardProject => ({
   id: apiProject.id,
@@ -9,7 +20,7 @@ export const mapToDashboardProject = (apiProject: ProjectSearch): DashboardProje
   progress: apiProject.status === 'COMPLETED' ? 100 : 
             apiProject.status === 'IN_PROGRESS' ? 50 : 0,
   lastUpdated: apiProject.completion_timestamp ? formatReadableTime(apiProject.completion_timestamp) : 'recently',
-  image: apiProject.image_base64 ? `data:image/png;base64,${apiProject.image_base64}` : '',
+  image: projectImageUrl(apiProject),
   category: apiProject.project_type,
 });
 
@@ -19,5 +30,5 @@ export const mapToInProgressProject = (apiProject: ProjectSearch): InProgressPro
   status: apiProject.status,
   progress: apiProject.progress || 0,
   lastUpdated: apiProject.completion_timestamp ? formatReadableTime(apiProject.completion_timestamp) : 'recently',
-  image: apiProject.image_base64 ? `data:image/png;base64,${apiProject.image_base64}` : '',
+  image: projectImageUrl(apiProject),
 });